@@ -0,0 +1,9 @@
+"""
+Admin URLs. backend/urls.py imports this module on the first /admin/
+request, so cold starts that only serve the API skip the admin registry.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
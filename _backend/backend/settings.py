@@ -11,21 +11,36 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from dotenv import load_dotenv
 from os import getenv, path
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
-print(f"base dir = {BASE_DIR}")
 
-# Load python environment
-load_dotenv(BASE_DIR / '.env.local')
+# Load python environment (local development; deployments set real env vars)
+if (BASE_DIR / '.env.local').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env.local')
+
+# Serverless deployments (Vercel sets VERCEL=1) start a new process per cold
+# start: the admin registry is then loaded on the first /admin/ request and
+# wsgi.py warms the URL/template/DRF caches while the instance initialises.
+SERVERLESS = getenv("SERVERLESS", "True" if getenv("VERCEL") else "False").lower() == "true"
+COLDSTART_WARM_UP = getenv("COLDSTART_WARM_UP", str(SERVERLESS)).lower() == "true"
+# `manage.py coldstart_report` fails when a cold start to first byte (median,
+# new interpreter included) takes longer than this
+COLDSTART_BUDGET_MS = int(getenv("COLDSTART_BUDGET_MS", "1500"))
 
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = getenv('DJANGO_SECRET_KEY')
-FIELD_ENCRYPTION_KEY = getenv('DJANGO_ENCRYPTED_FIELD_KEY')
+# Comma-separated Fernet keys: the first encrypts, all of them decrypt. To
+# rotate, prepend a new key and run `manage.py rotate_field_keys`.
+FIELD_ENCRYPTION_KEY = [k.strip() for k in getenv('DJANGO_ENCRYPTED_FIELD_KEY', '').split(',') if k.strip()]
+# HMAC key for the SSN/TIN blind-index columns. Changing it invalidates every
+# stored index, so set it explicitly in production rather than relying on
+# the SECRET_KEY fallback.
+FIELD_BLIND_INDEX_KEY = getenv('DJANGO_BLIND_INDEX_KEY') or SECRET_KEY
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = getenv("DEBUG", "True").lower() == "true"
@@ -48,7 +63,8 @@ MEDIA_ROOT = path.join(BASE_DIR, "media")
 # Application definition
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # SimpleAdminConfig skips admin.autodiscover() at startup; backend/admin_urls.py runs it
+    'django.contrib.admin.apps.SimpleAdminConfig' if SERVERLESS else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -61,6 +77,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    # no-op unless REQUEST_INSTRUMENTATION is on; outermost so "total" covers the stack
+    'employee.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -80,6 +98,8 @@ ROOT_URLCONF = 'backend.urls'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        # integrations: hashed bearer tokens, no password hashing per request
+        "employee.authentication.ApiTokenAuthentication",
         "rest_framework.authentication.BasicAuthentication",   # add this
         "rest_framework.authentication.SessionAuthentication", # optional
     ],
@@ -88,6 +108,127 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Bearer tokens (employee/authentication.py): a verified token is trusted for
+# API_TOKEN_CACHE_TTL seconds per process, so revocation takes up to that long
+API_TOKEN_CACHE_TTL = int(getenv("API_TOKEN_CACHE_TTL", "60"))
+API_TOKEN_CACHE_SIZE = int(getenv("API_TOKEN_CACHE_SIZE", "1024"))
+# lifetime of tokens issued by `manage.py api_token create` (0 = no expiry)
+API_TOKEN_DEFAULT_DAYS = int(getenv("API_TOKEN_DEFAULT_DAYS", "90"))
+
+# Per-request profiling (employee/instrumentation.py): Server-Timing header and a
+# record on the "employee.instrumentation" logger; off by default
+REQUEST_INSTRUMENTATION = getenv("REQUEST_INSTRUMENTATION", "False").lower() == "true"
+REQUEST_INSTRUMENTATION_SLOW_QUERIES = int(getenv("REQUEST_INSTRUMENTATION_SLOW_QUERIES", "3"))
+# the same statement run this many times in one request is reported as N+1
+REQUEST_INSTRUMENTATION_N_PLUS_ONE = int(getenv("REQUEST_INSTRUMENTATION_N_PLUS_ONE", "5"))
+
+# On-demand profiles of employee API requests (employee/profiling.py): staff
+# send X-Profile: 1 or ?_profile=1; REQUEST_PROFILING_SAMPLE_RATE (0..1)
+# profiles a share of everyone's requests, or only those of the usernames in
+# REQUEST_PROFILING_USERS. The newest REQUEST_PROFILING_KEEP are kept.
+REQUEST_PROFILING = getenv("REQUEST_PROFILING", "False").lower() == "true"
+REQUEST_PROFILING_SAMPLE_RATE = float(getenv("REQUEST_PROFILING_SAMPLE_RATE", "0"))
+REQUEST_PROFILING_USERS = _list_env("REQUEST_PROFILING_USERS")
+REQUEST_PROFILING_DIR = getenv("REQUEST_PROFILING_DIR") or path.join(BASE_DIR, "profiles")
+REQUEST_PROFILING_KEEP = int(getenv("REQUEST_PROFILING_KEEP", "200"))
+REQUEST_PROFILING_INTERVAL_MS = float(getenv("REQUEST_PROFILING_INTERVAL_MS", "5"))
+
+# Logging for the employee app (employee/log.py): JSON lines on stdout written
+# by a background thread, with SSN/TIN redaction. LOG_LEVEL applies to every
+# "employee" logger; LOG_LEVELS overrides single ones, e.g.
+# "employee.views=DEBUG,employee.instrumentation=WARNING". DEBUG records are
+# kept at LOG_DEBUG_SAMPLE_RATE (0..1); past LOG_QUEUE_SIZE pending records
+# new ones are dropped instead of blocking the request.
+LOG_LEVEL = getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = dict(item.split("=", 1) for item in _list_env("LOG_LEVELS") if "=" in item)
+LOG_DEBUG_SAMPLE_RATE = float(getenv("LOG_DEBUG_SAMPLE_RATE", "0.1"))
+LOG_QUEUE_SIZE = int(getenv("LOG_QUEUE_SIZE", "10000"))
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "filters": {
+        "sample_debug": {"()": "employee.log.SamplingFilter", "rate": LOG_DEBUG_SAMPLE_RATE},
+    },
+    "handlers": {
+        "employee_queue": {
+            "()": "employee.log.queue_handler",
+            "queue_size": LOG_QUEUE_SIZE,
+            "filters": ["sample_debug"],
+        },
+    },
+    "loggers": {
+        "employee": {"handlers": ["employee_queue"], "level": LOG_LEVEL, "propagate": False},
+        **{name.strip(): {"level": level.strip().upper()} for name, level in LOG_LEVELS.items()},
+    },
+}
+
+# Roster list endpoints paginate only when ?page_size= or ?cursor= is sent
+ROSTER_PAGE_SIZE = int(getenv("ROSTER_PAGE_SIZE", "100"))
+ROSTER_MAX_PAGE_SIZE = int(getenv("ROSTER_MAX_PAGE_SIZE", "1000"))
+
+# Rows fetched per round trip by the streaming roster exports
+EXPORT_CHUNK_SIZE = int(getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Rows per INSERT statement for bulk employee/contractor imports
+IMPORT_BATCH_SIZE = int(getenv("IMPORT_BATCH_SIZE", "500"))
+
+# Worker search (searchapi/)
+SEARCH_PAGE_SIZE = int(getenv("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE_SIZE = int(getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+SEARCH_MIN_QUERY_LENGTH = int(getenv("SEARCH_MIN_QUERY_LENGTH", "2"))
+
+# Hash multipart uploads while they stream in (content-addressed document blobs)
+FILE_UPLOAD_HANDLERS = [
+    "employee.blobs.HashingMemoryFileUploadHandler",
+    "employee.blobs.HashingTemporaryFileUploadHandler",
+]
+
+# Resumable chunked document uploads (documentapi/uploads/). Chunks are
+# staged on local disk next to MEDIA_ROOT so finalize can move, not copy.
+DOCUMENT_UPLOAD_MAX_BYTES = int(getenv("DOCUMENT_UPLOAD_MAX_BYTES", str(200 * 1024 * 1024)))
+DOCUMENT_UPLOAD_STAGING_DIR = getenv("DOCUMENT_UPLOAD_STAGING_DIR") or path.join(MEDIA_ROOT, "documents", "_chunks")
+# unfinished sessions older than this are removed by clear_upload_sessions
+UPLOAD_SESSION_TTL_HOURS = int(getenv("UPLOAD_SESSION_TTL_HOURS", "48"))
+# Batch uploads (documentapi/batch/): files per request, and threads writing
+# their contents to storage
+DOCUMENT_BATCH_MAX_FILES = int(getenv("DOCUMENT_BATCH_MAX_FILES", "50"))
+DOCUMENT_BATCH_WORKERS = int(getenv("DOCUMENT_BATCH_WORKERS", "4"))
+
+# Document downloads: "django" streams through FileResponse (sendfile where
+# the WSGI server supports it); "x-accel-redirect" (nginx) or "x-sendfile"
+# (Apache, lighttpd) hand the file to the front proxy instead.
+DOCUMENT_DOWNLOAD_MODE = getenv("DOCUMENT_DOWNLOAD_MODE", "django")
+# internal nginx location mapped onto MEDIA_ROOT, for x-accel-redirect
+DOCUMENT_DOWNLOAD_ACCEL_PREFIX = getenv("DOCUMENT_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+
+# Encryption at rest for document files (employee/encrypted_storage.py):
+# comma-separated url-safe base64 32-byte keys, the first encrypts new files
+# and all of them decrypt. Unset, files are stored as plaintext.
+DOCUMENT_ENCRYPTION_KEY = [k.strip() for k in getenv("DOCUMENT_ENCRYPTION_KEY", "").split(",") if k.strip()]
+# plaintext bytes per AES-GCM segment; the unit a Range read decrypts
+DOCUMENT_ENCRYPTION_SEGMENT_SIZE = int(getenv("DOCUMENT_ENCRYPTION_SEGMENT_SIZE", str(64 * 1024)))
+
+# Day windows the expiring-documents report buckets by (documentapi/expiring/);
+# the largest one is its default horizon
+DOCUMENT_EXPIRY_WINDOWS = [int(n) for n in getenv("DOCUMENT_EXPIRY_WINDOWS", "30,60,90").split(",")]
+
+# Rendered roster list responses (employee/roster_cache.py). locmem is
+# per-process; set ROSTER_CACHE_DIR to share a file-based cache between the
+# workers of one node.
+ROSTER_CACHE_DIR = getenv("ROSTER_CACHE_DIR")
+ROSTER_CACHE_TIMEOUT = int(getenv("ROSTER_CACHE_TIMEOUT", "3600"))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "roster": {
+        "BACKEND": ("django.core.cache.backends.filebased.FileBasedCache" if ROSTER_CACHE_DIR
+                    else "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": ROSTER_CACHE_DIR or "roster",
+        "TIMEOUT": ROSTER_CACHE_TIMEOUT,
+    },
+}
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -14,13 +14,15 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path, include, re_path
+from django.urls import URLResolver, path, include, re_path
+from django.urls.resolvers import RoutePattern
 from employee.views import FrontendAppView
 from django.views.generic import TemplateView
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # like path('admin/', admin.site.urls), but backend.admin_urls is only
+    # imported when an /admin/ URL is resolved
+    URLResolver(RoutePattern('admin/'), 'backend.admin_urls', app_name='admin', namespace='admin'),
     path('api/emp/', include('employee.urls')),
     # re_path(r'^(?!api/|static/).*$', FrontendAppView.as_view(), name="frontend"),
 ]
@@ -9,9 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+if settings.COLDSTART_WARM_UP:
+    from employee.coldstart import warm_up
+    warm_up()
+
 app = application
\ No newline at end of file
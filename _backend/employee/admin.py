@@ -1,7 +1,29 @@
 from django.contrib import admin
-from .models import Party, EmployeeProfile, ContractorProfile, Document
+from .models import Party, EmployeeProfile, ContractorProfile, Document, RetentionPolicy, ApiToken
 
 admin.site.register(Party)
 admin.site.register(EmployeeProfile)
 admin.site.register(ContractorProfile)
-admin.site.register(Document)
\ No newline at end of file
+admin.site.register(Document)
+
+
+@admin.register(RetentionPolicy)
+class RetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "deleted_retention_days", "expired_retention_days", "updated_at")
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    """Tokens are issued with `manage.py api_token create`; here they can only be reviewed and revoked."""
+    list_display = ("name", "prefix", "user", "created_at", "expires_at", "revoked_at", "last_used_at")
+    list_filter = ("revoked_at",)
+    readonly_fields = ("user", "name", "prefix", "created_at", "expires_at", "last_used_at")
+    actions = ["revoke"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Revoke selected tokens")
+    def revoke(self, request, queryset):
+        for api_token in queryset.filter(revoked_at__isnull=True):
+            api_token.revoke()
@@ -0,0 +1,111 @@
+"""
+Bearer-token authentication for API integrations.
+
+    Authorization: Bearer <prefix>.<secret>
+
+BasicAuthentication runs the password hasher (PBKDF2 with hundreds of
+thousands of iterations) on every request. A token is random, so it is
+looked up by its SHA-256 in a unique index instead, and a verified token is
+kept in a small per-process cache for API_TOKEN_CACHE_TTL seconds, after
+which it is checked against the database again. Revoking a token drops it
+from the cache of the process that revoked it; other processes stop
+accepting it within the TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .models import ApiToken
+
+
+class TokenCache:
+    """Thread-safe LRU of token hash -> (user, ApiToken) with per-entry expiry."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return entry[1]
+
+    def set(self, digest, value, ttl):
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(settings.API_TOKEN_CACHE_SIZE)
+
+
+def _request_copies(user, api_token):
+    """
+    Copies of a cached user and token for one request: views and middleware
+    may set attributes on request.user, and the cached instances are shared
+    by every thread that presents the token.
+    """
+    user = copy.copy(user)
+    api_token = copy.copy(api_token)
+    api_token.user = user
+    return user, api_token
+
+
+class ApiTokenAuthentication(BaseAuthentication):
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid bearer header; expected 'Bearer <token>'.")
+        try:
+            token = auth[1].decode("ascii")
+        except UnicodeDecodeError:
+            raise exceptions.AuthenticationFailed("Invalid token.")
+        return self.authenticate_token(token)
+
+    def authenticate_token(self, token):
+        digest = ApiToken.hash_token(token)
+        cached = token_cache.get(digest)
+        if cached is not None:
+            return _request_copies(*cached)
+
+        api_token = ApiToken.objects.select_related("user").filter(token_hash=digest).first()
+        now = timezone.now()
+        if api_token is None or not api_token.is_valid(now) or not api_token.user.is_active:
+            raise exceptions.AuthenticationFailed("Invalid, expired or revoked token.")
+        ApiToken.objects.filter(pk=api_token.pk).update(last_used_at=now)
+
+        ttl = settings.API_TOKEN_CACHE_TTL
+        if api_token.expires_at is not None:
+            ttl = min(ttl, (api_token.expires_at - now).total_seconds())
+        token_cache.set(digest, (api_token.user, api_token), ttl)
+        return _request_copies(api_token.user, api_token)
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,214 @@
+"""
+Content-addressed storage for document files.
+
+Every distinct file body is stored once, as a DocumentBlob at
+blobs/<aa>/<sha256><ext>, and Document rows point at it. Re-uploading a
+file that is already stored only inserts the Document row and bumps the
+blob's reference count. Deleting the last referencing Document removes the
+file after the transaction commits.
+
+The SHA-256 is computed while a multipart upload streams in (the hashing
+upload handlers below, enabled through FILE_UPLOAD_HANDLERS), so the body
+is not read a second time. Files without a precomputed digest, such as an
+assembled chunked upload, are hashed on demand. Batch uploads write their
+new files concurrently (store_blobs).
+
+New files are written before the transaction that records their blobs
+commits. Callers wrap that transaction in delete_files_on_rollback(), which
+deletes the files again if it rolls back.
+"""
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DocumentBlob
+
+_collector = threading.local()
+_written = threading.local()
+
+
+class HashingUploadMixin:
+    """Attach `sha256` (hex digest) to each file the handler produces."""
+
+    def new_file(self, *args, **kwargs):
+        # set first: MemoryFileUploadHandler.new_file raises StopFutureHandlers
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    def receive_data_chunk(self, raw_data, start):
+        if not self.activated:
+            # too large to keep in memory: the temporary-file handler gets
+            # (and hashes) the chunks
+            return raw_data
+        return super().receive_data_chunk(raw_data, start)
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def file_digest(upload):
+    """The upload's SHA-256, from the upload handler if it already computed one."""
+    digest = getattr(upload, "sha256", None)
+    if digest:
+        return digest
+    sha256 = hashlib.sha256()
+    upload.seek(0)
+    for chunk in upload.chunks():
+        sha256.update(chunk)
+    upload.seek(0)
+    return sha256.hexdigest()
+
+
+def _acquire(digest, count=1):
+    """Take `count` more references on an existing blob; None if there is none."""
+    if DocumentBlob.objects.filter(sha256=digest).update(refcount=F("refcount") + count):
+        return DocumentBlob.objects.get(sha256=digest)
+    return None
+
+
+def _storage():
+    return DocumentBlob._meta.get_field("file").storage
+
+
+def _write(digest, upload):
+    return _storage().save(DocumentBlob.build_path(digest, upload.name), upload)
+
+
+def _written_file(name):
+    """Note a new file for delete_files_on_rollback(); returns `name`."""
+    files = getattr(_written, "files", None)
+    if files is not None:
+        files.append(name)
+    return name
+
+
+def _register(digest, saved_name, size, count=1):
+    """Record a freshly written file as a blob holding `count` references."""
+    try:
+        with transaction.atomic():
+            return DocumentBlob.objects.create(sha256=digest, file=saved_name, size=size, refcount=count)
+    except IntegrityError:
+        # a concurrent upload of the same content won the insert
+        _storage().delete(saved_name)
+        return _acquire(digest, count)
+
+
+def store_blob(upload):
+    """Return the blob holding `upload`'s content, storing it only if it is new."""
+    digest = file_digest(upload)
+    blob = _acquire(digest)
+    if blob is not None:
+        return blob
+    return _register(digest, _written_file(_write(digest, upload)), upload.size)
+
+
+def store_blobs(uploads, workers=None):
+    """
+    store_blob() for a batch, returning the blobs in upload order. Contents
+    not stored yet are written by a pool of `workers` threads (storage only,
+    no database access); the blob rows are then created or re-referenced
+    once per distinct content.
+    """
+    digests = [file_digest(upload) for upload in uploads]
+    known = set(DocumentBlob.objects.filter(sha256__in=digests).values_list("sha256", flat=True))
+    new = {}
+    for digest, upload in zip(digests, uploads):
+        if digest not in known:
+            new.setdefault(digest, upload)
+    with ThreadPoolExecutor(max_workers=workers or settings.DOCUMENT_BATCH_WORKERS) as pool:
+        futures = [pool.submit(_write, digest, upload) for digest, upload in new.items()]
+    # all writes have finished: note every file written before raising for
+    # one that failed
+    written = {digest: _written_file(future.result())
+               for digest, future in zip(new, futures) if future.exception() is None}
+    for future in futures:
+        future.result()
+
+    blobs = {}
+    for digest, count in Counter(digests).items():
+        if digest in written:
+            blobs[digest] = _register(digest, written[digest], new[digest].size, count)
+            continue
+        blob = _acquire(digest, count)
+        if blob is None:
+            # purged since we looked; store it after all
+            upload = uploads[digests.index(digest)]
+            blob = _register(digest, _written_file(_write(digest, upload)), upload.size, count)
+        blobs[digest] = blob
+    return [blobs[digest] for digest in digests]
+
+
+@contextmanager
+def delete_files_on_rollback():
+    """
+    Wrap the outermost transaction that calls store_blob()/store_blobs():
+    when it raises (and so rolls back), the files they wrote in it have no
+    blob row and are deleted. Nested uses leave that to the outer one.
+    """
+    if getattr(_written, "files", None) is not None:
+        yield
+        return
+    _written.files = files = []
+    try:
+        yield
+    except BaseException:
+        storage = _storage()
+        for name in files:
+            storage.delete(name)
+        raise
+    finally:
+        _written.files = None
+
+
+@contextmanager
+def collect_orphaned_files():
+    """
+    Within the block, release_blob() appends (storage, name, size) of every
+    file it orphans to the yielded list instead of deleting it on commit;
+    the caller deletes them itself once its transaction has committed.
+    """
+    files = []
+    _collector.files = files
+    try:
+        yield files
+    finally:
+        _collector.files = None
+
+
+def release_blob(blob_id):
+    """Drop one reference; delete the blob (and, on commit, its file) at zero."""
+    DocumentBlob.objects.filter(pk=blob_id).update(refcount=F("refcount") - 1)
+    orphan = DocumentBlob.objects.filter(pk=blob_id, refcount__lte=0).first()
+    if orphan is None:
+        return
+    name = orphan.file.name
+    storage = orphan.file.storage
+    # the filtered delete loses to a concurrent _acquire() that re-referenced it
+    deleted, _ = DocumentBlob.objects.filter(pk=blob_id, refcount__lte=0).delete()
+    if not deleted:
+        return
+    collected = getattr(_collector, "files", None)
+    if collected is not None:
+        collected.append((storage, name, orphan.size))
+    else:
+        transaction.on_commit(lambda: storage.delete(name))
@@ -0,0 +1,129 @@
+"""
+Streamed ZIP bundles of stored documents (documentapi/bundle/).
+
+zipfile writes the archive into a sink that is drained after every block,
+so bytes leave as soon as they are produced and no more than one block of
+file data is held at a time; nothing is written to disk. On an unseekable
+sink zipfile uses data descriptors, and it switches to ZIP64 records by
+itself for entries or archives past 4 GiB and for more than 65535 entries.
+Formats that are already compressed (PDF, JPEG, PNG, ...) are stored as-is,
+anything else is deflated. manifest.json, the last entry, lists every
+document with its path in the archive, or why it is missing.
+"""
+import json
+import zipfile
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.text import get_valid_filename
+from django.utils.timezone import localtime
+
+from .downloads import download_filename
+from .models import EmployeeProfile, ContractorProfile
+
+BLOCK_SIZE = 64 * 1024
+# already compressed (.docx is itself a ZIP); only .doc is deflated
+STORED_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".docx"}
+
+
+class _Sink:
+    """Write-only target for ZipFile; keeps what was written until drained."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        if self.parts:
+            data = b"".join(self.parts)
+            self.parts = []
+            yield data
+
+
+def party_folders(user, party_id=None):
+    """{party id: folder name} for the employer's workers (or just `party_id`)."""
+    employees = EmployeeProfile.objects.for_employer(user)
+    contractors = ContractorProfile.objects.for_employer(user)
+    if party_id is not None:
+        employees, contractors = employees.filter(pk=party_id), contractors.filter(pk=party_id)
+    names = {pk: f"{pk}_{last or ''}_{first or ''}"
+             for pk, first, last in employees.values_list("pk", "first_name", "last_name")}
+    names.update((pk, f"{pk}_{name or ''}") for pk, name in contractors.values_list("pk", "contractor_name"))
+    return {pk: get_valid_filename(name) for pk, name in names.items()}
+
+
+def _entry_name(doc, folders, used):
+    name = f"{folders.get(doc.party_id, doc.party_id)}/{download_filename(doc)}"
+    if name in used:
+        # same name and version under another document_type
+        path = Path(name)
+        name = f"{path.parent}/{path.stem}-{doc.pk}{path.suffix}"
+    used.add(name)
+    return name
+
+
+def iter_bundle(documents, folders):
+    sink = _Sink()
+    manifest = []
+    used = set()
+    with zipfile.ZipFile(sink, "w", allowZip64=True) as archive:
+        for doc in documents:
+            name = _entry_name(doc, folders, used)
+            stored = Path(doc.document.name).suffix.lower() in STORED_EXTENSIONS
+            entry = {
+                "path": name,
+                "id": doc.pk,
+                "party": doc.party_id,
+                "document_type": doc.document_type,
+                "document_name": doc.document_name,
+                "version": doc.version,
+                "expiry_date": doc.expiry_date,
+                "uploaded_at": doc.uploaded_at,
+                "size": doc.blob.size if doc.blob_id else None,
+                "sha256": doc.blob.sha256 if doc.blob_id else None,
+                "compression": "stored" if stored else "deflated",
+            }
+            try:
+                source = doc.document.storage.open(doc.document.name, "rb")
+            except OSError:
+                entry.update(path=None, error="file missing from storage")
+                manifest.append(entry)
+                continue
+
+            info = zipfile.ZipInfo(name, date_time=localtime(doc.uploaded_at).timetuple()[:6])
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            if entry["size"] is not None:
+                # lets zipfile pick ZIP64 headers up front for large files
+                info.file_size = entry["size"]
+            with source, archive.open(info, "w") as target:
+                while block := source.read(BLOCK_SIZE):
+                    target.write(block)
+                    yield from sink.drain()
+            yield from sink.drain()
+            manifest.append(entry)
+
+        archive.writestr("manifest.json", json.dumps(manifest, cls=DjangoJSONEncoder, indent=2),
+                         compress_type=zipfile.ZIP_DEFLATED)
+    yield from sink.drain()
+
+
+def bundle_response(documents, folders, filename):
+    """Stream `documents` (a Document queryset) as a ZIP download."""
+    documents = (documents.select_related("blob")
+                 .order_by("party_id", "document_name", "version", "pk")
+                 .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+    response = StreamingHttpResponse(iter_bundle(documents, folders), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}_{date.today():%Y%m%d}.zip"'
+    response["Cache-Control"] = "no-store"
+    # nginx would otherwise buffer the whole archive before sending it on
+    response["X-Accel-Buffering"] = "no"
+    return response
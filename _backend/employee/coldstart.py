@@ -0,0 +1,121 @@
+"""
+Cold-start measurement and warm-up for the serverless entry point.
+
+On Vercel every function instance starts by importing backend.wsgi, so
+import time and the one-off work of the first request are paid on every
+cold start. `manage.py coldstart_report` measures both in fresh
+interpreters and fails above COLDSTART_BUDGET_MS. It depends on the
+machine and its load, so run it as a CI step of its own; the unit suite
+only checks it with COLDSTART_BUDGET_CHECK=1.
+coldstart_baseline.json is a reference report from one development
+machine, for reading `--baseline` deltas against; CI should compare with a
+`--save` report from its own earlier run instead. warm_up() (run from
+wsgi.py when COLDSTART_WARM_UP is on) does the first request's lazy setup
+during initialisation instead: importing the URLconf and views, DRF's
+authentication/permission/renderer classes and compiling the SPA template.
+That doesn't shorten a cold start, it moves ~40 ms out of the first request
+into the init phase, which platforms run before routing traffic to the
+instance (and, on AWS Lambda, with boosted CPU).
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# "import time: self [us] | cumulative | imported package", nesting by indent
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Run in a fresh interpreter: import the WSGI module, then time one request
+# to the first body chunk. Prints one "COLDSTART {json}" line.
+_PROBE = r"""
+import json, sys, time
+started = time.perf_counter()
+from backend.wsgi import application
+imported = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {"PATH_INFO": sys.argv[1], "REQUEST_METHOD": "GET"}
+setup_testing_defaults(environ)
+status = []
+body = iter(application(environ, lambda s, headers, exc_info=None: status.append(s)))
+next(body, b"")
+first_byte = time.perf_counter()
+print("COLDSTART " + json.dumps({"import_ms": (imported - started) * 1000,
+                  "request_ms": (first_byte - imported) * 1000,
+                  "status": status[0]}), flush=True)
+"""
+
+
+def _child_env(extra_env=None):
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    env.update(extra_env or {})
+    return env
+
+
+def parse_importtime(output):
+    """[(module, self_us, cumulative_us, depth)] from `python -X importtime` stderr."""
+    entries = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            entries.append((module, int(own), int(cumulative), len(indent) // 2))
+    return entries
+
+
+def by_package(entries):
+    """Self time in microseconds per top-level package, largest first."""
+    totals = defaultdict(int)
+    for module, own, _, _ in entries:
+        totals[module.split(".", 1)[0]] += own
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def import_profile(module="backend.wsgi", extra_env=None):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=settings.BASE_DIR, env=_child_env(extra_env),
+                            capture_output=True, text=True, check=False)
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_cold_start(path, extra_env=None):
+    """Times of one cold start in a new process: process, import, first byte."""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", _PROBE, path],
+                            cwd=settings.BASE_DIR, env=_child_env(extra_env),
+                            capture_output=True, text=True, check=False)
+    total = (time.perf_counter() - started) * 1000
+    # stdout is shared with the app's log lines
+    lines = [line for line in result.stdout.splitlines() if line.startswith("COLDSTART ")]
+    if result.returncode or not lines:
+        raise RuntimeError(f"cold start probe failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(lines[0][len("COLDSTART "):])
+    timings["total_ms"] = total
+    return timings
+
+
+def warm_up():
+    from django.template import TemplateDoesNotExist
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    # imports ROOT_URLCONF and, through it, every view module: most of the
+    # first request's time. Not reverse_dict, which would also import the
+    # lazily loaded admin URLs.
+    get_resolver().url_patterns
+    for name in ("DEFAULT_AUTHENTICATION_CLASSES", "DEFAULT_PERMISSION_CLASSES",
+                 "DEFAULT_RENDERER_CLASSES", "DEFAULT_PARSER_CLASSES"):
+        getattr(api_settings, name)
+    try:
+        # compiled once and kept by the cached template loader
+        get_template("index.html")
+    except TemplateDoesNotExist:
+        pass
@@ -0,0 +1,54 @@
+"""
+Conditional GET (ETag / Last-Modified / 304) for the read endpoints.
+
+Validators are computed from metadata only, before anything is serialized:
+lists use MAX(updated_at) and COUNT(*) over the filtered queryset, details
+use the row's updated_at (and version, for documents). When the client's
+If-None-Match / If-Modified-Since still match, the view returns an empty
+304 and the serializer never runs.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class Validators:
+    def __init__(self, parts, last_modified):
+        digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()
+        # weak: the tag describes the data, not the exact bytes rendered
+        self.etag = f"W/{quote_etag(digest)}"
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    @classmethod
+    def for_list(cls, queryset, request, field="updated_at", extra=()):
+        """
+        MAX(field) + row count of `queryset`, keyed by user and query string.
+        `extra` holds anything else the payload depends on (e.g. today's date).
+        """
+        agg = queryset.order_by().aggregate(last=Max(field), count=Count("pk"))
+        params = sorted(request.query_params.lists())
+        return cls((request.user.pk, agg["count"], agg["last"], params, *extra), agg["last"])
+
+    @classmethod
+    def for_row(cls, queryset, *fields, field="updated_at", extra=(), **lookup):
+        """Validators for the single row matching `lookup`; 404 if there is none."""
+        row = queryset.filter(**lookup).values_list(field, *fields).first()
+        if row is None:
+            raise Http404("No matching object.")
+        return cls((lookup, *row, *extra), row[0])
+
+    def not_modified(self, request):
+        """The 304 (or 412) response if the client's copy is current, else None."""
+        response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+        return self.apply(response) if response is not None else None
+
+    def apply(self, response):
+        response["ETag"] = self.etag
+        if self.last_modified is not None:
+            response["Last-Modified"] = http_date(self.last_modified)
+        # let clients keep a copy but revalidate it on every use
+        response["Cache-Control"] = "private, no-cache"
+        return response
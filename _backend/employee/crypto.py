@@ -0,0 +1,42 @@
+"""
+Helpers for the encrypted SSN / TIN columns.
+
+The ciphertext stored by EncryptedCharField is randomized, so it can't be
+compared or indexed. Each encrypted identifier therefore gets a "blind
+index": a keyed HMAC-SHA256 of the normalized value, stored next to it and
+indexed uniquely. Equality lookups and duplicate checks hit that column.
+
+A masked copy (last four digits) is also stored at write time so list and
+export paths never have to decrypt.
+"""
+import hashlib
+import hmac
+import re
+
+from django.conf import settings
+
+
+def normalize_identifier(value):
+    """Digits only, so "123-45-6789" and "123456789" index the same."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    digits = re.sub(r"\D", "", value)
+    return digits or value or None
+
+
+def blind_index(value):
+    """Return the hex HMAC of `value`, or None for empty values."""
+    normalized = normalize_identifier(value)
+    if normalized is None:
+        return None
+    key = settings.FIELD_BLIND_INDEX_KEY.encode()
+    return hmac.new(key, normalized.encode(), hashlib.sha256).hexdigest()
+
+
+def mask_identifier(value, prefix="***-**-"):
+    """Keep only the last four digits, e.g. "***-**-6789"; None if empty."""
+    normalized = normalize_identifier(value)
+    if normalized is None:
+        return None
+    return f"{prefix}{normalized[-4:]}"
@@ -0,0 +1,149 @@
+"""
+Authenticated document downloads (documentapi/<id>/download/).
+
+Full downloads are FileResponse objects around the open file, so WSGI
+servers that provide wsgi.file_wrapper (gunicorn, uWSGI) send them with
+os.sendfile() instead of copying through Python. Single byte ranges
+(`Range: bytes=a-b`) are answered with 206 and streamed in blocks; multiple
+ranges fall back to the full body, which RFC 9110 allows.
+
+With DOCUMENT_DOWNLOAD_MODE set to "x-accel-redirect" (nginx) or
+"x-sendfile" (Apache / lighttpd) Django only authorises the request and the
+front proxy serves the bytes, ranges included. Encrypted files (see
+encrypted_storage.py) are always decrypted and streamed by Django; their
+file objects are seekable, so ranges decrypt only the segments they cover.
+
+The ETag is the blob's SHA-256, so it is strong and identical wherever the
+same content is stored.
+"""
+import mimetypes
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+BLOCK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class _RangeReader:
+    """Read at most `length` bytes of `fh`, starting at its current position."""
+
+    def __init__(self, fh, length):
+        self.fh = fh
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.fh.close()
+
+
+def parse_range(header, size):
+    """
+    (start, end) inclusive for a single-range `Range` header, or None when
+    the header is absent, malformed or asks for several ranges.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def download_filename(doc):
+    ext = Path(doc.document.name).suffix.lower()
+    return f"{doc.document_name}_v{doc.version:04d}{ext}"
+
+
+def _apply_headers(response, doc, etag, filename, inline):
+    if etag:
+        response["ETag"] = etag
+    response["Last-Modified"] = http_date(doc.updated_at.timestamp())
+    response["Cache-Control"] = "private, no-cache"
+    response["Accept-Ranges"] = "bytes"
+    response["X-Content-Type-Options"] = "nosniff"
+    if not isinstance(response, FileResponse):
+        response["Content-Disposition"] = content_disposition_header(not inline, filename)
+    return response
+
+
+def document_response(request, doc, inline=False):
+    """The 200 / 206 / 304 / 416 response serving `doc`'s file."""
+    etag = quote_etag(doc.blob.sha256) if doc.blob_id else None
+    filename = download_filename(doc)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    not_modified = get_conditional_response(request, etag=etag,
+                                            last_modified=int(doc.updated_at.timestamp()))
+    if not_modified is not None:
+        return _apply_headers(not_modified, doc, etag, filename, inline)
+
+    name = doc.document.name
+    storage = doc.document.storage
+    mode = settings.DOCUMENT_DOWNLOAD_MODE
+    # a proxy would send encrypted files as stored, so Django decrypts them
+    if mode in ("x-accel-redirect", "x-sendfile") and not getattr(storage, "encrypted", False):
+        response = HttpResponse(content_type=content_type)
+        if mode == "x-accel-redirect":
+            response["X-Accel-Redirect"] = f"{settings.DOCUMENT_DOWNLOAD_ACCEL_PREFIX.rstrip('/')}/{name}"
+        else:
+            response["X-Sendfile"] = storage.path(name)
+        return _apply_headers(response, doc, etag, filename, inline)
+
+    fh = storage.open(name, "rb")
+    # the open file's size: exact for every stored format, without a second open
+    size = fh.size
+    byte_range = None
+    # If-Range: only honour Range when the client's copy is the current one
+    if_range = request.headers.get("If-Range")
+    if not if_range or (etag and if_range == etag):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            fh.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return _apply_headers(response, doc, etag, filename, inline)
+
+    if byte_range is None:
+        response = FileResponse(fh, as_attachment=not inline, filename=filename, content_type=content_type)
+        response.block_size = BLOCK_SIZE
+        return _apply_headers(response, doc, etag, filename, inline)
+
+    start, end = byte_range
+    fh.seek(start)
+    response = FileResponse(_RangeReader(fh, end - start + 1), status=206,
+                            as_attachment=not inline, filename=filename, content_type=content_type)
+    response.block_size = BLOCK_SIZE
+    response["Content-Length"] = str(end - start + 1)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return _apply_headers(response, doc, etag, filename, inline)
@@ -0,0 +1,306 @@
+"""
+Encryption at rest for stored document files.
+
+EncryptedStorage wraps the default storage and writes every file in a
+segmented AES-256-GCM format (the STREAM construction Tink's streaming AEAD
+uses):
+
+    header   MAGIC | key id (4) | segment size (4) | salt (16) | nonce prefix (7)
+    segment  AES-GCM(next `segment size` plaintext bytes) incl. 16-byte tag, repeated
+
+Each file is encrypted under its own key, derived with HKDF from the first
+DOCUMENT_ENCRYPTION_KEY and the file's random salt. The nonce of segment i
+is prefix | i | last-flag and the header is the associated data of every
+segment, so segments can't be swapped, dropped or cut off without failing
+authentication.
+
+Encrypting and decrypting keep one segment in memory. Files returned by
+open() are seekable: a seek lands in the segment holding the offset, so a
+Range download only decrypts the segments it sends. Files stored before
+encryption was enabled have no header and are read back as they are.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import struct
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+
+MAGIC = b"\x89DOCENC\x01"
+HEADER = struct.Struct(">8s4sI16s7s")
+TAG_SIZE = 16
+
+
+class DecryptionError(Exception):
+    """A stored file that fails authentication or has no matching key."""
+
+
+def key_id(key):
+    return hashlib.sha256(key).digest()[:4]
+
+
+def load_keys():
+    """DOCUMENT_ENCRYPTION_KEY as raw 32-byte keys; the first one encrypts."""
+    keys = []
+    for encoded in settings.DOCUMENT_ENCRYPTION_KEY:
+        try:
+            key = base64.urlsafe_b64decode(encoded)
+        except (binascii.Error, ValueError):
+            key = b""
+        if len(key) != 32:
+            raise ImproperlyConfigured(
+                "DOCUMENT_ENCRYPTION_KEY entries must be url-safe base64 of 32 random bytes.")
+        keys.append(key)
+    return keys
+
+
+def _file_aead(key, salt):
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"document-file")
+    return AESGCM(hkdf.derive(key))
+
+
+def _nonce(prefix, index, last):
+    return prefix + struct.pack(">I?", index, last)
+
+
+def encrypted_size(plain_size, segment_size):
+    segments = max(1, -(-plain_size // segment_size))
+    return HEADER.size + plain_size + segments * TAG_SIZE
+
+
+def plain_size(stored_size, segment_size):
+    """Inverse of encrypted_size()."""
+    body = stored_size - HEADER.size
+    segments = max(1, -(-body // (segment_size + TAG_SIZE)))
+    return body - segments * TAG_SIZE
+
+
+class _EncryptingReader:
+    """Read-only stream of the encrypted form of `plain`."""
+
+    def __init__(self, plain, key, segment_size):
+        salt, prefix = os.urandom(16), os.urandom(7)
+        self.header = HEADER.pack(MAGIC, key_id(key), segment_size, salt, prefix)
+        self.aead = _file_aead(key, salt)
+        self.prefix = prefix
+        self.segment_size = segment_size
+        self.plain = plain
+        self.index = 0
+        self.finished = False
+        self.buffer = self.header
+        # one segment of lookahead: a segment is the last one when nothing follows it
+        self.pending = self._read_plain()
+
+    def _read_plain(self):
+        parts, wanted = [], self.segment_size
+        while wanted:
+            data = self.plain.read(wanted)
+            if not data:
+                break
+            parts.append(data)
+            wanted -= len(data)
+        return b"".join(parts)
+
+    def _next_segment(self):
+        current = self.pending
+        following = self._read_plain() if len(current) == self.segment_size else b""
+        last = not following
+        segment = self.aead.encrypt(_nonce(self.prefix, self.index, last), current, self.header)
+        self.index += 1
+        self.pending = following
+        self.finished = last
+        return segment
+
+    def read(self, size=-1):
+        parts, length = [], 0
+        while size is None or size < 0 or length < size:
+            if not self.buffer:
+                if self.finished:
+                    break
+                self.buffer = self._next_segment()
+            take = self.buffer if size is None or size < 0 else self.buffer[:size - length]
+            self.buffer = self.buffer[len(take):]
+            parts.append(take)
+            length += len(take)
+        return b"".join(parts)
+
+    def close(self):
+        pass
+
+
+class _DecryptingReader:
+    """Seekable plaintext view of an encrypted file, decrypting segment by segment."""
+
+    def __init__(self, raw, header, key, stored_size):
+        _, _, self.segment_size, salt, self.prefix = HEADER.unpack(header)
+        self.header = header
+        self.aead = _file_aead(key, salt)
+        self.raw = raw
+        body = stored_size - HEADER.size
+        stride = self.segment_size + TAG_SIZE
+        self.segments = max(1, -(-body // stride))
+        # every segment, the last included, carries at least its tag
+        if body - (self.segments - 1) * stride < TAG_SIZE:
+            raise DecryptionError(f"{raw.name} is truncated.")
+        self.size = plain_size(stored_size, self.segment_size)
+        self.position = 0
+        self._cached = (None, b"")
+
+    def _segment(self, index):
+        if self._cached[0] == index:
+            return self._cached[1]
+        stride = self.segment_size + TAG_SIZE
+        self.raw.seek(HEADER.size + index * stride)
+        data = self.raw.read(stride)
+        last = index == self.segments - 1
+        try:
+            plain = self.aead.decrypt(_nonce(self.prefix, index, last), data, self.header)
+        except InvalidTag:
+            raise DecryptionError(f"Segment {index} of {self.raw.name} failed authentication.")
+        self._cached = (index, plain)
+        return plain
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size - self.position
+        parts = []
+        while size > 0 and self.position < self.size:
+            index, offset = divmod(self.position, self.segment_size)
+            data = self._segment(index)[offset:offset + size]
+            parts.append(data)
+            self.position += len(data)
+            size -= len(data)
+        return b"".join(parts)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError("Negative seek position.")
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    @property
+    def closed(self):
+        return self.raw.closed
+
+    def close(self):
+        self.raw.close()
+
+
+class EncryptingFile(File):
+    """`content` as it will be stored: header plus encrypted segments."""
+
+    def __init__(self, content, key, segment_size, name=None):
+        try:
+            content.seek(0)
+        except (AttributeError, OSError):
+            pass
+        super().__init__(_EncryptingReader(content, key, segment_size), name=name or content.name)
+        self.size = encrypted_size(content.size, segment_size)
+
+
+class EncryptedStorage(Storage):
+    """Wraps `inner` (default_storage) so file bodies are stored encrypted."""
+
+    # the stored bytes are ciphertext, so a front proxy can't serve them
+    encrypted = True
+
+    def __init__(self, inner=None, keys=None, segment_size=None):
+        self.inner = inner if inner is not None else default_storage
+        self.keys = keys if keys is not None else load_keys()
+        if not self.keys:
+            raise ImproperlyConfigured("EncryptedStorage needs DOCUMENT_ENCRYPTION_KEY.")
+        self.segment_size = segment_size or settings.DOCUMENT_ENCRYPTION_SEGMENT_SIZE
+
+    def _key_for(self, header):
+        wanted = HEADER.unpack(header)[1]
+        for key in self.keys:
+            if key_id(key) == wanted:
+                return key
+        raise DecryptionError("No DOCUMENT_ENCRYPTION_KEY matches this file's key id.")
+
+    def _open(self, name, mode="rb"):
+        raw = self.inner.open(name, "rb")
+        header = raw.read(HEADER.size)
+        if not header.startswith(MAGIC):
+            # written before encryption was enabled
+            raw.seek(0)
+            return raw
+        if len(header) < HEADER.size:
+            raise DecryptionError(f"{name} is truncated.")
+        return File(_DecryptingReader(raw, header, self._key_for(header), raw.size), name=name)
+
+    def save(self, name, content, max_length=None):
+        encrypted = EncryptingFile(content, self.keys[0], self.segment_size, name=name)
+        return self.inner.save(name, encrypted, max_length=max_length)
+
+    def size(self, name):
+        """
+        Plaintext size, from the stored size less the header and segment tags
+        of the current DOCUMENT_ENCRYPTION_SEGMENT_SIZE; the file isn't read.
+        Files stored unencrypted or with another segment size need the exact
+        size of open(name).
+        """
+        return plain_size(self.inner.size(name), self.segment_size)
+
+    # ----- everything else is the inner storage's ----- #
+
+    def delete(self, name):
+        return self.inner.delete(name)
+
+    def exists(self, name):
+        return self.inner.exists(name)
+
+    def listdir(self, path):
+        return self.inner.listdir(path)
+
+    def path(self, name):
+        return self.inner.path(name)
+
+    def url(self, name):
+        return self.inner.url(name)
+
+    def get_valid_name(self, name):
+        return self.inner.get_valid_name(name)
+
+    def get_available_name(self, name, max_length=None):
+        return self.inner.get_available_name(name, max_length=max_length)
+
+    def generate_filename(self, filename):
+        return self.inner.generate_filename(filename)
+
+    def get_accessed_time(self, name):
+        return self.inner.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.inner.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.inner.get_modified_time(name)
+
+
+def document_storage():
+    """Storage for document files; encrypted once DOCUMENT_ENCRYPTION_KEY is set."""
+    if settings.DOCUMENT_ENCRYPTION_KEY:
+        return EncryptedStorage()
+    return default_storage
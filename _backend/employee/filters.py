@@ -0,0 +1,114 @@
+"""
+Declarative query-parameter filters for the roster endpoints.
+
+Each RosterFilterSet maps a public ?param= to an ORM lookup and a parser.
+Unknown parameters are ignored (they may belong to pagination or search);
+malformed values raise a DRF ValidationError, i.e. a 400 naming the param.
+Choice filters accept comma-separated lists (?address_state=TX,CA).
+
+The composite / partial indexes these filters rely on are declared on the
+models (see the Meta.indexes of Party, EmployeeProfile, ContractorProfile,
+Document).
+"""
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import Party, EmployeeProfile
+
+
+class Filter:
+    def __init__(self, lookup, parse):
+        self.lookup = lookup
+        self.parse = parse
+
+
+def parse_bool(value):
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes"):
+        return True
+    if lowered in ("0", "false", "no"):
+        return False
+    raise ValueError("Must be true or false.")
+
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Must be an integer.")
+
+
+def parse_iso_date(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError("Must be a date (YYYY-MM-DD).")
+    return parsed
+
+
+def choice_list(choices):
+    allowed = {key for key, _ in choices}
+
+    def parse(value):
+        values = [v.strip() for v in value.split(",") if v.strip()]
+        invalid = [v for v in values if v not in allowed]
+        if invalid or not values:
+            raise ValueError(f"Unsupported value(s): {', '.join(invalid) or value!r}.")
+        return values
+    return parse
+
+
+def text_list(value):
+    values = [v.strip() for v in value.split(",") if v.strip()]
+    if not values:
+        raise ValueError("Must not be empty.")
+    return values
+
+
+class RosterFilterSet:
+    def __init__(self, filters):
+        self.filters = filters
+
+    def filter_queryset(self, queryset, request):
+        errors = {}
+        for param, spec in self.filters.items():
+            raw = request.query_params.get(param)
+            if raw is None or raw == "":
+                continue
+            try:
+                value = spec.parse(raw)
+            except ValueError as exc:
+                errors[param] = str(exc)
+                continue
+            queryset = queryset.filter(**{spec.lookup: value})
+        if errors:
+            raise ValidationError(errors)
+        return queryset
+
+
+ROSTER_FILTERS = {
+    "active": Filter("active", parse_bool),
+    "address_state": Filter("address_state__in", choice_list(Party.choice_state)),
+}
+
+EMPLOYEE_FILTERS = RosterFilterSet({
+    **ROSTER_FILTERS,
+    "compensation_type": Filter("compensation_type__in", choice_list(EmployeeProfile.choice_compensation)),
+    "gender": Filter("gender__in", choice_list(EmployeeProfile.choice_gender)),
+    "marital_status": Filter("marital_status__in", choice_list(EmployeeProfile.choice_marital)),
+    "date_hired_after": Filter("date_hired__gte", parse_iso_date),
+    "date_hired_before": Filter("date_hired__lte", parse_iso_date),
+    "date_offboarded_after": Filter("date_offboarded__gte", parse_iso_date),
+    "date_offboarded_before": Filter("date_offboarded__lte", parse_iso_date),
+    "offboarded": Filter("date_offboarded__isnull", lambda v: not parse_bool(v)),
+})
+
+CONTRACTOR_FILTERS = RosterFilterSet(ROSTER_FILTERS)
+
+EXPIRING_DOCUMENT_FILTERS = RosterFilterSet({
+    "party": Filter("party_id", parse_int),
+    "document_type": Filter("document_type__in", text_list),
+    "expires_after": Filter("expiry_date__gte", parse_iso_date),
+})
@@ -0,0 +1,201 @@
+"""
+Bulk employee / contractor import.
+
+Every row is validated field-by-field first; email, phone and SSN/TIN
+uniqueness is then checked for the whole batch with one `IN` query per
+field (plus an in-file duplicate pass), and the Party and profile rows are
+written with batched INSERTs inside a single transaction. Nothing is written if any row
+fails, so a corrected file can simply be re-submitted.
+"""
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .models import Party, EmployeeProfile, ContractorProfile
+from .crypto import blind_index
+from .roster_cache import invalidate_employer
+from .serializers import (
+                PartyBulkRowSerializer,
+                EmployeeProfileBulkRowSerializer,
+                ContractorProfileBulkRowSerializer)
+
+
+PARTY_FIELDS = tuple(PartyBulkRowSerializer.Meta.fields)
+
+# kind -> (model, row serializer, encrypted identifier field)
+IMPORT_KINDS = {
+    "employee": (EmployeeProfile, EmployeeProfileBulkRowSerializer, "ssn"),
+    "contractor": (ContractorProfile, ContractorProfileBulkRowSerializer, "tin"),
+}
+
+
+class ImportFormatError(ValueError):
+    """The uploaded payload could not be parsed into rows."""
+
+
+def parse_rows(content, fmt):
+    """
+    Turn CSV or JSON text into a list of row dicts in the nested shape the
+    create endpoints accept. CSV columns are flat; party columns are folded
+    into "party" and empty cells are dropped so model defaults apply.
+    """
+    if fmt == "json":
+        try:
+            data = json.loads(content)
+        except ValueError as exc:
+            raise ImportFormatError(f"Invalid JSON: {exc}")
+        if isinstance(data, dict):
+            data = data.get("rows")
+        if not isinstance(data, list):
+            raise ImportFormatError("JSON body must be a list of rows or {\"rows\": [...]}.")
+        return data
+
+    if fmt == "csv":
+        rows = []
+        for record in csv.DictReader(io.StringIO(content)):
+            row = {"party": {}}
+            for key, value in record.items():
+                if key is None or value is None or value.strip() == "":
+                    continue
+                key = key.strip()
+                if key in PARTY_FIELDS:
+                    row["party"][key] = value.strip()
+                else:
+                    row[key] = value.strip()
+            rows.append(row)
+        return rows
+
+    raise ImportFormatError("Unsupported format. Use 'csv' or 'json'.")
+
+
+def _add_party_error(errors, index, field, message):
+    # Nested under "party" to match the serializer's own error shape.
+    errors.setdefault(index, {}).setdefault("party", {}).setdefault(field, []).append(message)
+
+
+def _check_unique(rows, field, errors, label):
+    """In-file duplicates plus one IN query against existing parties."""
+    first_seen = {}
+    for index, data in rows:
+        value = data["party"][field]
+        if value in first_seen:
+            _add_party_error(errors, index, field, f"Duplicate {label} in file (row {first_seen[value]}).")
+        else:
+            first_seen[value] = index
+
+    existing = set(
+        Party.objects.filter(**{f"{field}__in": list(first_seen)}).values_list(field, flat=True)
+    )
+    for index, data in rows:
+        if data["party"][field] in existing:
+            _add_party_error(errors, index, field, f"{label.capitalize()} already exists.")
+
+
+def _check_identifier_unique(model, field, rows, errors):
+    """Same as _check_unique for SSN/TIN, matched through the blind index."""
+    label = field.upper()
+    first_seen = {}
+    digests = {}
+    for index, data in rows:
+        digest = blind_index(data.get(field))
+        if digest is None:
+            continue
+        digests[index] = digest
+        if digest in first_seen:
+            errors.setdefault(index, {}).setdefault(field, []).append(
+                f"Duplicate {label} in file (row {first_seen[digest]}).")
+        else:
+            first_seen[digest] = index
+
+    index_field = f"{field}_index"
+    existing = set(
+        model.objects.filter(**{f"{index_field}__in": list(first_seen)}).values_list(index_field, flat=True)
+    )
+    for index, digest in digests.items():
+        if digest in existing:
+            errors.setdefault(index, {}).setdefault(field, []).append(f"{label} already exists.")
+
+
+def _bulk_insert_profiles(model, objs, batch_size):
+    """
+    Insert only the child table of a multi-table-inherited model; the Party
+    rows (and their pks) already exist. bulk_create refuses MTI models, so
+    the rows go in with executemany, each value prepared as save() would
+    (pre_save, then get_db_prep_save, which encrypts the SSN/TIN).
+    """
+    fields = model._meta.local_concrete_fields
+    qn = connection.ops.quote_name
+    sql = (f"INSERT INTO {qn(model._meta.db_table)} ({', '.join(qn(f.column) for f in fields)}) "
+           f"VALUES ({', '.join(['%s'] * len(fields))})")
+    rows = [[f.get_db_prep_save(f.pre_save(obj, True), connection) for f in fields] for obj in objs]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = connection.alias
+
+
+def import_rows(kind, rows, employer, dry_run=False):
+    """
+    Validate and insert `rows` for `employer`.
+
+    Returns {"created": int, "ids": [...], "errors": [{"row": n, "errors": {...}}]}
+    with 1-based row numbers. When any row has errors nothing is written.
+    """
+    model, row_serializer_class, identifier_field = IMPORT_KINDS[kind]
+    batch_size = settings.IMPORT_BATCH_SIZE
+
+    errors = {}
+    valid = []
+    for index, row in enumerate(rows, start=1):
+        serializer = row_serializer_class(data=row)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors[index] = serializer.errors
+
+    _check_unique(valid, "email", errors, "email")
+    _check_unique(valid, "phone_number", errors, "phone number")
+    _check_identifier_unique(model, identifier_field, valid, errors)
+
+    result = {"created": 0, "ids": [], "errors": []}
+    if errors or dry_run:
+        result["errors"] = [{"row": i, "errors": errors[i]} for i in sorted(errors)]
+        return result
+
+    profiles = []
+    for _, data in valid:
+        data = dict(data)
+        party_data = data.pop("party")
+        profile = model(employer=employer, **party_data, **data)
+        profile.refresh_derived_fields()
+        profiles.append(profile)
+
+    party_fields = [f.attname for f in Party._meta.concrete_fields if not f.primary_key]
+    try:
+        with transaction.atomic():
+            parties = Party.objects.bulk_create(
+                [Party(**{f: getattr(p, f) for f in party_fields}) for p in profiles],
+                batch_size=batch_size,
+            )
+            for profile, party in zip(profiles, parties):
+                profile.id = profile.party_ptr_id = party.pk
+                profile.created_at = party.created_at
+                profile.updated_at = party.updated_at
+            _bulk_insert_profiles(model, profiles, batch_size)
+            # bulk inserts send no post_save, so the cached rosters are dropped here
+            transaction.on_commit(lambda: invalidate_employer(employer.pk))
+    except IntegrityError:
+        # A concurrent writer took an email/phone between the check and insert.
+        result["errors"] = [{"row": None, "errors": {"non_field_errors": [
+            "A conflicting record was created concurrently; nothing was imported. Please retry."
+        ]}}]
+        return result
+
+    result["created"] = len(profiles)
+    result["ids"] = [p.pk for p in profiles]
+    return result
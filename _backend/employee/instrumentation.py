@@ -0,0 +1,193 @@
+"""
+Opt-in per-request profiling (REQUEST_INSTRUMENTATION=true).
+
+For every request the middleware records each SQL statement (through
+connection.execute_wrapper), the time spent in serializer `.data` and in
+response rendering, and reports them
+
+  * in a Server-Timing header (db, serialize, render, total), which browser
+    dev tools display next to the request, and
+  * as one log record on the "employee.instrumentation" logger, whose
+    extra fields hold the slowest statements and any repeated-query
+    warnings (a JSON line through employee/log.py).
+
+A statement template executed REQUEST_INSTRUMENTATION_N_PLUS_ONE times or
+more is reported as an N+1 pattern, an identical statement with identical
+parameters run twice as a duplicate. Each statement is attributed to the
+innermost serializer field that was being rendered when it ran (found by
+walking the stack, only when a query executes), or else to the first
+frame in this app.
+
+When the setting is off the middleware raises MiddlewareNotUsed, so it is
+dropped from the stack at startup and costs nothing.
+"""
+import logging
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.fields import Field
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+logger = logging.getLogger("employee.instrumentation")
+
+_profile = ContextVar("request_profile", default=None)
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.serialize = 0.0
+        self.render = 0.0
+        self.render_started = None
+        self._serializing = 0
+
+    def db_time(self):
+        return sum(q["duration"] for q in self.queries)
+
+    def repeated(self):
+        """(N+1 patterns, duplicates) as lists of summaries."""
+        by_template = defaultdict(list)
+        for query in self.queries:
+            by_template[query["sql"]].append(query)
+        threshold = settings.REQUEST_INSTRUMENTATION_N_PLUS_ONE
+        patterns, duplicates = [], []
+        for sql, runs in by_template.items():
+            origins = Counter(q["origin"] for q in runs)
+            if len(runs) >= threshold:
+                patterns.append({"count": len(runs), "sql": sql[:300], "origin": origins.most_common(1)[0][0]})
+            repeats = Counter(q["params"] for q in runs)
+            for params, count in repeats.items():
+                if count > 1:
+                    duplicates.append({"count": count, "sql": sql[:300],
+                                       "origin": origins.most_common(1)[0][0]})
+        return patterns, duplicates
+
+
+def _origin():
+    """The serializer field being rendered, else the first frame of this app."""
+    app_frame = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        owner = frame.f_locals.get("self")
+        # type(), not isinstance(): `self` may be a lazy object such as
+        # request.user, and isinstance() would evaluate it (run a query,
+        # land back here, ...)
+        owner_type = type(owner)
+        if (frame.f_code.co_name in ("to_representation", "get_attribute")
+                and issubclass(owner_type, Field) and not issubclass(owner_type, ListSerializer)
+                and owner.field_name):
+            parent = type(owner.parent).__name__ if owner.parent is not None else "?"
+            return f"{parent}.{owner.field_name}"
+        filename = frame.f_code.co_filename
+        if app_frame is None and filename.startswith(APP_DIR) and filename != __file__:
+            app_frame = f"{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno}"
+        frame = frame.f_back
+    return app_frame or "?"
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append({
+            "sql": sql,
+            "params": repr(params),
+            "duration": time.perf_counter() - started,
+            "origin": _origin(),
+        })
+
+
+def _timed_data(fget):
+    def data(serializer):
+        profile = _profile.get()
+        if profile is None or profile._serializing:
+            return fget(serializer)
+        profile._serializing += 1
+        started = time.perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            profile.serialize += time.perf_counter() - started
+            profile._serializing -= 1
+    data._instrumented = True
+    return property(data)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestInstrumentationMiddleware:
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        # Serializer time: `.data` of every serializer class goes through here
+        if not getattr(BaseSerializer.data.fget, "_instrumented", False):
+            BaseSerializer.data = _timed_data(BaseSerializer.data.fget)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _profile.reset(token)
+        if profile.render_started is not None:
+            profile.render = time.perf_counter() - profile.render_started
+        self.report(request, response, profile)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        profile = _profile.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+        return response
+
+    def report(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        db = profile.db_time()
+        patterns, duplicates = profile.repeated()
+        timings = [
+            f'db;dur={_ms(db)};desc="{len(profile.queries)} queries"',
+            f"serialize;dur={_ms(profile.serialize)}",
+            f"render;dur={_ms(profile.render)}",
+            f"total;dur={_ms(total)}",
+        ]
+        if patterns:
+            timings.append(f'nplusone;desc="{patterns[0]["origin"]} x{patterns[0]["count"]}"')
+        existing = response.get("Server-Timing")
+        response["Server-Timing"] = ", ".join(([existing] if existing else []) + timings)
+
+        slowest = sorted(profile.queries, key=lambda q: q["duration"], reverse=True)
+        logger.info("request profile", extra={
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": _ms(total),
+            "db_ms": _ms(db),
+            "queries": len(profile.queries),
+            "serialize_ms": _ms(profile.serialize),
+            "render_ms": _ms(profile.render),
+            "slowest": [{"ms": _ms(q["duration"]), "sql": q["sql"][:300], "origin": q["origin"]}
+                        for q in slowest[:settings.REQUEST_INSTRUMENTATION_SLOW_QUERIES]],
+            "n_plus_one": patterns,
+            "duplicates": duplicates,
+        })
@@ -0,0 +1,135 @@
+"""
+Logging for the employee app (wired up by LOGGING in settings).
+
+Request threads only put records on an in-memory queue; a QueueListener
+thread formats them as one JSON object per line and writes them to stdout.
+When the queue is full a record is dropped rather than waited on, and the
+next record that gets through carries the number dropped.
+
+    logger.info("employee created", extra={"party_id": 12})
+    -> {"ts": "...", "level": "INFO", "logger": "employee.views",
+        "message": "employee created", "party_id": 12}
+
+Before it is written every record is redacted: values under an `ssn` or
+`tin` key (at any depth of the extra fields) are replaced, and anything in
+the message or in string values written like an SSN or EIN (123-45-6789,
+12-3456789) is masked.
+DEBUG records are sampled at LOG_DEBUG_SAMPLE_RATE so that verbose paths can
+stay instrumented in production.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+REDACTED = "[redacted]"
+SENSITIVE_KEYS = {"ssn", "tin"}
+# 123-45-6789 or 12-3456789 (not part of a longer number). Bare nine-digit
+# values are only redacted under SENSITIVE_KEYS: in free text they are as
+# likely order ids or amounts.
+SENSITIVE_PATTERN = re.compile(r"(?<![\d-])(?:\d{3}-\d{2}-\d{4}|\d{2}-\d{7})(?![\d-])")
+
+# attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in SENSITIVE_KEYS else redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        return SENSITIVE_PATTERN.sub(REDACTED, value)
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, message, extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(redact(entry), default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Passes records above DEBUG, and a `rate` share of DEBUG records."""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, queue_size):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only what can't wait: merge args into the message and render the
+        # traceback while it still exists. JSON and redaction happen on the
+        # listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # called under the handler's lock
+        if self.dropped:
+            record.dropped_before = self.dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        else:
+            self.dropped = 0
+
+
+def queue_handler(queue_size=10000, stream=None):
+    """LOGGING handler factory: the queue handler plus its started listener."""
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter())
+    handler = NonBlockingQueueHandler(queue_size)
+    handler.listener = QueueListener(handler.queue, output)
+    handler.listener.start()
+    atexit.register(handler.listener.stop)
+
+    def restart_in_child():
+        # a forked worker (gunicorn --preload) inherits neither the thread
+        # nor a usable queue lock
+        handler.queue = handler.listener.queue = queue.Queue(maxsize=queue_size)
+        handler.listener._thread = None
+        handler.listener.start()
+
+    os.register_at_fork(after_in_child=restart_in_child)
+    return handler
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = "Issue, list and revoke API bearer tokens."
+
+    def add_arguments(self, parser):
+        sub = parser.add_subparsers(dest="action", required=True)
+        create = sub.add_parser("create", help="Issue a token; it is printed once and never stored")
+        create.add_argument("username")
+        create.add_argument("--name", required=True, help="What the token is for, e.g. the integration")
+        create.add_argument("--days", type=int, default=settings.API_TOKEN_DEFAULT_DAYS,
+                            help="Lifetime in days (0 = no expiry)")
+        listing = sub.add_parser("list", help="Show tokens (never the secret)")
+        listing.add_argument("--user", help="Only this username's tokens")
+        revoke = sub.add_parser("revoke", help="Revoke tokens by prefix")
+        revoke.add_argument("prefix", nargs="+")
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_create(self, options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user {options['username']!r}.")
+        api_token, token = ApiToken.issue(user, options["name"], days=options["days"])
+        expiry = api_token.expires_at.isoformat() if api_token.expires_at else "never"
+        self.stdout.write(f"Token for {user.username} ({api_token.name}), expires {expiry}:")
+        self.stdout.write(self.style.SUCCESS(token))
+        self.stdout.write("Store it now; only its hash is kept.")
+
+    def handle_list(self, options):
+        tokens = ApiToken.objects.select_related("user").order_by("user__username", "created_at")
+        if options["user"]:
+            tokens = tokens.filter(user__username=options["user"])
+        for api_token in tokens:
+            state = "revoked" if api_token.revoked_at else ("active" if api_token.is_valid() else "expired")
+            self.stdout.write(f"{api_token.prefix}  {api_token.user.username:<20} {api_token.name:<24} {state:<8} "
+                              f"expires={api_token.expires_at or '-'} last_used={api_token.last_used_at or '-'}")
+
+    def handle_revoke(self, options):
+        for prefix in options["prefix"]:
+            tokens = ApiToken.objects.filter(prefix=prefix, revoked_at__isnull=True)
+            if not tokens:
+                self.stderr.write(f"No active token with prefix {prefix}.")
+            for api_token in tokens:
+                api_token.revoke()
+                self.stdout.write(self.style.SUCCESS(f"Revoked {api_token}."))
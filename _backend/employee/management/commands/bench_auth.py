@@ -0,0 +1,63 @@
+import base64
+import secrets
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from employee.authentication import ApiTokenAuthentication, token_cache
+from employee.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Time one authentication with BasicAuthentication (password hash) against "
+        "ApiTokenAuthentication, cold (database lookup) and warm (token cache). "
+        "Runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--basic-iterations", type=int, default=10)
+        parser.add_argument("--token-iterations", type=int, default=10000)
+
+    def time_per_call(self, iterations, fn):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        return (time.perf_counter() - started) / iterations
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        with transaction.atomic():
+            password = secrets.token_urlsafe(16)
+            user = get_user_model().objects.create_user(f"bench-auth-{secrets.token_hex(4)}", password=password)
+            _, token = ApiToken.issue(user, "bench")
+
+            basic_request = Request(factory.get("/", HTTP_AUTHORIZATION=f"Basic {self.basic(user.username, password)}"))
+            token_request = Request(factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}"))
+            basic, bearer = BasicAuthentication(), ApiTokenAuthentication()
+
+            def cold():
+                token_cache.clear()
+                bearer.authenticate(token_request)
+
+            results = [
+                ("basic", self.time_per_call(options["basic_iterations"], lambda: basic.authenticate(basic_request))),
+                ("token (cold)", self.time_per_call(max(1, options["token_iterations"] // 100), cold)),
+                ("token (warm)", self.time_per_call(options["token_iterations"],
+                                                    lambda: bearer.authenticate(token_request))),
+            ]
+            transaction.set_rollback(True)
+        token_cache.clear()
+
+        baseline = results[0][1]
+        for label, seconds in results:
+            self.stdout.write(f"{label:<14}{seconds * 1e6:>12.1f} us/request  {baseline / seconds:>9.0f}x")
+
+    @staticmethod
+    def basic(username, password):
+        return base64.b64encode(f"{username}:{password}".encode()).decode()
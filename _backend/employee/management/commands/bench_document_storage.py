@@ -0,0 +1,97 @@
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.encrypted_storage import EncryptedStorage, load_keys
+
+MB = 1024 * 1024
+READ_SIZE = 64 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare write, full-read and random Range-read throughput of plaintext "
+        "file storage against EncryptedStorage, in a scratch directory. Uses "
+        "DOCUMENT_ENCRYPTION_KEY if set, otherwise a throwaway key."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, default=64, help="Size of the test file")
+        parser.add_argument("--segment-size", type=int, default=settings.DOCUMENT_ENCRYPTION_SEGMENT_SIZE,
+                            help="Plaintext bytes per encrypted segment")
+        parser.add_argument("--ranges", type=int, default=200,
+                            help="Random 64 KiB range reads to time")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the best is kept")
+
+    def time_best(self, repeat, fn):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def measure(self, storage, source, size, offsets, repeat):
+        names = []
+
+        def write():
+            with open(source, "rb") as fh:
+                names.append(storage.save("bench.bin", File(fh, name="bench.bin")))
+
+        def read_all():
+            with storage.open(names[-1]) as fh:
+                while fh.read(READ_SIZE):
+                    pass
+
+        def read_ranges():
+            with storage.open(names[-1]) as fh:
+                for offset in offsets:
+                    fh.seek(offset)
+                    fh.read(READ_SIZE)
+
+        results = {
+            "write": size / MB / self.time_best(repeat, write),
+            "read": size / MB / self.time_best(repeat, read_all),
+            "range": len(offsets) / self.time_best(repeat, read_ranges),
+        }
+        for name in names:
+            storage.delete(name)
+        return results
+
+    def handle(self, *args, **options):
+        size = options["size_mb"] * MB
+        repeat = max(1, options["repeat"])
+        if size <= READ_SIZE:
+            raise CommandError("--size-mb must be at least 1.")
+        keys = load_keys() or [os.urandom(32)]
+        offsets = [random.randrange(0, size - READ_SIZE) for _ in range(options["ranges"])]
+
+        scratch = tempfile.mkdtemp(prefix="bench_document_storage_")
+        try:
+            source = os.path.join(scratch, "source.bin")
+            with open(source, "wb") as fh:
+                for _ in range(options["size_mb"]):
+                    fh.write(os.urandom(MB))
+
+            plain = FileSystemStorage(location=os.path.join(scratch, "plain"))
+            encrypted = EncryptedStorage(inner=FileSystemStorage(location=os.path.join(scratch, "encrypted")),
+                                         keys=keys, segment_size=options["segment_size"])
+            baseline = self.measure(plain, source, size, offsets, repeat)
+            measured = self.measure(encrypted, source, size, offsets, repeat)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        self.stdout.write(f"{options['size_mb']} MiB file, {options['segment_size']} byte segments, "
+                          f"best of {repeat}")
+        for label, unit in (("write", "MiB/s"), ("read", "MiB/s"), ("range", "reads/s")):
+            overhead = baseline[label] / measured[label] - 1
+            self.stdout.write(f"{label:<6} plaintext {baseline[label]:>8.0f} {unit:<8} "
+                              f"encrypted {measured[label]:>8.0f} {unit:<8} overhead {overhead:>5.0%}")
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from employee.models import UploadSession
+from employee.uploads import discard_staging
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions (and their staging files) abandoned for UPLOAD_SESSION_TTL_HOURS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=settings.UPLOAD_SESSION_TTL_HOURS,
+                            help="Idle time after which a session is abandoned")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        removed = 0
+        for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+            discard_staging(session)
+            session.delete()
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} abandoned upload session(s)."))
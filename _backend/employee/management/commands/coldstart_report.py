@@ -0,0 +1,82 @@
+import json
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.coldstart import by_package, import_profile, measure_cold_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold starts of backend.wsgi in fresh interpreters: time to "
+        "first byte of one request, and where import time goes (-X importtime). "
+        "Exits non-zero when the median exceeds the budget, so CI can run it "
+        "as a regression check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5, help="Cold starts to time; the median is judged")
+        parser.add_argument("--path", default="/api/emp/employeeapi/", help="Request path of the first request")
+        parser.add_argument("--budget-ms", type=float, default=settings.COLDSTART_BUDGET_MS,
+                            help="Fail above this median time to first byte (0 = report only)")
+        parser.add_argument("--top", type=int, default=15, help="Packages and modules to list")
+        parser.add_argument("--serverless", action="store_true",
+                            help="Measure with SERVERLESS=true (lazy admin, warm-up) as on Vercel")
+        parser.add_argument("--save", help="Write the results as JSON, e.g. a baseline to compare against")
+        parser.add_argument("--baseline", help="JSON from an earlier --save to diff against")
+
+    def handle(self, *args, **options):
+        extra_env = {"SERVERLESS": "true"} if options["serverless"] else {}
+        try:
+            entries = import_profile(extra_env=extra_env)
+            runs = [measure_cold_start(options["path"], extra_env) for _ in range(max(1, options["runs"]))]
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        median = {key: statistics.median(run[key] for run in runs)
+                  for key in ("import_ms", "request_ms", "total_ms")}
+        packages = by_package(entries)
+        baseline = self.load_baseline(options["baseline"])
+
+        self.stdout.write(f"GET {options['path']} -> {runs[0]['status']}, median of {len(runs)} cold starts"
+                          f"{' (serverless)' if options['serverless'] else ''}:")
+        for key, label in (("import_ms", "import backend.wsgi"), ("request_ms", "first request"),
+                           ("total_ms", "process start to first byte")):
+            self.stdout.write(f"  {label:<28} {median[key]:>8.1f} ms{self.delta(median[key], baseline, key)}")
+
+        self.stdout.write(f"Import self time by package ({sum(packages.values()) / 1000:.1f} ms in total):")
+        for package, own in list(packages.items())[:options["top"]]:
+            previous = baseline.get("packages", {}).get(package) if baseline else None
+            change = "" if previous is None else f"  {(own - previous) / 1000:+.1f} ms"
+            self.stdout.write(f"  {package:<32} {own / 1000:>8.1f} ms{change}")
+        self.stdout.write("Slowest modules (cumulative):")
+        for module, _, cumulative, depth in sorted(entries, key=lambda e: -e[2])[:options["top"]]:
+            self.stdout.write(f"  {module:<48} {cumulative / 1000:>8.1f} ms  depth {depth}")
+
+        if options["save"]:
+            with open(options["save"], "w") as fh:
+                json.dump({"path": options["path"], "serverless": options["serverless"],
+                           "median": median, "packages": packages}, fh, indent=2)
+            self.stdout.write(f"Saved to {options['save']}.")
+
+        budget = options["budget_ms"]
+        if budget and median["total_ms"] > budget:
+            raise CommandError(f"Cold start to first byte took {median['total_ms']:.0f} ms, "
+                               f"over the {budget:.0f} ms budget.")
+        if budget:
+            self.stdout.write(self.style.SUCCESS(f"Within the {budget:.0f} ms budget."))
+
+    def load_baseline(self, path):
+        if not path:
+            return None
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Can't read baseline {path}: {exc}")
+
+    def delta(self, value, baseline, key):
+        if not baseline:
+            return ""
+        return f"  ({value - baseline['median'][key]:+.1f} ms)"
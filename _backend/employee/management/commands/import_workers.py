@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.imports import IMPORT_KINDS, ImportFormatError, import_rows, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import employees or contractors from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORT_KINDS))
+        parser.add_argument("path", help="Path to a .csv or .json file")
+        parser.add_argument("--employer", required=True, help="Username of the employer account")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; write nothing")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"No such file: {path}")
+
+        User = get_user_model()
+        try:
+            employer = User.objects.get(**{User.USERNAME_FIELD: options["employer"]})
+        except User.DoesNotExist:
+            raise CommandError(f"No user '{options['employer']}'")
+
+        try:
+            rows = parse_rows(path.read_text(encoding="utf-8-sig"), path.suffix.lstrip(".").lower())
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        result = import_rows(options["kind"], rows, employer=employer, dry_run=options["dry_run"])
+
+        for error in result["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        if result["errors"]:
+            raise CommandError(f"{len(result['errors'])} row(s) failed; nothing was imported.")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{len(rows)} row(s) valid (dry run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Imported {result['created']} {options['kind']}(s)."))
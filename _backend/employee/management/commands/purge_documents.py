@@ -0,0 +1,102 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from employee.blobs import collect_orphaned_files
+from employee.models import Document, DocumentBlob
+
+
+def _delete_file(item):
+    storage, name, size = item
+    try:
+        storage.delete(name)
+    except OSError:
+        return name, 0
+    return None, size
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete documents whose RetentionPolicy period has run out (soft-deleted "
+        "or expired), in primary-key-ordered batches of one transaction each. "
+        "Files no longer referenced by any document are removed after each "
+        "batch commits, by a pool of threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Only count what would be purged")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Documents deleted per transaction")
+        parser.add_argument("--workers", type=int, default=8,
+                            help="Threads deleting files")
+        parser.add_argument("--limit", type=int, default=None,
+                            help="Stop after this many documents")
+
+    def fetch_batch(self, eligible, after_pk, batch_size):
+        return list(eligible.filter(pk__gt=after_pk).order_by("pk").values_list("pk", flat=True)[:batch_size])
+
+    def purge_batch(self, eligible, pks):
+        """Delete one batch; returns (rows deleted, orphaned files)."""
+        with collect_orphaned_files() as orphans, transaction.atomic():
+            # re-check under the lock: a row may have been restored meanwhile
+            locked = list(eligible.filter(pk__in=pks).select_for_update().values_list("pk", flat=True))
+            _, per_model = Document.objects.filter(pk__in=locked).delete()
+        return per_model.get(Document._meta.label, 0), orphans
+
+    def report_dry_run(self, eligible):
+        # blobs every one of whose references is being purged
+        freed = (eligible.exclude(blob=None).order_by().values("blob")
+                 .annotate(purged=Count("pk")).filter(purged=F("blob__refcount")).values("blob"))
+        totals = DocumentBlob.objects.filter(pk__in=freed).aggregate(files=Count("pk"), bytes=Sum("size"))
+        self.stdout.write(f"Would free {totals['files']} file(s), {totals['bytes'] or 0} bytes.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        limit = options["limit"]
+        dry_run = options["dry_run"]
+        if batch_size < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size and --workers must be at least 1.")
+
+        eligible = Document.objects.past_retention(timezone.now())
+        rows = files = freed = 0
+        failed = []
+        after_pk = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            while limit is None or rows < limit:
+                size = batch_size if limit is None else min(batch_size, limit - rows)
+                pks = self.fetch_batch(eligible, after_pk, size)
+                if not pks:
+                    break
+                after_pk = pks[-1]
+                if dry_run:
+                    rows += len(pks)
+                else:
+                    deleted, orphans = self.purge_batch(eligible, pks)
+                    rows += deleted
+                    for failed_name, nbytes in pool.map(_delete_file, orphans):
+                        if failed_name:
+                            failed.append(failed_name)
+                        else:
+                            files += 1
+                            freed += nbytes
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"{rows} documents, {files} files, last pk {after_pk}, "
+                                  f"{rows / elapsed if elapsed else 0:.0f} docs/s")
+
+        elapsed = time.monotonic() - started
+        if dry_run:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {rows} document(s) due for purging "
+                                                 f"(scanned in {elapsed:.1f}s)."))
+            self.report_dry_run(eligible)
+            return
+        for name in failed:
+            self.stderr.write(f"Could not delete file {name}; its blob row is already gone.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Purged {rows} document(s) and {files} file(s), {freed} bytes, in {elapsed:.1f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} docs/s, {files / elapsed if elapsed else 0:.0f} files/s)."))
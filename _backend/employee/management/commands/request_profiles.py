@@ -0,0 +1,98 @@
+import io
+import json
+import os
+import pstats
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from employee.profiling import profile_ids
+
+
+class Command(BaseCommand):
+    help = "List, show and summarize the request profiles in REQUEST_PROFILING_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", default=settings.REQUEST_PROFILING_DIR, help="Profile directory")
+        sub = parser.add_subparsers(dest="action", required=True)
+        listing = sub.add_parser("list", help="Newest profiles first")
+        listing.add_argument("--limit", type=int, default=20)
+        listing.add_argument("--view", help="Only profiles of this view class")
+        show = sub.add_parser("show", help="Top functions and hottest stacks of one profile")
+        show.add_argument("id", help="Profile id, or a unique prefix of one")
+        show.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, ncalls)")
+        show.add_argument("--top", type=int, default=25)
+        summary = sub.add_parser("summary", help="Durations per view and functions merged over recent profiles")
+        summary.add_argument("--limit", type=int, default=50, help="Newest profiles to include")
+        summary.add_argument("--view", help="Only profiles of this view class")
+        summary.add_argument("--sort", default="tottime", help="pstats sort key")
+        summary.add_argument("--top", type=int, default=25)
+
+    def handle(self, *args, **options):
+        self.directory = options["dir"]
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def meta(self, profile_id):
+        with open(os.path.join(self.directory, profile_id + ".json")) as fh:
+            return json.load(fh)
+
+    def recent(self, options):
+        metas = [self.meta(profile_id) for profile_id in reversed(profile_ids(self.directory))]
+        if options["view"]:
+            metas = [meta for meta in metas if meta["view"] == options["view"]]
+        return metas[:options["limit"]]
+
+    def print_stats(self, paths, sort, top):
+        stream = io.StringIO()
+        stats = pstats.Stats(*paths, stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        self.stdout.write(stream.getvalue())
+
+    def handle_list(self, options):
+        metas = self.recent(options)
+        if not metas:
+            self.stdout.write(f"No profiles in {self.directory}.")
+        for meta in metas:
+            self.stdout.write(f"{meta['id']:<60} {meta['method']:<6} {meta['status']} "
+                              f"{meta['duration_ms']:>9.1f} ms  {meta['user']:<16} {meta['path']}")
+
+    def handle_show(self, options):
+        matches = [p for p in profile_ids(self.directory) if p.startswith(options["id"])]
+        if len(matches) != 1:
+            raise CommandError(f"{len(matches)} profiles match {options['id']!r}.")
+        profile_id = matches[0]
+        meta = self.meta(profile_id)
+        self.stdout.write(f"{meta['method']} {meta['path']} -> {meta['status']} in {meta['duration_ms']} ms "
+                          f"({meta['user']}, {meta['started_at']})")
+        base = os.path.join(self.directory, profile_id)
+        self.print_stats([base + ".pstats"], options["sort"], options["top"])
+
+        # self time per innermost frame, from the sampled stacks
+        leaves, total = Counter(), 0
+        with open(base + ".collapsed") as fh:
+            for line in fh:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                leaves[stack.rsplit(";", 1)[-1]] += int(count)
+                total += int(count)
+        self.stdout.write(f"Sampled self time ({total} samples every {meta['interval_ms']} ms):")
+        if not total:
+            self.stdout.write("  none; the request finished within one interval")
+        for frame, count in leaves.most_common(options["top"]):
+            self.stdout.write(f"{count / total:>6.1%}  {frame}")
+        self.stdout.write(f"Flamegraph: flamegraph.pl {base}.collapsed > {profile_id}.svg")
+
+    def handle_summary(self, options):
+        metas = self.recent(options)
+        if not metas:
+            raise CommandError(f"No profiles in {self.directory}.")
+        durations = defaultdict(list)
+        for meta in metas:
+            durations[meta["view"]].append(meta["duration_ms"])
+        self.stdout.write(f"{len(metas)} profiles, {metas[-1]['started_at']} to {metas[0]['started_at']}")
+        for view, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+            values.sort()
+            self.stdout.write(f"{view:<36} n={len(values):<4} median={values[len(values) // 2]:>8.1f} ms "
+                              f"max={values[-1]:>8.1f} ms")
+        paths = [os.path.join(self.directory, meta["id"] + ".pstats") for meta in metas]
+        self.print_stats(paths, options["sort"], options["top"])
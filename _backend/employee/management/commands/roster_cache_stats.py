@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from employee.roster_cache import get_cache, get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Show hit/miss counters of the roster response cache. Counters live in "
+        "the cache itself, so they are only shared between processes when "
+        "ROSTER_CACHE_DIR (file-based cache) is set."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Zero the counters after printing")
+        parser.add_argument("--clear", action="store_true", help="Also drop every cached response")
+
+    def handle(self, *args, **options):
+        stats = get_stats()
+        total = stats["hit"] + stats["miss"]
+        ratio = stats["hit"] / total if total else 0
+        self.stdout.write(f"hits={stats['hit']} misses={stats['miss']} hit_ratio={ratio:.1%}")
+        if options["clear"]:
+            get_cache().clear()
+            self.stdout.write(self.style.SUCCESS("Roster cache cleared."))
+        elif options["reset"]:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from employee.models import EmployeeProfile, ContractorProfile
+
+
+# (model, encrypted field) pairs re-encrypted by this command
+TARGETS = (
+    (EmployeeProfile, "ssn"),
+    (ContractorProfile, "tin"),
+)
+
+_worker_crypter = None
+
+
+def _init_worker(keys):
+    global _worker_crypter
+    _worker_crypter = MultiFernet([Fernet(k) for k in keys])
+
+
+def _rotate(tokens):
+    """Re-encrypt tokens under the first key (runs in a pool worker or inline)."""
+    return [_worker_crypter.rotate(t.encode()).decode() for t in tokens]
+
+
+def _key_id(key):
+    return hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt every SSN and TIN under a new field-encryption key, in "
+        "primary-key-ordered batches. Progress is checkpointed so an "
+        "interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--new-key",
+                            help="Key to encrypt with (default: first key of FIELD_ENCRYPTION_KEY)")
+        parser.add_argument("--old-key", action="append", default=[],
+                            help="Key(s) currently in use; repeatable "
+                                 "(default: remaining keys of FIELD_ENCRYPTION_KEY)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=0,
+                            help="Decrypt/re-encrypt in this many processes (0 = inline)")
+        parser.add_argument("--checkpoint", default="rotate_field_keys.checkpoint.json",
+                            help="Progress file used to resume an interrupted run")
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignore an existing checkpoint and start from the first row")
+
+    # ----- keys / checkpoint ----- #
+
+    def get_keys(self, options):
+        configured = settings.FIELD_ENCRYPTION_KEY
+        if isinstance(configured, str):
+            configured = [configured]
+        new_key = options["new_key"] or (configured[0] if configured else None)
+        old_keys = options["old_key"] or list(configured[1:])
+        if not new_key:
+            raise CommandError("No new key given and FIELD_ENCRYPTION_KEY is empty.")
+        if not old_keys:
+            raise CommandError("No old key given; pass --old-key or list it after the new key "
+                               "in DJANGO_ENCRYPTED_FIELD_KEY.")
+        try:
+            for key in [new_key, *old_keys]:
+                Fernet(key)
+        except (ValueError, TypeError) as exc:
+            raise CommandError(f"Invalid Fernet key: {exc}")
+        return [new_key, *old_keys]
+
+    def load_checkpoint(self, path, key_id, restart):
+        if restart or not os.path.exists(path):
+            return {}
+        with open(path) as fh:
+            state = json.load(fh)
+        if state.get("key_id") != key_id:
+            raise CommandError(f"Checkpoint {path} belongs to a different new key; "
+                               "use --restart or another --checkpoint path.")
+        return state.get("positions", {})
+
+    def save_checkpoint(self, path, key_id, positions):
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"key_id": key_id, "positions": positions}, fh)
+        os.replace(tmp, path)
+
+    # ----- rotation ----- #
+
+    def fetch_batch(self, model, field, after_pk, batch_size):
+        """Read raw ciphertext, bypassing the field's automatic decryption."""
+        qn = connection.ops.quote_name
+        table = qn(model._meta.db_table)
+        pk_col = qn(model._meta.pk.column)
+        col = qn(model._meta.get_field(field).column)
+        sql = (f"SELECT {pk_col}, {col} FROM {table} "
+               f"WHERE {pk_col} > %s AND {col} IS NOT NULL ORDER BY {pk_col} LIMIT %s")
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [after_pk, batch_size])
+            return cursor.fetchall()
+
+    def rotate_tokens(self, pool, tokens, workers):
+        if pool is None:
+            return _rotate(tokens)
+        size = max(1, -(-len(tokens) // workers))
+        chunks = [tokens[i:i + size] for i in range(0, len(tokens), size)]
+        return [t for part in pool.map(_rotate, chunks) for t in part]
+
+    def write_batch(self, model, field, pks, tokens):
+        """
+        Write ciphertext back as-is. bulk_update can't be used here: the
+        encrypted field's get_db_prep_save encrypts whatever it is handed,
+        including bulk_update's CASE expression.
+        """
+        qn = connection.ops.quote_name
+        sql = (f"UPDATE {qn(model._meta.db_table)} SET {qn(model._meta.get_field(field).column)} = %s "
+               f"WHERE {qn(model._meta.pk.column)} = %s")
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, list(zip(tokens, pks)))
+
+    def handle(self, *args, **options):
+        keys = self.get_keys(options)
+        key_id = _key_id(keys[0])
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        checkpoint = options["checkpoint"]
+        positions = self.load_checkpoint(checkpoint, key_id, options["restart"])
+
+        _init_worker(keys)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(keys,)) if workers > 0 else None
+        try:
+            for model, field in TARGETS:
+                label = f"{model._meta.label}.{field}"
+                after_pk = positions.get(label, 0)
+                if after_pk:
+                    self.stdout.write(f"{label}: resuming after pk {after_pk}")
+                done = 0
+                started = time.monotonic()
+                while True:
+                    rows = self.fetch_batch(model, field, after_pk, batch_size)
+                    if not rows:
+                        break
+                    pks = [pk for pk, _ in rows]
+                    try:
+                        tokens = self.rotate_tokens(pool, [t for _, t in rows], workers)
+                    except InvalidToken:
+                        raise CommandError(f"{label}: a row between pk {pks[0]} and {pks[-1]} "
+                                           "can't be decrypted with the given keys.")
+                    self.write_batch(model, field, pks, tokens)
+
+                    after_pk = pks[-1]
+                    positions[label] = after_pk
+                    self.save_checkpoint(checkpoint, key_id, positions)
+
+                    done += len(rows)
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(f"{label}: {done} rows, last pk {after_pk}, "
+                                      f"{done / elapsed if elapsed else 0:.0f} rows/s")
+                self.stdout.write(self.style.SUCCESS(f"{label}: rotated {done} rows"))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            "Rotation complete. Drop the old key(s) from DJANGO_ENCRYPTED_FIELD_KEY."))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0010_rename_tin_contractorprofile_tin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contractorprofile',
+            index=models.Index(fields=['contractor_name', 'party_ptr'], name='contractor_name_pk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['last_name', 'party_ptr'], name='employee_lastname_pk_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='party',
+            index=models.Index(fields=['created_at', 'id'], name='party_created_id_idx'),
+        ),
+    ]
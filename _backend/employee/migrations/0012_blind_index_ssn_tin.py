@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:02
+
+import hashlib
+import hmac
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of employee.crypto.blind_index as of this migration, so later
+# changes to the app code can't change what it computes.
+def blind_index(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    normalized = re.sub(r"\D", "", value) or value
+    if not normalized:
+        return None
+    return hmac.new(settings.FIELD_BLIND_INDEX_KEY.encode(), normalized.encode(), hashlib.sha256).hexdigest()
+
+
+def backfill_blind_indexes(apps, schema_editor):
+    """Compute the HMAC index for existing rows (decrypting each value once)."""
+    for model_name, field in (("EmployeeProfile", "ssn"), ("ContractorProfile", "tin")):
+        model = apps.get_model("employee", model_name)
+        index_field = f"{field}_index"
+        batch = []
+        for obj in model.objects.exclude(**{f"{field}__isnull": True}).only("pk", field).iterator(chunk_size=BATCH_SIZE):
+            setattr(obj, index_field, blind_index(getattr(obj, field)))
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, [index_field])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, [index_field])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0011_roster_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contractorprofile',
+            name='tin_index',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeeprofile',
+            name='ssn_index',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_blind_indexes, migrations.RunPython.noop),
+        # Added after the backfill so existing duplicates surface here.
+        migrations.AlterField(
+            model_name='contractorprofile',
+            name='tin_index',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='employeeprofile',
+            name='ssn_index',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
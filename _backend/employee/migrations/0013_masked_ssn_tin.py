@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:20
+
+import re
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of employee.crypto.mask_identifier as of this migration.
+def mask_identifier(value, prefix):
+    if value is None:
+        return None
+    value = str(value).strip()
+    normalized = re.sub(r"\D", "", value) or value
+    if not normalized:
+        return None
+    return f"{prefix}{normalized[-4:]}"
+
+
+def backfill_masked_values(apps, schema_editor):
+    """Store the masked identifier for existing rows (one decrypt per row)."""
+    for model_name, field, prefix in (("EmployeeProfile", "ssn", "***-**-"),
+                                      ("ContractorProfile", "tin", "*****")):
+        model = apps.get_model("employee", model_name)
+        masked_field = f"{field}_masked"
+        batch = []
+        for obj in model.objects.exclude(**{f"{field}__isnull": True}).only("pk", field).iterator(chunk_size=BATCH_SIZE):
+            setattr(obj, masked_field, mask_identifier(getattr(obj, field), prefix=prefix))
+            batch.append(obj)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, [masked_field])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, [masked_field])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0012_blind_index_ssn_tin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contractorprofile',
+            name='tin_masked',
+            field=models.CharField(blank=True, editable=False, max_length=11, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeeprofile',
+            name='ssn_masked',
+            field=models.CharField(blank=True, editable=False, max_length=11, null=True),
+        ),
+        migrations.RunPython(backfill_masked_values, migrations.RunPython.noop),
+    ]
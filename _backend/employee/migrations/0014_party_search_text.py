@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:48
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+# Frozen copy of employee.search.build_search_text as of this migration.
+def build_search_text(values):
+    return " ".join(str(v).strip().lower() for v in values if v not in (None, ""))
+
+PARTY_SOURCES = ("email", "phone_number", "address_city")
+# The historical profile models don't inherit from Party in migration state,
+# so their party columns are reached through party_ptr.
+PTR_SOURCES = tuple(f"party_ptr__{f}" for f in PARTY_SOURCES)
+SOURCES = (
+    ("EmployeeProfile", PTR_SOURCES + ("first_name", "last_name")),
+    ("ContractorProfile", PTR_SOURCES + ("contractor_name",)),
+    ("Party", PARTY_SOURCES),
+)
+
+
+def backfill_search_text(apps, schema_editor):
+    Party = apps.get_model("employee", "Party")
+    done = set()
+    for model_name, sources in SOURCES:
+        model = apps.get_model("employee", model_name)
+        batch = []
+        for row in model.objects.values_list("pk", *sources).iterator(chunk_size=BATCH_SIZE):
+            pk, values = row[0], row[1:]
+            if pk in done:
+                continue
+            done.add(pk)
+            batch.append(Party(pk=pk, search_text=build_search_text(values)))
+            if len(batch) >= BATCH_SIZE:
+                Party.objects.bulk_update(batch, ["search_text"])
+                batch = []
+        if batch:
+            Party.objects.bulk_update(batch, ["search_text"])
+
+
+def create_trigram_index(apps, schema_editor):
+    # Postgres only; SQLite test runs search with plain LIKE.
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS party_search_trgm_idx "
+        "ON employee_party USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS party_search_trgm_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0013_masked_ssn_tin'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='party',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
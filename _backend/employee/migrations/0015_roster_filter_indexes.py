@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0014_party_search_text'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contractorprofile',
+            index=models.Index(fields=['employer', 'contractor_name', 'party_ptr'], name='contractor_emp_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['employer', 'last_name', 'party_ptr'], name='employee_emp_lastname_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['employer', 'compensation_type', 'last_name'], name='employee_emp_comp_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['employer', 'date_hired', 'party_ptr'], name='employee_emp_hired_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(condition=models.Q(('date_offboarded__isnull', False)), fields=['employer', 'date_offboarded'], name='employee_emp_offboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='party',
+            index=models.Index(condition=models.Q(('active', True)), fields=['address_state'], name='party_active_state_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:56
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0015_roster_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contractorprofile',
+            name='contractor_name_pk_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='employeeprofile',
+            name='employee_lastname_pk_idx',
+        ),
+    ]
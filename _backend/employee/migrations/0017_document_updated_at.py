@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 10:58
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Existing documents were last changed no later than their upload."""
+    Document = apps.get_model("employee", "Document")
+    Document.objects.update(updated_at=F("uploaded_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0016_employer_scoped_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:03
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+
+def _delete_files(files):
+    for name, storage in files.items():
+        try:
+            storage.delete(name)
+        except OSError:
+            # best effort: the file is unreferenced either way
+            pass
+
+
+def link_existing_files(apps, schema_editor):
+    """
+    Register each existing document file as a blob, in place (files are not
+    moved). Documents whose content is already registered share that blob;
+    their now-duplicate file is deleted once the migration has committed.
+    """
+    Document = apps.get_model("employee", "Document")
+    DocumentBlob = apps.get_model("employee", "DocumentBlob")
+    superseded = {}
+    for doc in Document.objects.exclude(document="").filter(blob__isnull=True).iterator():
+        storage = doc.document.storage
+        if not storage.exists(doc.document.name):
+            continue
+        sha256 = hashlib.sha256()
+        with storage.open(doc.document.name, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                sha256.update(chunk)
+        blob, _ = DocumentBlob.objects.get_or_create(
+            sha256=sha256.hexdigest(),
+            defaults={"file": doc.document.name, "size": storage.size(doc.document.name)},
+        )
+        DocumentBlob.objects.filter(pk=blob.pk).update(refcount=models.F("refcount") + 1)
+        Document.objects.filter(pk=doc.pk).update(blob=blob, document=blob.file.name)
+        if doc.document.name != blob.file.name:
+            superseded[doc.document.name] = storage
+
+    for name in DocumentBlob.objects.filter(file__in=list(superseded)).values_list("file", flat=True):
+        superseded.pop(name)
+    # not before: a rolled-back migration leaves the documents on these files
+    transaction.on_commit(lambda: _delete_files(superseded), using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0018_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(max_length=255, upload_to='blobs/')),
+                ('size', models.PositiveBigIntegerField()),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='documents', to='employee.documentblob'),
+        ),
+        migrations.RunPython(link_existing_files, migrations.RunPython.noop),
+    ]
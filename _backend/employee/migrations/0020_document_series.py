@@ -0,0 +1,81 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:06
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_series(apps, schema_editor):
+    """
+    Group existing documents into series. Versions duplicated by the old
+    MAX(version) + 1 race are moved past the end of their series (in id
+    order) so the (series, version) constraint can be added.
+    """
+    Document = apps.get_model("employee", "Document")
+    DocumentSeries = apps.get_model("employee", "DocumentSeries")
+
+    groups = defaultdict(list)
+    rows = Document.objects.order_by("version", "pk").values_list(
+        "pk", "party_id", "document_type", "document_name", "version")
+    for pk, party_id, document_type, document_name, version in rows.iterator():
+        groups[(party_id, document_type or "", document_name)].append((pk, version))
+
+    for (party_id, document_type, document_name), docs in groups.items():
+        series = DocumentSeries.objects.create(party_id=party_id, document_type=document_type,
+                                               document_name=document_name)
+        last_version = max(version for _, version in docs)
+        used = set()
+        latest_pk, latest_version = None, 0
+        for pk, version in docs:
+            if version in used:
+                last_version += 1
+                version = last_version
+            used.add(version)
+            Document.objects.filter(pk=pk).update(series=series, version=version)
+            if version >= latest_version:
+                latest_pk, latest_version = pk, version
+        DocumentSeries.objects.filter(pk=series.pk).update(last_version=last_version, latest_id=latest_pk)
+
+    if schema_editor.connection.vendor == "postgresql":
+        # Run the deferred FK checks of these updates now: Postgres refuses
+        # the ALTER TABLEs of the AddConstraints below while trigger events
+        # are pending in the same transaction.
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0019_document_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(blank=True, default='', max_length=64)),
+                ('document_name', models.CharField(max_length=128)),
+                ('last_version', models.PositiveIntegerField(default=0)),
+                ('latest', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='latest_of', to='employee.document')),
+                ('party', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_series', to='employee.party')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='employee.documentseries'),
+        ),
+        migrations.RunPython(build_series, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(fields=('series', 'version'), name='document_series_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='documentseries',
+            constraint=models.UniqueConstraint(fields=('party', 'document_type', 'document_name'), name='document_series_key'),
+        ),
+    ]
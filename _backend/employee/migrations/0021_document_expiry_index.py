@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0020_document_series'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['expiry_date', 'id'], name='document_expiry_live_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0021_document_expiry_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_type', models.CharField(blank=True, max_length=64, unique=True)),
+                ('deleted_retention_days', models.PositiveIntegerField(blank=True, help_text='Days a soft-deleted document is kept after deleted_at', null=True)),
+                ('expired_retention_days', models.PositiveIntegerField(blank=True, help_text='Days a document is kept after its expiry_date', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'retention policies',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='document_deleted_idx'),
+        ),
+    ]
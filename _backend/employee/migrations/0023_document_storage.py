@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 11:15
+
+import employee.encrypted_storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0022_retention_policy'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='document',
+            field=models.FileField(storage=employee.encrypted_storage.document_storage, upload_to='documents/_staging/'),
+        ),
+        migrations.AlterField(
+            model_name='documentblob',
+            name='file',
+            field=models.FileField(max_length=255, storage=employee.encrypted_storage.document_storage, upload_to='blobs/'),
+        ),
+    ]
@@ -1,8 +1,78 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from encrypted_model_fields.fields import EncryptedCharField
 from pathlib import Path
-from datetime import date
+import hashlib
+import operator
+import secrets
+import uuid
+from datetime import date, timedelta
+from functools import reduce
+from .crypto import blind_index, mask_identifier
+from .encrypted_storage import document_storage
+from .search import build_search_text
+
+
+class EmployerQuerySet(models.QuerySet):
+    """Profiles (models with an `employer` FK) visible to one employer."""
+
+    def for_employer(self, user):
+        return self.filter(employer=user)
+
+
+class PartyQuerySet(models.QuerySet):
+    def for_employer(self, user):
+        """Parties whose employee or contractor profile belongs to `user`."""
+        return self.filter(
+            models.Q(pk__in=EmployeeProfile.objects.for_employer(user).values("party_ptr"))
+            | models.Q(pk__in=ContractorProfile.objects.for_employer(user).values("party_ptr"))
+        )
+
+
+class DocumentQuerySet(models.QuerySet):
+    def for_employer(self, user):
+        """Documents attached to any of `user`'s employees or contractors."""
+        return self.filter(
+            models.Q(party__in=EmployeeProfile.objects.for_employer(user).values("party_ptr"))
+            | models.Q(party__in=ContractorProfile.objects.for_employer(user).values("party_ptr"))
+        )
+
+    def expiring(self, today, within, windows):
+        """
+        Live documents that expired already or expire within `within` days of
+        `today`, annotated in SQL with `expires_in` (expiry_date - today, a
+        timedelta) and `expiry_bucket`: "expired", "within_<n>" for the
+        smallest of `windows` holding the date, or "later".
+
+        The range filter is served by document_expiry_live_idx.
+        """
+        buckets = [models.When(expiry_date__lt=today, then=models.Value("expired"))]
+        buckets += [
+            models.When(expiry_date__lte=today + timedelta(days=n), then=models.Value(f"within_{n}"))
+            for n in sorted(windows)
+        ]
+        return self.filter(
+            deleted_at__isnull=True,
+            expiry_date__lte=today + timedelta(days=within),
+        ).annotate(
+            expires_in=models.F("expiry_date") - models.Value(today),
+            expiry_bucket=models.Case(*buckets, default=models.Value("later"),
+                                      output_field=models.CharField()),
+        )
+
+    def past_retention(self, now):
+        """Documents whose RetentionPolicy period has run out as of `now`."""
+        conditions = [q for q in (policy.purge_condition(now) for policy in RetentionPolicy.objects.all())
+                      if q is not None]
+        if not conditions:
+            return self.none()
+        return self.filter(reduce(operator.or_, conditions))
+
+    def expiry_summary(self):
+        """{bucket: count} of an `expiring()` queryset, in one GROUP BY."""
+        rows = self.order_by().values("expiry_bucket").annotate(count=models.Count("pk"))
+        return {row["expiry_bucket"]: row["count"] for row in rows}
 
 
 class Party(models.Model):
@@ -55,6 +125,55 @@ class Party(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # lower-cased names / email / phone / city for the search endpoint
+    # (trigram GIN-indexed on Postgres, see migration 0014)
+    search_text = models.TextField(blank=True, default="", editable=False)
+
+    # fields folded into search_text
+    SEARCH_SOURCE_FIELDS = ("email", "phone_number", "address_city")
+    # derived column -> fields it is computed from
+    DERIVED_FROM = {"search_text": SEARCH_SOURCE_FIELDS}
+
+    objects = PartyQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination on (created_at, id)
+            models.Index(fields=["created_at", "id"], name="party_created_id_idx"),
+            # ?active=true&address_state=TX
+            models.Index(fields=["address_state"], condition=models.Q(active=True),
+                         name="party_active_state_idx"),
+        ]
+
+    def refresh_derived_fields(self):
+        """Recompute columns derived from other fields (see DERIVED_FROM)."""
+        self.search_text = build_search_text(self.search_source_values())
+
+    def search_source_values(self):
+        values = [getattr(self, f) for f in self.SEARCH_SOURCE_FIELDS]
+        if type(self) is Party and self.pk is not None:
+            # saved as a bare Party (admin, Party.objects...): the names are
+            # on the employee/contractor row
+            for profile in (EmployeeProfile, ContractorProfile):
+                own_fields = profile.SEARCH_SOURCE_FIELDS[len(Party.SEARCH_SOURCE_FIELDS):]
+                row = profile._base_manager.filter(pk=self.pk).values_list(*own_fields).first()
+                if row is not None:
+                    values.extend(row)
+                    break
+        return values
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            # keep derived columns in step when only their sources are saved
+            update_fields = set(update_fields)
+            kwargs["update_fields"] = update_fields | {
+                derived for derived, sources in self.DERIVED_FROM.items()
+                if update_fields.intersection(sources)
+            }
+        super().save(*args, **kwargs)
+
 
 class EmployeeProfile(Party):
     # Employee info
@@ -81,6 +200,17 @@ class EmployeeProfile(Party):
                              unique=True,
                              blank=True,
                              null=True) 
+    # keyed HMAC of the SSN, maintained on save; used for lookup / uniqueness
+    ssn_index = models.CharField(max_length=64,
+                                 unique=True,
+                                 blank=True,
+                                 null=True,
+                                 editable=False)
+    # "***-**-1234", served by list/export endpoints instead of decrypting
+    ssn_masked = models.CharField(max_length=11,
+                                  blank=True,
+                                  null=True,
+                                  editable=False)
     
     
                                      
@@ -113,6 +243,34 @@ class EmployeeProfile(Party):
     date_hired = models.DateField(default=date.today)
     date_offboarded = models.DateField(null=True, blank=True)
 
+    objects = EmployerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # every roster read is scoped to one employer, so all of these lead
+            # with it (active lives on Party, so it can't join this index)
+            models.Index(fields=["employer", "last_name", "party_ptr"], name="employee_emp_lastname_idx"),
+            models.Index(fields=["employer", "compensation_type", "last_name"],
+                         name="employee_emp_comp_name_idx"),
+            # ends in party_ptr so ?ordering=date_hired keyset pages need no sort
+            models.Index(fields=["employer", "date_hired", "party_ptr"], name="employee_emp_hired_idx"),
+            models.Index(fields=["employer", "date_offboarded"],
+                         condition=models.Q(date_offboarded__isnull=False),
+                         name="employee_emp_offboard_idx"),
+        ]
+
+    SEARCH_SOURCE_FIELDS = Party.SEARCH_SOURCE_FIELDS + ("first_name", "last_name")
+    DERIVED_FROM = {
+        "search_text": SEARCH_SOURCE_FIELDS,
+        "ssn_index": ("ssn",),
+        "ssn_masked": ("ssn",),
+    }
+
+    def refresh_derived_fields(self):
+        """Recompute search text and the columns derived from the encrypted SSN."""
+        super().refresh_derived_fields()
+        self.ssn_index = blind_index(self.ssn)
+        self.ssn_masked = mask_identifier(self.ssn, prefix="***-**-")
     
 
 class ContractorProfile(Party):
@@ -122,13 +280,94 @@ class ContractorProfile(Party):
                              unique=True,
                              blank=True,
                              null=True) 
+    # keyed HMAC of the TIN, maintained on save; used for lookup / uniqueness
+    tin_index = models.CharField(max_length=64,
+                                 unique=True,
+                                 blank=True,
+                                 null=True,
+                                 editable=False)
+    # "*****1234", served by list/export endpoints instead of decrypting
+    tin_masked = models.CharField(max_length=11,
+                                  blank=True,
+                                  null=True,
+                                  editable=False)
     employer = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
         on_delete=models.CASCADE,
         blank=False,
         null=False)
+
+    objects = EmployerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # tenant-scoped list / keyset pagination sorted by name
+            models.Index(fields=["employer", "contractor_name", "party_ptr"], name="contractor_emp_name_idx"),
+        ]
+
+    SEARCH_SOURCE_FIELDS = Party.SEARCH_SOURCE_FIELDS + ("contractor_name",)
+    DERIVED_FROM = {
+        "search_text": SEARCH_SOURCE_FIELDS,
+        "tin_index": ("tin",),
+        "tin_masked": ("tin",),
+    }
+
+    def refresh_derived_fields(self):
+        """Recompute search text and the columns derived from the encrypted TIN."""
+        super().refresh_derived_fields()
+        self.tin_index = blind_index(self.tin)
+        self.tin_masked = mask_identifier(self.tin, prefix="*****")
  
 
+class DocumentBlob(models.Model):
+    """One stored file body, shared by every Document with the same content (see blobs.py)."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='blobs/', max_length=255, storage=document_storage)
+    size = models.PositiveBigIntegerField()
+    # number of Document rows pointing here; the file is deleted at zero
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def build_path(digest: str, original_name: str) -> str:
+        """
+        Path: blobs/<first two hex digits>/<sha256>.<ext>
+        Example: blobs/9f/9f86d081884c7d65...0f00a08.pdf
+        """
+        ext = Path(original_name).suffix.lower()
+        return f"blobs/{digest[:2]}/{digest}{ext}"
+
+
+class DocumentSeries(models.Model):
+    """
+    All versions of one (party, document_type, document_name) document.
+    `last_version` is the version counter, bumped under a row lock;
+    `latest` points at the newest version for O(1) "current documents".
+    """
+    party = models.ForeignKey(Party, on_delete=models.CASCADE, related_name='document_series')
+    # normalised to "" so NULL types still collide in the unique constraint
+    document_type = models.CharField(max_length=64, blank=True, default="")
+    document_name = models.CharField(max_length=128)
+    last_version = models.PositiveIntegerField(default=0)
+    latest = models.OneToOneField(
+        'Document',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='latest_of')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["party", "document_type", "document_name"],
+                                    name="document_series_key"),
+        ]
+
+    def refresh_latest(self):
+        """Re-point `latest` at the highest remaining version."""
+        self.latest = self.versions.order_by("-version", "-pk").first()
+        self.save(update_fields=["latest"])
+
+
 class Document(models.Model):
     party = models.ForeignKey(
         Party,
@@ -139,9 +378,24 @@ class Document(models.Model):
 
     document_type = models.CharField(max_length=64, null=True, blank=True)
     document_name = models.CharField(max_length=128, null=False, blank=False)
-    document = models.FileField(upload_to='documents/_staging/')
+    series = models.ForeignKey(
+        DocumentSeries,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='versions')
+    document = models.FileField(upload_to='documents/_staging/', storage=document_storage)
+    # content-addressed file; `document` holds the same storage name
+    blob = models.ForeignKey(
+        DocumentBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='documents')
     version = models.PositiveIntegerField(default=1)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # bumped on every save; drives the ETag / Last-Modified of document reads
+    updated_at = models.DateTimeField(auto_now=True)
 
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -160,13 +414,131 @@ class Document(models.Model):
         null=True, 
         blank=True, 
         related_name='deleted_documents')
-    
-    def build_final_document_path(self, original_name: str) -> str:
-        """
-        Final path: documents/<party_id>/<document_id>/<base>_v####.<ext>
-        Example: documents/42/105/passport_v0003.pdf
-        """
-        p = Path(original_name)
-        stem = p.stem
-        ext = p.suffix.lower()
-        return f"documents/{self.party_id}/{self.pk}/{stem}_v{self.version:04d}{ext}"
+
+    objects = DocumentQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["series", "version"], name="document_series_version"),
+        ]
+        indexes = [
+            # cross-party compliance sweep (documentapi/expiring/); the keyset
+            # pagination walks (expiry_date, id)
+            models.Index(fields=["expiry_date", "id"], condition=models.Q(deleted_at__isnull=True),
+                         name="document_expiry_live_idx"),
+            # purge_documents: soft-deleted rows past their retention period
+            models.Index(fields=["deleted_at"], condition=models.Q(deleted_at__isnull=False),
+                         name="document_deleted_idx"),
+        ]
+
+    def attach_blob(self, blob):
+        self.blob = blob
+        self.document.name = blob.file.name
+
+
+class RetentionPolicy(models.Model):
+    """
+    How long documents of one `document_type` are kept before
+    purge_documents removes them; "" covers documents without a type.
+    Documents with no matching policy, or a period left empty, are kept.
+    """
+    document_type = models.CharField(max_length=64, unique=True, blank=True)
+    deleted_retention_days = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Days a soft-deleted document is kept after deleted_at")
+    expired_retention_days = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Days a document is kept after its expiry_date")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "retention policies"
+
+    def __str__(self):
+        return self.document_type or "(no type)"
+
+    def purge_condition(self, now):
+        """Q matching this policy's documents that are due for purging, or None."""
+        due = models.Q()
+        if self.deleted_retention_days is not None:
+            due |= models.Q(deleted_at__lt=now - timedelta(days=self.deleted_retention_days))
+        if self.expired_retention_days is not None:
+            due |= models.Q(expiry_date__lt=now.date() - timedelta(days=self.expired_retention_days))
+        if not due:
+            return None
+        if self.document_type:
+            return models.Q(document_type=self.document_type) & due
+        return (models.Q(document_type__isnull=True) | models.Q(document_type="")) & due
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked document upload in progress (see uploads.py).
+    Chunks are appended to a staging file until `received == size`; finalize
+    then turns it into a versioned Document.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    party = models.ForeignKey(Party, on_delete=models.CASCADE, related_name='upload_sessions')
+    document_type = models.CharField(max_length=64, null=True, blank=True)
+    document_name = models.CharField(max_length=128)
+    expiry_date = models.DateField(null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self):
+        return self.received == self.size
+
+
+class ApiToken(models.Model):
+    """
+    Bearer token for API integrations (see authentication.py). Only the
+    SHA-256 of the token is stored; the token itself is shown once, when it
+    is issued. Tokens are random, so a single fast hash is enough.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='api_tokens')
+    name = models.CharField(max_length=64)
+    # first characters of the token, to tell tokens apart in listings
+    prefix = models.CharField(max_length=8)
+    token_hash = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+    # refreshed when a process (re)verifies the token, not on every request
+    last_used_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.prefix}...)"
+
+    @staticmethod
+    def hash_token(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user, name, days=None):
+        """Create a token for `user`; returns (ApiToken, plaintext token)."""
+        prefix = secrets.token_hex(4)
+        token = f"{prefix}.{secrets.token_urlsafe(32)}"
+        expires_at = timezone.now() + timedelta(days=days) if days else None
+        api_token = cls.objects.create(user=user, name=name, prefix=prefix,
+                                       token_hash=cls.hash_token(token), expires_at=expires_at)
+        return api_token, token
+
+    def is_valid(self, now=None):
+        now = now or timezone.now()
+        return self.revoked_at is None and (self.expires_at is None or self.expires_at > now)
+
+    def revoke(self):
+        self.revoked_at = timezone.now()
+        self.save(update_fields=["revoked_at"])
@@ -0,0 +1,156 @@
+"""
+Keyset (cursor) pagination for the roster endpoints.
+
+Pages are addressed by the sort key of the last row served instead of an
+OFFSET, so fetching page N is one index range scan and no COUNT(*) is run.
+Cursors are opaque tokens; clients should only ever echo them back.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset over a tuple of non-null sort keys.
+
+    `orderings` maps the public `?ordering=` name to the keys used for the
+    keyset, e.g. {"last_name": ("last_name", "pk")}. The last key of every
+    tuple must be unique so ties never repeat or skip rows. Prefixing the
+    name with "-" walks the same keys in descending order.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+
+    def __init__(self, orderings, default_ordering=None):
+        self.orderings = dict(orderings)
+        self.default_ordering = default_ordering or next(iter(self.orderings))
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        """Pagination is opt-in so existing clients keep the full list."""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return settings.ROSTER_PAGE_SIZE
+        try:
+            size = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({self.page_size_query_param: "Must be an integer."})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: "Must be at least 1."})
+        return min(size, settings.ROSTER_MAX_PAGE_SIZE)
+
+    def get_ordering(self, request):
+        name = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if name.lstrip("-") not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: f"Unsupported ordering. Allowed: {', '.join(sorted(self.orderings))}"
+            })
+        return name
+
+    def get_keys(self, ordering):
+        keys = self.orderings[ordering.lstrip("-")]
+        if ordering.startswith("-"):
+            return tuple(f"-{k}" for k in keys)
+        return tuple(keys)
+
+    def order_queryset(self, queryset, request):
+        """Apply ?ordering=, if given, without paginating (the full-list path)."""
+        if self.ordering_query_param not in request.query_params:
+            return queryset
+        return queryset.order_by(*self.get_keys(self.get_ordering(request)))
+
+    # ----- cursor encoding ----- #
+
+    def encode_cursor(self, ordering, values):
+        payload = json.dumps({"o": ordering, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, ordering):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values = payload["v"]
+            if payload["o"] != ordering or len(values) != len(self.get_keys(ordering)):
+                raise ValueError
+        except (binascii.Error, ValueError, KeyError, TypeError):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return values
+
+    # ----- keyset filtering ----- #
+
+    def _field(self, model, key):
+        name = key.lstrip("-")
+        return model._meta.pk if name == "pk" else model._meta.get_field(name)
+
+    def _row_values(self, obj, keys):
+        values = []
+        for key in keys:
+            field = self._field(type(obj), key)
+            values.append(field.value_to_string(obj))
+        return values
+
+    def _after(self, model, keys, values):
+        """
+        Build `(k1, k2, ...) > (v1, v2, ...)` as an OR of prefix-equal terms so
+        it works on every backend and honours mixed sort directions.
+        """
+        try:
+            parsed = [self._field(model, k).to_python(v) for k, v in zip(keys, values)]
+        except Exception:
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+
+        condition = Q()
+        equal_prefix = Q()
+        for key, value in zip(keys, parsed):
+            name = key.lstrip("-")
+            op = "lt" if key.startswith("-") else "gt"
+            condition |= equal_prefix & Q(**{f"{name}__{op}": value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request):
+        ordering = self.get_ordering(request)
+        keys = self.get_keys(ordering)
+        page_size = self.get_page_size(request)
+        values = self.decode_cursor(request, ordering)
+
+        queryset = queryset.order_by(*keys)
+        if values is not None:
+            queryset = queryset.filter(self._after(queryset.model, keys, values))
+
+        # Fetch one extra row to learn whether another page exists.
+        rows = list(queryset[: page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = None
+        if len(rows) > page_size:
+            self.next_cursor = self.encode_cursor(ordering, self._row_values(page[-1], keys))
+        self.request = request
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
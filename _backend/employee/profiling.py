@@ -0,0 +1,189 @@
+"""
+On-demand profiles of real API requests (REQUEST_PROFILING=true).
+
+Views that extend ProfiledAPIView are profiled when, after authentication,
+
+  * a staff user sends `X-Profile: 1` or `?_profile=1`, or
+  * a random draw falls under REQUEST_PROFILING_SAMPLE_RATE, for any user or
+    only those in REQUEST_PROFILING_USERS (e.g. the tenant that reported it).
+
+A profiled request runs the view under cProfile while a sampler thread
+records the request thread's stack every REQUEST_PROFILING_INTERVAL_MS. Both
+are written to REQUEST_PROFILING_DIR as
+
+    <id>.pstats     python -m pstats, snakeviz
+    <id>.collapsed  "frame;frame;frame count" lines for flamegraph.pl / speedscope
+    <id>.json       method, path, user, status, duration
+
+and the response carries the id in X-Profile-Id. Only the newest
+REQUEST_PROFILING_KEEP profiles are kept. One request per process is
+profiled at a time; others that qualify meanwhile run normally.
+`manage.py request_profiles` lists and summarizes them.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+_busy = threading.Lock()
+SUFFIXES = (".pstats", ".collapsed", ".json")
+
+
+def wants_profile(request):
+    if not settings.REQUEST_PROFILING:
+        return False
+    user = request.user
+    if user.is_staff and (request.headers.get("X-Profile") or request.query_params.get("_profile")):
+        return True
+    rate = settings.REQUEST_PROFILING_SAMPLE_RATE
+    if rate <= 0:
+        return False
+    users = settings.REQUEST_PROFILING_USERS
+    if users and user.get_username() not in users:
+        return False
+    return random.random() < rate
+
+
+@lru_cache(maxsize=4096)
+def _frame_label(code):
+    path = code.co_filename
+    for root in sys.path:
+        if root and path.startswith(root):
+            path = path[len(root):].lstrip(os.sep)
+            break
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+class _StackSampler(threading.Thread):
+    """Counts the stacks of thread `ident` every `interval` seconds."""
+
+    def __init__(self, ident, interval):
+        super().__init__(name="request-profile-sampler", daemon=True)
+        self.target = ident
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class RequestProfiler:
+    def __init__(self, request, view_name):
+        self.request = request
+        self.view_name = view_name
+        self.profile = cProfile.Profile()
+        self.sampler = _StackSampler(threading.get_ident(), settings.REQUEST_PROFILING_INTERVAL_MS / 1000)
+
+    def start(self):
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.sampler.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.duration = time.perf_counter() - self.started
+        self.sampler.stop()
+
+    def save(self, response):
+        """Write the profile files and rotate the directory; returns the id."""
+        directory = settings.REQUEST_PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+        profile_id = f"{self.started_at:%Y%m%dT%H%M%S.%f}-{self.view_name}-{uuid.uuid4().hex[:6]}"
+        base = os.path.join(directory, profile_id)
+        self.profile.dump_stats(base + ".pstats")
+        with open(base + ".collapsed", "w") as fh:
+            for stack, count in self.sampler.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        with open(base + ".json", "w") as fh:
+            json.dump({
+                "id": profile_id,
+                "started_at": self.started_at.isoformat(),
+                "method": self.request.method,
+                "path": self.request.get_full_path(),
+                "view": self.view_name,
+                "user": self.request.user.get_username(),
+                "status": response.status_code,
+                "duration_ms": round(self.duration * 1000, 1),
+                "samples": sum(self.sampler.stacks.values()),
+                "interval_ms": settings.REQUEST_PROFILING_INTERVAL_MS,
+            }, fh)
+        rotate(directory, settings.REQUEST_PROFILING_KEEP)
+        return profile_id
+
+
+def profile_ids(directory):
+    """Ids of the stored profiles, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted({name[:-len(".json")] for name in names if name.endswith(".json")})
+
+
+def rotate(directory, keep):
+    for profile_id in profile_ids(directory)[:-keep or None]:
+        for suffix in SUFFIXES:
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+class ProfiledAPIView(APIView):
+    """APIView whose handlers can be profiled on demand (see module docstring)."""
+
+    _profiler = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # after authentication and permission checks, so is_staff is known
+        if wants_profile(request) and _busy.acquire(blocking=False):
+            self._profiler = RequestProfiler(request, type(self).__name__)
+            try:
+                self._profiler.start()
+            except BaseException:
+                self._profiler = None
+                _busy.release()
+                raise
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        finally:
+            profiler, self._profiler = self._profiler, None
+            if profiler is not None:
+                profiler.stop()
+                _busy.release()
+        if profiler is not None:
+            try:
+                response["X-Profile-Id"] = profiler.save(response)
+            except OSError:
+                # a full or read-only profile directory must not fail the request
+                logger.exception("Could not write request profile.")
+        return response
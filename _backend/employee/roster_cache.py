@@ -0,0 +1,82 @@
+"""
+Rendered-response cache for the roster and document list endpoints.
+
+Entries hold the JSON bytes of a list response, keyed by employer, the
+employer's cache generation and the response's conditional-GET validators
+(which already cover the query string). Saving or deleting any of an
+employer's parties, profiles or documents bumps the generation (see
+signals.py), so only that tenant's entries go stale. Writes that skip
+signals, such as the bulk import, must call invalidate_employer() themselves.
+
+Keying on the validators too means a worker whose locmem copy missed an
+invalidation still never serves a body older than the database.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+CACHE_ALIAS = "roster"
+STATS_KEYS = {"hit": "roster:stats:hit", "miss": "roster:stats:miss"}
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _incr(cache, key, initial):
+    if not cache.add(key, initial, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # evicted between add() and incr()
+            cache.set(key, initial, timeout=None)
+
+
+def get_generation(employer_id):
+    return get_cache().get(f"roster:gen:{employer_id}", 0)
+
+
+def invalidate_employer(employer_id):
+    """Drop every cached list of `employer_id` by moving to a new generation."""
+    _incr(get_cache(), f"roster:gen:{employer_id}", 1)
+
+
+def get_stats():
+    cache = get_cache()
+    return {outcome: cache.get(key, 0) for outcome, key in STATS_KEYS.items()}
+
+
+def reset_stats():
+    get_cache().delete_many(list(STATS_KEYS.values()))
+
+
+def cached_list_response(request, name, validators, build):
+    """
+    Serve the JSON list response for `name` from the cache, or call `build()`
+    (returning a DRF Response), store its rendered bytes and serve those.
+    Other renderers (e.g. the browsable API) bypass the cache.
+    """
+    if request.accepted_renderer.format != "json":
+        response = build()
+        response["X-Cache"] = "BYPASS"
+        return response
+
+    cache = get_cache()
+    employer_id = request.user.pk
+    digest = hashlib.sha1(f"{name}|{validators.etag}|{request.get_host()}".encode()).hexdigest()
+    key = f"roster:{employer_id}:{get_generation(employer_id)}:{digest}"
+
+    content = cache.get(key)
+    outcome = "hit"
+    if content is None:
+        outcome = "miss"
+        content = JSONRenderer().render(build().data)
+        cache.set(key, content, timeout=settings.ROSTER_CACHE_TIMEOUT)
+    _incr(cache, STATS_KEYS[outcome], 1)
+
+    response = HttpResponse(content, content_type="application/json")
+    response["X-Cache"] = outcome.upper()
+    return validators.apply(response)
@@ -0,0 +1,50 @@
+"""
+Worker search across names, email, phone and city.
+
+Party.search_text holds a lower-cased copy of those fields, maintained on
+save. On Postgres it carries a pg_trgm GIN index (migration 0014) which
+serves both the substring match and the fuzzy word-similarity match. Other
+backends (SQLite test runs) fall back to plain LIKE with a simpler rank.
+"""
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+
+def build_search_text(values):
+    return " ".join(str(v).strip().lower() for v in values if v not in (None, ""))
+
+
+def normalize_query(term):
+    return " ".join(term.lower().split())
+
+
+def search_parties(queryset, term):
+    """
+    Filter `queryset` (of Party) to rows matching `term` and order them by
+    relevance: a prefix of the whole text ranks above a word prefix, which
+    ranks above a plain substring; on Postgres trigram word similarity is
+    added so misspellings still match and rank.
+    """
+    term = normalize_query(term)
+    contains_all = Q()
+    for token in term.split():
+        contains_all &= Q(search_text__contains=token)
+
+    prefix_rank = Case(
+        When(search_text__startswith=term, then=Value(1.0)),
+        When(search_text__contains=f" {term}", then=Value(0.5)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+    if connections[queryset.db].vendor == "postgresql":
+        from django.contrib.postgres.lookups import TrigramWordSimilar
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        queryset = queryset.filter(contains_all | Q(TrigramWordSimilar(F("search_text"), Value(term))))
+        score = TrigramWordSimilarity(term, "search_text") + prefix_rank
+    else:
+        queryset = queryset.filter(contains_all)
+        score = prefix_rank
+
+    return queryset.annotate(score=score).order_by("-score", "pk")
@@ -1,12 +1,21 @@
 from rest_framework import serializers
 from django.core.validators import RegexValidator
-from .models import Party, EmployeeProfile, ContractorProfile, Document
+from .models import Party, EmployeeProfile, ContractorProfile, Document, DocumentSeries, UploadSession
+from .crypto import blind_index
+from .blobs import delete_files_on_rollback, release_blob, store_blob, store_blobs
+from .signals import invalidate_for_parties
 from django.db import transaction
-from django.db.models import Max
+from django.db.models import Q
+from django.conf import settings
+from django.urls import reverse
 from datetime import date, timedelta
+from functools import reduce
 from pathlib import Path
+import logging
+import operator
 import re
 
+logger = logging.getLogger(__name__)
 
 phone_validator = RegexValidator(
 regex=r'^\d{10}$',
@@ -19,6 +28,19 @@ zip_validator = RegexValidator(
 )
 
 
+def validate_identifier_unique(model, field, value, instance=None, label="SSN"):
+    """Duplicate check through the blind index (ciphertext can't be compared)."""
+    digest = blind_index(value)
+    if digest is None:
+        return value
+    qs = model.objects.filter(**{f"{field}_index": digest})
+    if instance is not None:
+        qs = qs.exclude(pk=instance.pk)
+    if qs.exists():
+        raise serializers.ValidationError(f"{label} already exists.")
+    return value
+
+
 class  BasePartySerializer(serializers.ModelSerializer):
     
     def validate_email(self, value):
@@ -117,6 +139,38 @@ class PartyListSerializer(serializers.ModelSerializer):
             "address_city", "address_zip", "address_state", "active"
         ]
     
+class PartySearchResultSerializer(serializers.ModelSerializer):
+    """One ranked hit from the worker search endpoint"""
+    kind = serializers.SerializerMethodField()
+    name = serializers.SerializerMethodField()
+    score = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Party
+        fields = [
+            "id", "kind", "name", "email", "phone_number",
+            "address_city", "address_state", "active", "score"
+        ]
+
+    def _profile(self, obj):
+        for attr in ("employeeprofile", "contractorprofile"):
+            profile = getattr(obj, attr, None)
+            if profile is not None:
+                return attr, profile
+        return None, None
+
+    def get_kind(self, obj):
+        attr, _ = self._profile(obj)
+        return {"employeeprofile": "employee", "contractorprofile": "contractor"}.get(attr)
+
+    def get_name(self, obj):
+        attr, profile = self._profile(obj)
+        if attr == "employeeprofile":
+            return f"{profile.first_name} {profile.last_name}"
+        if attr == "contractorprofile":
+            return profile.contractor_name
+        return None
+    
 # ===================== EMPLOYEE PROFILE SERIALIZERS ===================== #
 
 class EmployeeProfileCreateSerializer(serializers.ModelSerializer):
@@ -137,6 +191,8 @@ class EmployeeProfileCreateSerializer(serializers.ModelSerializer):
             "date_hired": {"required": False},
         }
     
+    def validate_ssn(self, value):
+        return validate_identifier_unique(EmployeeProfile, "ssn", value, label="SSN")
 
     def validate(self, attrs):
         """Cross-field validation"""
@@ -157,7 +213,7 @@ class EmployeeProfileCreateSerializer(serializers.ModelSerializer):
         
         
         employer = self.context['request'].user
-        print(f"found employer in serializer ---- : {employer}")
+        logger.debug("creating employee", extra={"employer_id": employer.pk})
         
         employee = EmployeeProfile.objects.create(
                                                 employer=employer,
@@ -178,6 +234,9 @@ class EmployeeProfileUpdateSerializer(serializers.ModelSerializer):
             "date_hired", "date_offboarded"
         ]
     
+    def validate_ssn(self, value):
+        return validate_identifier_unique(EmployeeProfile, "ssn", value,
+                                          instance=self.instance, label="SSN")
     
     def validate(self, attrs):
         """Cross-field validation"""
@@ -216,7 +275,7 @@ class EmployeeProfileUpdateSerializer(serializers.ModelSerializer):
         # return super().update(instance, validated_data)
 
 class EmployeeProfileListSerializer(serializers.ModelSerializer):
-    """Retrieve Employee with nested Party details"""
+    """List Employees with nested Party details (masked SSN, no decryption)"""
     
     party = PartyListSerializer(source='*', read_only=True)
     
@@ -224,7 +283,21 @@ class EmployeeProfileListSerializer(serializers.ModelSerializer):
         model = EmployeeProfile
         fields = [
             "id","party", "first_name", "last_name", "dob", "gender",
-            "ssn", "marital_status", "dependants", "compensation_type",
+            "ssn_masked", "marital_status", "dependants", "compensation_type",
+            "date_hired", "date_offboarded"
+        ]
+
+
+class EmployeeProfileDetailSerializer(serializers.ModelSerializer):
+    """Retrieve one Employee with nested Party details and the decrypted SSN"""
+    
+    party = PartyListSerializer(source='*', read_only=True)
+    
+    class Meta:
+        model = EmployeeProfile
+        fields = [
+            "id","party", "first_name", "last_name", "dob", "gender",
+            "ssn", "ssn_masked", "marital_status", "dependants", "compensation_type",
             "date_hired", "date_offboarded"
         ]
     
@@ -245,6 +318,8 @@ class ContractorProfileCreateSerializer(serializers.ModelSerializer):
             "tin": {"style": {"input_type": "password"}}
         }
 
+    def validate_tin(self, value):
+        return validate_identifier_unique(ContractorProfile, "tin", value, label="TIN")
     
     @transaction.atomic
     def create(self, validated_data):
@@ -264,13 +339,23 @@ class ContractorProfileCreateSerializer(serializers.ModelSerializer):
 
 
 class ContractorProfileListSerializer(serializers.ModelSerializer):
-    """Retrieve Contractor with nested Party details"""
+    """List Contractors with nested Party details (masked TIN, no decryption)"""
     
     party = PartyListSerializer(source='*', read_only=True)
     
     class Meta:
         model = ContractorProfile
-        fields = ["id", "party", "employer", "contractor_name", "tin"]
+        fields = ["id", "party", "employer", "contractor_name", "tin_masked"]
+
+
+class ContractorProfileDetailSerializer(serializers.ModelSerializer):
+    """Retrieve one Contractor with nested Party details and the decrypted TIN"""
+    
+    party = PartyListSerializer(source='*', read_only=True)
+    
+    class Meta:
+        model = ContractorProfile
+        fields = ["id", "party", "employer", "contractor_name", "tin", "tin_masked"]
     
 
 class ContractorProfileUpdateSerializer(serializers.ModelSerializer):
@@ -281,7 +366,9 @@ class ContractorProfileUpdateSerializer(serializers.ModelSerializer):
         model = ContractorProfile
         fields = ["party", "contractor_name", "tin"]
     
-
+    def validate_tin(self, value):
+        return validate_identifier_unique(ContractorProfile, "tin", value,
+                                          instance=self.instance, label="TIN")
     
     @transaction.atomic
     def update(self, instance, validated_data):
@@ -306,6 +393,57 @@ class ContractorProfileUpdateSerializer(serializers.ModelSerializer):
         
         return instance
     
+# ===================== BULK IMPORT ROW SERIALIZERS ===================== #
+# Per-row field validation only. Email / phone / SSN / TIN uniqueness is
+# checked for the whole batch at once by employee.imports, so the per-row
+# queries are dropped.
+
+class PartyBulkRowSerializer(PartyCreateSerializer):
+    """Party fields of one import row (no per-row uniqueness queries)"""
+
+    class Meta(PartyCreateSerializer.Meta):
+        extra_kwargs = {
+            **PartyCreateSerializer.Meta.extra_kwargs,
+            "email": {"validators": []},
+        }
+
+    def validate_email(self, value):
+        return value.lower()
+
+    def validate_phone_number(self, value):
+        return value
+
+
+class EmployeeProfileBulkRowSerializer(EmployeeProfileCreateSerializer):
+    """One employee row of a bulk import"""
+
+    party = PartyBulkRowSerializer(write_only=True, required=True)
+
+    class Meta(EmployeeProfileCreateSerializer.Meta):
+        extra_kwargs = {
+            **EmployeeProfileCreateSerializer.Meta.extra_kwargs,
+            "ssn": {"validators": []},
+        }
+
+    def validate_ssn(self, value):
+        return value
+
+
+class ContractorProfileBulkRowSerializer(ContractorProfileCreateSerializer):
+    """One contractor row of a bulk import"""
+
+    party = PartyBulkRowSerializer(write_only=True, required=True)
+
+    class Meta(ContractorProfileCreateSerializer.Meta):
+        extra_kwargs = {
+            **ContractorProfileCreateSerializer.Meta.extra_kwargs,
+            "tin": {"validators": []},
+        }
+
+    def validate_tin(self, value):
+        return value
+
+
 # class DocumentCreateSerializer(serializers.ModelSerializer):
 #     class Meta:
 #         model = Document
@@ -319,30 +457,153 @@ class ContractorProfileUpdateSerializer(serializers.ModelSerializer):
 ALLOWED_EXTS = {".pdf", ".png", ".jpg", ".jpeg", ".doc", ".docx"}
 MAX_BYTES = 10 * 1024 * 1024  # 10 MB
 
-def validate_upload(file):
-    # Size
-    if file.size > MAX_BYTES:
-        raise serializers.ValidationError(f"File too large. Max is {MAX_BYTES // (1024*1024)} MB.")
+def validate_upload_name(name):
     # Extension (fallback if content_type is unreliable)
-    ext = Path(file.name).suffix.lower()
+    ext = Path(name).suffix.lower()
     if ext not in ALLOWED_EXTS:
         raise serializers.ValidationError(
             f"Unsupported file type '{ext}'. Allowed: {', '.join(sorted(ALLOWED_EXTS))}"
         )
 
 
-def next_version_for(doc: Document) -> int:
-    """Compute next version number for the (party, document_type, document_name) group."""
-    qs = Document.objects.filter(
-        party=doc.party,
-        document_type=doc.document_type,
+def validate_upload_size(size, max_bytes=MAX_BYTES):
+    if size > max_bytes:
+        raise serializers.ValidationError(f"File too large. Max is {max_bytes // (1024*1024)} MB.")
+
+
+def validate_upload(file, max_bytes=MAX_BYTES):
+    validate_upload_size(file.size, max_bytes)
+    validate_upload_name(file.name)
+
+
+def allocate_version(doc: Document) -> None:
+    """
+    Put `doc` in its (party, document_type, document_name) series and give it
+    the series' next version number. The series row stays locked until the
+    surrounding transaction ends, so concurrent uploads can't share a number.
+    """
+    series, _ = DocumentSeries.objects.get_or_create(
+        party_id=doc.party_id,
+        document_type=doc.document_type or "",
         document_name=doc.document_name,
     )
-    current_max = qs.aggregate(m=Max("version"))["m"]
-    return (current_max or 0) + 1
+    series = DocumentSeries.objects.select_for_update().get(pk=series.pk)
+    series.last_version += 1
+    series.save(update_fields=["last_version"])
+    doc.series = series
+    doc.version = series.last_version
+
+
+def mark_latest(doc: Document) -> None:
+    DocumentSeries.objects.filter(pk=doc.series_id).update(latest=doc)
+
+
+def create_versioned_document(validated_data, upload, user=None):
+    """
+    Insert a Document as the next version of its (party, type, name) group,
+    pointing at the content-addressed blob for `upload` (an identical file
+    already on record is not stored again). Shared by the multipart and the
+    chunked upload paths.
+    """
+    # Stamp who uploaded
+    if user and user.is_authenticated:
+        validated_data["uploaded_by"] = user
+
+    with delete_files_on_rollback(), transaction.atomic():
+        temp = Document(**validated_data)
+        allocate_version(temp)
+        temp.attach_blob(store_blob(upload))
+        temp.save()
+        mark_latest(temp)
+
+    return temp
+
+
+def allocate_versions(docs) -> list:
+    """
+    allocate_version() for a batch: the series of all `docs` are created if
+    missing, then locked and read with a single query. The caller saves the
+    bumped counters (returned) once the documents exist.
+    """
+    keys = {(doc.party_id, doc.document_type or "", doc.document_name) for doc in docs}
+    DocumentSeries.objects.bulk_create(
+        [DocumentSeries(party_id=p, document_type=t, document_name=n) for p, t, n in keys],
+        ignore_conflicts=True,
+    )
+    match = reduce(operator.or_, (Q(party_id=p, document_type=t, document_name=n) for p, t, n in keys))
+    series = {
+        (s.party_id, s.document_type, s.document_name): s
+        # pk order, so concurrent batches lock rows in the same order
+        for s in DocumentSeries.objects.select_for_update().filter(match).order_by("pk")
+    }
+    for doc in docs:
+        doc.series = series[(doc.party_id, doc.document_type or "", doc.document_name)]
+        doc.series.last_version += 1
+        doc.version = doc.series.last_version
+    return list(series.values())
+
+
+def create_versioned_documents(items, user=None):
+    """
+    Batch form of create_versioned_document() for (validated_data, upload)
+    pairs: new file contents are written concurrently, versions are
+    allocated per series in one pass and the rows go in with one bulk_create.
+    """
+    with delete_files_on_rollback(), transaction.atomic():
+        blobs = store_blobs([upload for _, upload in items])
+        docs = [Document(**data) for data, _ in items]
+        for doc, blob in zip(docs, blobs):
+            doc.attach_blob(blob)
+            if user and user.is_authenticated:
+                doc.uploaded_by = user
+        series = allocate_versions(docs)
+        Document.objects.bulk_create(docs)
+        for doc in docs:
+            doc.series.latest = doc
+        DocumentSeries.objects.bulk_update(series, ["last_version", "latest"])
+        invalidate_for_parties({doc.party_id for doc in docs})
+    return docs
+
 
+class EmployerPartyMixin:
+    """Only accept parties employed by the requesting user."""
+
+    def validate_party(self, party):
+        request = self.context.get("request")
+        if request and not Party.objects.for_employer(request.user).filter(pk=party.pk).exists():
+            raise serializers.ValidationError(f'Invalid pk "{party.pk}" - object does not exist.')
+        return party
+
+
+def document_download_url(doc, request=None):
+    # Authenticated download endpoint (Range support, proxy offload)
+    url = reverse("document-download", args=[doc.pk])
+    return request.build_absolute_uri(url) if request else url
+
+
+def document_file_url(doc, request=None):
+    if getattr(doc.document.storage, "encrypted", False):
+        # the media URL would serve ciphertext
+        return document_download_url(doc, request)
+    # Build absolute URL if request is present
+    if hasattr(doc.document, "url"):
+        url = doc.document.url
+        return request.build_absolute_uri(url) if request else url
+    return None
+
+
+class DocumentFileField(serializers.FileField):
+    """Takes the upload; reads back as document_file_url()."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return document_file_url(value.instance, self.context.get("request"))
+
+
+class DocumentCreateSerializer(EmployerPartyMixin, serializers.ModelSerializer):
+    document = DocumentFileField(max_length=100)
 
-class DocumentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = [
@@ -364,33 +625,81 @@ class DocumentCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         upload = validated_data.pop("document")
-
-        # Stamp who uploaded
         user = self.context.get("request").user if self.context.get("request") else None
-        if user and user.is_authenticated:
-            validated_data["uploaded_by"] = user
-        
-        temp = Document(**validated_data)
-        temp.version = next_version_for(temp)
-        temp.document = None
-        temp.save()  
+        return create_versioned_document(validated_data, upload, user)
+
+class DocumentBatchItemSerializer(serializers.Serializer):
+    """Metadata of one file of a batch upload."""
+    document_name = serializers.CharField(max_length=128)
+    document_type = serializers.CharField(max_length=64, required=False, allow_null=True, allow_blank=True)
+    expiry_date = serializers.DateField(required=False, allow_null=True)
+
+
+class DocumentBatchUploadSerializer(EmployerPartyMixin, serializers.Serializer):
+    """
+    Many files for one party. `metadata` is a JSON list matched to the files
+    by position; a missing name defaults to the file name without extension,
+    a missing type / expiry to the batch-level value. Files that fail
+    validation are reported and skipped, the rest are stored together.
+    """
+    party = serializers.PrimaryKeyRelatedField(queryset=Party.objects.all())
+    documents = serializers.ListField(child=serializers.FileField(), allow_empty=False)
+    document_type = serializers.CharField(max_length=64, required=False, allow_null=True, allow_blank=True)
+    expiry_date = serializers.DateField(required=False, allow_null=True)
+    metadata = serializers.JSONField(required=False)
+
+    def validate_documents(self, files):
+        if len(files) > settings.DOCUMENT_BATCH_MAX_FILES:
+            raise serializers.ValidationError(f"At most {settings.DOCUMENT_BATCH_MAX_FILES} files per batch.")
+        return files
+
+    def validate_metadata(self, metadata):
+        if not isinstance(metadata, list) or not all(isinstance(m, dict) for m in metadata):
+            raise serializers.ValidationError("Must be a JSON list of objects, one per file.")
+        return metadata
 
-        # Build final path with party_id + pk + versioned filename
-        final_path = temp.build_final_document_path(upload.name)
+    def validate(self, attrs):
+        if len(attrs.get("metadata") or []) > len(attrs["documents"]):
+            raise serializers.ValidationError({"metadata": "More entries than files."})
+        return attrs
 
-        # Auto version (only if not explicitly provided—which it isn't by default)
-        # Construct a temporary Document-like object for grouping
-        # Save file into the final path
-        storage = temp.document.storage  # respects DEFAULT_FILE_STORAGE
-        saved_name = storage.save(final_path, upload)
-        temp.document.name = saved_name
-        temp.save(update_fields=["document"])
+    def create(self, validated_data):
+        """Store the valid files; returns one result dict per file, in order."""
+        metadata = validated_data.get("metadata") or []
+        defaults = {k: validated_data[k] for k in ("document_type", "expiry_date") if k in validated_data}
+        results, items = [], []
+        for index, upload in enumerate(validated_data["documents"]):
+            result = {"index": index, "filename": upload.name}
+            results.append(result)
+            item = DocumentBatchItemSerializer(data={
+                "document_name": Path(upload.name).stem,
+                **defaults,
+                **(metadata[index] if index < len(metadata) else {}),
+            })
+            errors = {} if item.is_valid() else dict(item.errors)
+            try:
+                validate_upload(upload)
+            except serializers.ValidationError as exc:
+                errors["document"] = exc.detail
+            if errors:
+                result.update(status="error", errors=errors)
+                continue
+            items.append((result, {"party": validated_data["party"], **item.validated_data}, upload))
+
+        if items:
+            request = self.context.get("request")
+            docs = create_versioned_documents([(data, upload) for _, data, upload in items],
+                                              request.user if request else None)
+            for (result, _, _), doc in zip(items, docs):
+                result.update(status="created", id=doc.pk, document_type=doc.document_type,
+                              document_name=doc.document_name, version=doc.version)
+        return results
 
-        return temp
 
 class DocumentUpdateSerializer(serializers.ModelSerializer):
     # Prevent changing party via serializer-level write-protection
     party = serializers.PrimaryKeyRelatedField(read_only=True)
+    document = DocumentFileField(max_length=100)
 
     class Meta:
         model = Document
@@ -421,19 +730,21 @@ class DocumentUpdateSerializer(serializers.ModelSerializer):
             validate_upload(file)
         return file
 
+    @delete_files_on_rollback()
+    @transaction.atomic
     def update(self, instance, validated_data):
         upload = validated_data.pop("document", None)
+        previous_series = instance.series
+        renamed = any(
+            field in validated_data and validated_data[field] != getattr(instance, field)
+            for field in ("document_type", "document_name")
+        )
 
-        # If a new file is provided, bump version and re-save to a new versioned path
+        # If a new file is provided, point at the new content
+        previous_blob_id = None
         if upload is not None:
-            instance.version = instance.version + 1
-            # Save instance to persist version bump (no file yet)
-            instance.save(update_fields=["version"])
-
-            final_path = instance.build_final_document_path(upload.name)
-            storage = instance.document.storage
-            saved_name = storage.save(final_path, upload)
-            instance.document.name = saved_name
+            previous_blob_id = instance.blob_id
+            instance.attach_blob(store_blob(upload))
 
         # Handle soft-delete stamping (optional)
         if "deleted_at" in validated_data and validated_data["deleted_at"] and not instance.deleted_by:
@@ -445,11 +756,24 @@ class DocumentUpdateSerializer(serializers.ModelSerializer):
         for k, v in validated_data.items():
             setattr(instance, k, v)
 
+        # A new file bumps the version; a rename moves the document to the
+        # series it now belongs to
+        if upload is not None or renamed:
+            allocate_version(instance)
         instance.save()
+        # only once the row no longer references it
+        if previous_blob_id:
+            release_blob(previous_blob_id)
+        if renamed and previous_series is not None:
+            # release the old series' pointer before the new one takes it
+            previous_series.refresh_latest()
+        if upload is not None or renamed:
+            mark_latest(instance)
         return instance
     
 class DocumentListSerializer(serializers.ModelSerializer):
     document_url = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
     is_expired = serializers.SerializerMethodField()
     days_to_expiry = serializers.SerializerMethodField()
 
@@ -462,6 +786,7 @@ class DocumentListSerializer(serializers.ModelSerializer):
             "document_name",
             "version",
             "document_url",
+            "download_url",
             "uploaded_at",
             "uploaded_by",
             "expiry_date",
@@ -473,12 +798,10 @@ class DocumentListSerializer(serializers.ModelSerializer):
         read_only_fields = fields  # fully read-only in list/detail views
 
     def get_document_url(self, obj: Document):
-        # Build absolute URL if request is present
-        request = self.context.get("request")
-        if hasattr(obj.document, "url"):
-            url = obj.document.url
-            return request.build_absolute_uri(url) if request else url
-        return None
+        return document_file_url(obj, self.context.get("request"))
+
+    def get_download_url(self, obj: Document):
+        return document_download_url(obj, self.context.get("request"))
 
     def get_is_expired(self, obj: Document):
         return bool(obj.expiry_date and obj.expiry_date < date.today())
@@ -486,4 +809,51 @@ class DocumentListSerializer(serializers.ModelSerializer):
     def get_days_to_expiry(self, obj: Document):
         if not obj.expiry_date:
             return None
-        return (obj.expiry_date - date.today()).days
\ No newline at end of file
+        return (obj.expiry_date - date.today()).days
+
+
+class ExpiringDocumentSerializer(DocumentListSerializer):
+    """Rows of Document.objects.expiring(); expiry status comes from the query."""
+
+    expiry_bucket = serializers.CharField(read_only=True)
+
+    class Meta(DocumentListSerializer.Meta):
+        fields = DocumentListSerializer.Meta.fields + ["expiry_bucket"]
+        read_only_fields = fields
+
+    def get_is_expired(self, obj: Document):
+        return obj.expiry_bucket == "expired"
+
+    def get_days_to_expiry(self, obj: Document):
+        return obj.expires_in.days
+
+
+# ===================== CHUNKED UPLOAD SERIALIZERS ===================== #
+class UploadSessionCreateSerializer(EmployerPartyMixin, serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ["id", "party", "document_type", "document_name", "expiry_date", "filename", "size"]
+        read_only_fields = ["id"]
+
+    def validate_filename(self, value):
+        validate_upload_name(value)
+        return Path(value).name
+
+    def validate_size(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Size must be at least 1 byte.")
+        validate_upload_size(value, settings.DOCUMENT_UPLOAD_MAX_BYTES)
+        return value
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    # next byte the server expects, i.e. where a client resumes
+    offset = serializers.IntegerField(source="received", read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id", "party", "document_type", "document_name", "expiry_date",
+            "filename", "size", "offset", "created_at", "updated_at",
+        ]
+        read_only_fields = fields
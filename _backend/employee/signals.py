@@ -0,0 +1,80 @@
+"""
+Model signal handlers.
+
+Cached roster lists of an employer are invalidated when its data changes;
+the bumps are deferred to transaction commit so a concurrent request can't
+re-cache the pre-commit rows under the new generation. Deleting a document
+releases its reference on the shared file blob and, if it was the newest
+version, re-points its series at the next newest. Revoked tokens and
+deactivated users are dropped from this process's token cache at once.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Party, EmployeeProfile, ContractorProfile, Document, DocumentSeries, ApiToken
+from .authentication import token_cache
+from .blobs import release_blob
+from .roster_cache import invalidate_employer
+
+
+def employer_ids_for_party(party_id):
+    """Employers of a bare Party row (via whichever profile it has)."""
+    return {
+        *EmployeeProfile.objects.filter(pk=party_id).values_list("employer_id", flat=True),
+        *ContractorProfile.objects.filter(pk=party_id).values_list("employer_id", flat=True),
+    }
+
+
+def _invalidate_on_commit(employer_ids):
+    for employer_id in employer_ids:
+        transaction.on_commit(lambda employer_id=employer_id: invalidate_employer(employer_id))
+
+
+def invalidate_for_parties(party_ids):
+    """What the Document handlers below do, for writes that send no signals (bulk_create)."""
+    for party_id in party_ids:
+        _invalidate_on_commit(employer_ids_for_party(party_id))
+
+
+@receiver([post_save, post_delete], sender=EmployeeProfile, dispatch_uid="roster_cache_employee")
+@receiver([post_save, post_delete], sender=ContractorProfile, dispatch_uid="roster_cache_contractor")
+def invalidate_profile(sender, instance, **kwargs):
+    _invalidate_on_commit([instance.employer_id])
+
+
+@receiver([post_save, post_delete], sender=Party, dispatch_uid="roster_cache_party")
+def invalidate_party(sender, instance, **kwargs):
+    _invalidate_on_commit(employer_ids_for_party(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Document, dispatch_uid="roster_cache_document")
+def invalidate_document(sender, instance, **kwargs):
+    _invalidate_on_commit(employer_ids_for_party(instance.party_id))
+
+
+@receiver(post_delete, sender=Document, dispatch_uid="document_blob_release")
+def release_document_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_blob(instance.blob_id)
+
+
+@receiver(post_delete, sender=Document, dispatch_uid="document_series_latest")
+def refresh_series_latest(sender, instance, **kwargs):
+    # the delete already nulled `latest` if this was the newest version
+    series = DocumentSeries.objects.filter(pk=instance.series_id, latest__isnull=True).first()
+    if series is not None:
+        series.refresh_latest()
+
+
+@receiver([post_save, post_delete], sender=ApiToken, dispatch_uid="api_token_cache")
+def forget_api_token(sender, instance, **kwargs):
+    token_cache.discard(instance.token_hash)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid="api_token_cache_user")
+def forget_user_tokens(sender, instance, **kwargs):
+    if not instance.is_active:
+        for digest in ApiToken.objects.filter(user=instance).values_list("token_hash", flat=True):
+            token_cache.discard(digest)
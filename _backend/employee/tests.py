@@ -1,3 +1,1152 @@
-from django.test import TestCase
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import addModuleCleanup, mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from cryptography.fernet import Fernet
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .authentication import ApiTokenAuthentication, token_cache
+from .blobs import HashingMemoryFileUploadHandler
+from .encrypted_storage import HEADER, TAG_SIZE, DecryptionError, EncryptedStorage
+from .log import REDACTED, JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+from .models import (ApiToken, ContractorProfile, Document, DocumentBlob, EmployeeProfile, Party,
+                     RetentionPolicy)
+from .pagination import KeysetPaginator
+from .roster_cache import get_cache, get_generation, get_stats
+from .serializers import create_versioned_document, create_versioned_documents
+from .views import ContractorProfileListCreateView, EmployeeProfileListCreateView
+
+
+def setUpModule():
+    # the app's JSON log lines would land between the test runner's output;
+    # assertLogs still sees the records
+    logger = logging.getLogger("employee")
+    addModuleCleanup(setattr, logger, "handlers", logger.handlers)
+    logger.handlers = [logging.NullHandler()]
+
+
+def employee_payload(i, **overrides):
+    payload = {
+        "party": {"email": f"e{i}@x.com", "phone_number": f"{5550000000 + i}",
+                  "address_city": "Austin", "address_state": "TX"},
+        "first_name": f"F{i}", "last_name": f"L{i}", "ssn": f"{100000000 + i}",
+        "compensation_type": "hourly",
+    }
+    payload.update(overrides)
+    return payload
+
+
+def contractor_payload(i, **overrides):
+    payload = {
+        "party": {"email": f"c{i}@x.com", "phone_number": f"{6660000000 + i}"},
+        "contractor_name": f"C{i}", "tin": f"{200000000 + i}",
+    }
+    payload.update(overrides)
+    return payload
+
+
+class APITestCase(TestCase):
+    """An employer (`self.user`, staff) and a second one, with API clients."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("boss", password="pw", is_staff=True)
+        self.other = User.objects.create_user("other", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.other_client = APIClient()
+        self.other_client.force_authenticate(self.other)
+
+    def create_employee(self, i, client=None, **overrides):
+        """POST through the API; returns the EmployeeProfile."""
+        payload = employee_payload(i, **overrides)
+        response = (client or self.client).post("/api/emp/employeeapi/", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return EmployeeProfile.objects.get(email=payload["party"]["email"])
+
+    def create_contractor(self, i, client=None, **overrides):
+        """POST through the API; returns the ContractorProfile."""
+        payload = contractor_payload(i, **overrides)
+        response = (client or self.client).post("/api/emp/contractorapi/", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return ContractorProfile.objects.get(email=payload["party"]["email"])
+
+
+class MediaTestCase(APITestCase):
+    """APITestCase with MEDIA_ROOT in a scratch directory."""
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp(prefix="employee-tests-")
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media,
+                                     DOCUMENT_UPLOAD_STAGING_DIR=f"{media}/documents/_chunks")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.media = media
+
+    def use_encrypted_storage(self):
+        """Encrypt document files from here on (the storage is picked at import)."""
+        storage = EncryptedStorage(keys=[os.urandom(32)])
+        for field in (Document._meta.get_field("document"), DocumentBlob._meta.get_field("file")):
+            self.addCleanup(setattr, field, "storage", field.storage)
+            field.storage = storage
+
+    def stored_files(self):
+        """Names of the files under MEDIA_ROOT/blobs."""
+        root = os.path.join(self.media, "blobs")
+        return sorted(name for _, _, names in os.walk(root) for name in names)
+
+    def upload(self, party, name="contract.pdf", content=b"%PDF-1.4 test", **data):
+        return self.client.post("/api/emp/documentapi/", {
+            "party": party.pk, "document_name": "Contract",
+            "document": SimpleUploadedFile(name, content), **data,
+        }, format="multipart")
+
+
+class RequestInstrumentationTests(APITestCase):
+    @override_settings(REQUEST_INSTRUMENTATION=True)
+    def test_session_authenticated_request(self):
+        # request.user is a lazy object; attributing the session queries to
+        # a caller must not evaluate it (that recursed until RecursionError)
+        self.create_employee(1)
+        client = APIClient()
+        client.force_login(self.user)
+        response = client.get("/api/emp/employeeapi/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("db;dur=", response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    def test_disabled_by_default(self):
+        response = self.client.get("/api/emp/employeeapi/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+
+class PartySearchTextTests(APITestCase):
+    def test_saving_bare_party_keeps_profile_names(self):
+        employee = self.create_employee(1, first_name="Zed")
+        contractor = self.create_contractor(2, contractor_name="Acme Plumbing")
+        for pk in (employee.pk, contractor.pk):
+            party = Party.objects.get(pk=pk)
+            party.address_city = "Dallas"
+            party.save()
+        self.assertEqual(Party.objects.get(pk=employee.pk).search_text, "e1@x.com 5550000001 dallas zed l1")
+        self.assertEqual(Party.objects.get(pk=contractor.pk).search_text,
+                         "c2@x.com 6660000002 dallas acme plumbing")
+
+        party = Party.objects.get(pk=employee.pk)
+        party.phone_number = "5559990000"
+        party.save(update_fields=["phone_number"])
+        self.assertIn("zed", Party.objects.get(pk=employee.pk).search_text)
+
+        results = self.client.get("/api/emp/searchapi/", {"q": "zed"}).json()
+        self.assertEqual([r["id"] for r in results["results"]], [employee.pk])
+
+
+class PartySearchTests(APITestCase):
+    """searchapi/ ranking; Postgres adds trigram matches, SQLite matches by LIKE only."""
+
+    def setUp(self):
+        super().setUp()
+        self.substring = self.create_employee(1, first_name="Joanna", last_name="Smith")
+        self.word = self.create_employee(2, first_name="Ann", last_name="Lee")
+        self.email = self.create_contractor(3, party={**contractor_payload(3)["party"], "email": "annex@x.com"})
+        self.johnson = self.create_employee(4, first_name="Mark", last_name="Johnson")
+        self.create_employee(5, first_name="Bob", last_name="Stone")
+        self.create_employee(6, client=self.other_client, first_name="Ann", last_name="Other")
+
+    def search(self, q, **params):
+        response = self.client.get("/api/emp/searchapi/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [r["id"] for r in response.json()["results"]]
+
+    def test_ranking(self):
+        # text prefix (the email), then a word prefix, then a substring;
+        # another employer's "Ann" is never a candidate
+        self.assertEqual(self.search("ann"), [self.email.pk, self.word.pk, self.substring.pk])
+        self.assertEqual(self.search("ann", kind="employee"), [self.word.pk, self.substring.pk])
+        self.assertEqual(self.search("lee ann"), [self.word.pk])
+        self.assertEqual(self.search("ann", limit=1, offset=1), [self.word.pk])
+
+    @skipUnless(connection.vendor == "postgresql", "fuzzy matching needs pg_trgm")
+    def test_misspelled_query(self):
+        self.assertEqual(self.search("jonson"), [self.johnson.pk])
+
+
+class RosterQueryPlanTests(APITestCase):
+    """
+    The roster filters, keyset orderings and search are served by the
+    indexes added for them, without a sort step (SQLite or Postgres plans).
+    """
+
+    def setUp(self):
+        super().setUp()
+        for i in range(20):
+            self.create_employee(i, compensation_type="salaried" if i % 2 else "hourly")
+            self.create_contractor(i)
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # a handful of rows would otherwise be read sequentially
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("ANALYZE")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+        return plan
+
+    def assertPagesByIndex(self, queryset, view, ordering, index_name):
+        """A ?ordering=...&page_size=10 page is read in index order, not sorted."""
+        page = queryset.order_by(*KeysetPaginator(view.orderings).get_keys(ordering))[:10]
+        plan = self.assertUsesIndex(page, index_name)
+        # SQLite: "USE TEMP B-TREE FOR ORDER BY", Postgres: a Sort node
+        self.assertNotRegex(plan, r"TEMP B-TREE|\bSort\b", plan)
+
+    def test_roster_orderings(self):
+        employees = EmployeeProfile.objects.for_employer(self.user)
+        contractors = ContractorProfile.objects.for_employer(self.user)
+        self.assertPagesByIndex(employees, EmployeeProfileListCreateView, "last_name", "employee_emp_lastname_idx")
+        self.assertPagesByIndex(employees.filter(date_hired__gte=date(2020, 1, 1)), EmployeeProfileListCreateView,
+                                "date_hired", "employee_emp_hired_idx")
+        self.assertPagesByIndex(contractors, ContractorProfileListCreateView, "contractor_name",
+                                "contractor_emp_name_idx")
+
+    def test_roster_filters(self):
+        employees = EmployeeProfile.objects.for_employer(self.user)
+        self.assertUsesIndex(employees.filter(compensation_type="salaried").order_by("last_name")[:10],
+                             "employee_emp_comp_name_idx")
+        self.assertUsesIndex(employees.filter(date_offboarded__isnull=False), "employee_emp_offboard_idx")
+        self.assertUsesIndex(Party.objects.filter(active=True, address_state="TX"), "party_active_state_idx")
+        self.assertUsesIndex(Party.objects.order_by("created_at", "id")[:10], "party_created_id_idx")
+
+    @skipUnless(connection.vendor == "postgresql", "the trigram index is Postgres-only")
+    def test_search(self):
+        self.assertUsesIndex(Party.objects.filter(search_text__contains="austin"), "party_search_trgm_idx")
+
+
+class ColdStartBudgetTests(SimpleTestCase):
+    """coldstart_report as a CI step runs it: fresh interpreters, COLDSTART_BUDGET_MS."""
+
+    @skipUnless(os.environ.get("COLDSTART_BUDGET_CHECK"), "wall-clock budget; set COLDSTART_BUDGET_CHECK=1")
+    def test_within_budget(self):
+        out = StringIO()
+        call_command("coldstart_report", runs=3, serverless=True, stdout=out)
+        self.assertIn("401 Unauthorized", out.getvalue())
+        self.assertIn(f"Within the {settings.COLDSTART_BUDGET_MS} ms budget.", out.getvalue())
+
+    def test_over_budget_fails(self):
+        with self.assertRaisesMessage(CommandError, "over the 1 ms budget"):
+            call_command("coldstart_report", runs=1, budget_ms=1, stdout=StringIO())
+
+
+class EncryptedStorageTests(SimpleTestCase):
+    SEGMENT = 16
+
+    def setUp(self):
+        root = tempfile.mkdtemp(prefix="employee-tests-")
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.storage = EncryptedStorage(inner=FileSystemStorage(location=root), keys=[os.urandom(32)],
+                                        segment_size=self.SEGMENT)
+        self.plain = bytes(range(40))  # two full segments and a short last one
+        self.name = self.storage.save("doc.bin", ContentFile(self.plain))
+        self.path = self.storage.path(self.name)
+
+    def stored(self):
+        with open(self.path, "rb") as fh:
+            data = fh.read()
+        stride = self.SEGMENT + TAG_SIZE
+        header, body = data[:HEADER.size], data[HEADER.size:]
+        return header, [body[i:i + stride] for i in range(0, len(body), stride)]
+
+    def store(self, header, segments):
+        with open(self.path, "wb") as fh:
+            fh.write(header + b"".join(segments))
+
+    def read(self):
+        with self.storage.open(self.name) as fh:
+            return fh.read()
+
+    def test_round_trip_and_size(self):
+        self.assertNotIn(self.plain[:16], b"".join(self.stored()[1]))
+        self.assertEqual(self.read(), self.plain)
+        with mock.patch.object(self.storage.inner, "open", side_effect=AssertionError("size() read the file")):
+            self.assertEqual(self.storage.size(self.name), len(self.plain))
+        with self.storage.open(self.name) as fh:
+            fh.seek(20)
+            self.assertEqual(fh.read(8), self.plain[20:28])
+
+    def test_tampered_segment(self):
+        header, segments = self.stored()
+        segments[1] = segments[1][:3] + bytes([segments[1][3] ^ 1]) + segments[1][4:]
+        self.store(header, segments)
+        with self.assertRaisesMessage(DecryptionError, "Segment 1"):
+            self.read()
+        with self.storage.open(self.name) as fh:
+            # segments before the damaged one still decrypt
+            self.assertEqual(fh.read(16), self.plain[:16])
+
+    def test_tampered_header(self):
+        header, segments = self.stored()
+        self.store(header[:-1] + bytes([header[-1] ^ 1]), segments)
+        with self.assertRaisesMessage(DecryptionError, "Segment 0"):
+            self.read()
+
+    def test_reordered_segments(self):
+        header, segments = self.stored()
+        self.store(header, [segments[1], segments[0], segments[2]])
+        with self.assertRaisesMessage(DecryptionError, "Segment 0"):
+            self.read()
+
+    def test_truncated(self):
+        header, segments = self.stored()
+        # the final segment cut short, dropped, or cut below its tag
+        for kept in ([*segments[:2], segments[2][:-1]], segments[:2], [*segments[:2], segments[2][:5]]):
+            self.store(header, kept)
+            with self.assertRaises(DecryptionError):
+                self.read()
+
+
+class EncryptedDocumentURLTests(MediaTestCase):
+    def test_create_and_update_return_the_download_url(self):
+        # the media URL of an encrypted file serves ciphertext
+        self.use_encrypted_storage()
+        employee = self.create_employee(1)
+        response = self.upload(employee)
+        self.assertEqual(response.status_code, 201, response.content)
+        doc_id = response.json()["id"]
+        download_url = f"http://testserver/api/emp/documentapi/{doc_id}/download/"
+        self.assertEqual(response.json()["document"], download_url)
+
+        response = self.client.put(f"/api/emp/documentapi/{doc_id}/", {
+            "document": SimpleUploadedFile("contract.pdf", b"%PDF-1.4 v2"),
+        }, format="multipart")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["document"], download_url)
+        self.assertEqual(self.client.get(download_url).getvalue(), b"%PDF-1.4 v2")
+
+    def test_plain_storage_returns_the_media_url(self):
+        employee = self.create_employee(1)
+        response = self.upload(employee)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertRegex(response.json()["document"], r"^http://testserver/media/blobs/")
+
+
+class UploadHashingTests(MediaTestCase):
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_large_upload_is_hashed_by_the_temporary_file_handler_only(self):
+        handler = HashingMemoryFileUploadHandler()
+        handler.handle_raw_input(None, {}, 4096, "boundary")
+        handler.new_file("document", "big.pdf", "application/pdf", 4096)
+        self.assertEqual(handler.receive_data_chunk(b"x" * 4096, 0), b"x" * 4096)
+        self.assertEqual(handler.sha256.hexdigest(), hashlib.sha256().hexdigest())
+
+        content = b"%PDF-1.4 " + b"x" * 4096
+        response = self.upload(self.create_employee(1), content=content)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(DocumentBlob.objects.get().sha256, hashlib.sha256(content).hexdigest())
+
+
+class BlobRollbackTests(MediaTestCase):
+    def test_rolled_back_upload_deletes_its_new_file(self):
+        employee = self.create_employee(1)
+        self.assertEqual(self.upload(employee, content=b"kept").status_code, 201)
+        kept = self.stored_files()
+
+        for content in (b"new", b"kept"):
+            with mock.patch("employee.serializers.mark_latest", side_effect=DatabaseError), \
+                    self.assertRaises(DatabaseError):
+                create_versioned_document({"party": employee, "document_name": "Contract"},
+                                          SimpleUploadedFile("contract.pdf", content), self.user)
+        # the new content's file is gone; the already stored one is untouched
+        self.assertEqual(self.stored_files(), kept)
+        self.assertEqual(DocumentBlob.objects.get().refcount, 1)
+
+
+class BlobMigrationTests(MediaTestCase):
+    def test_duplicate_files_are_deleted_after_commit(self):
+        link_existing_files = import_module("employee.migrations.0019_document_blobs").link_existing_files
+        employee = self.create_employee(1)
+        storage = Document._meta.get_field("document").storage
+        names = [storage.save(f"documents/{name}", ContentFile(content))
+                 for name, content in (("a.pdf", b"same"), ("b.pdf", b"same"), ("c.pdf", b"other"))]
+        docs = [Document.objects.create(party=employee, document_name=name, document=name) for name in names]
+        docs.append(Document.objects.create(party=employee, document_name="copy", document=names[1]))
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            link_existing_files(django_apps, connection.schema_editor())
+        self.assertTrue(all(storage.exists(name) for name in names))
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual([Document.objects.get(pk=doc.pk).document.name for doc in docs],
+                         [names[0], names[0], names[2], names[0]])
+        self.assertEqual([storage.exists(name) for name in names], [True, False, True])
+        self.assertEqual(sorted(DocumentBlob.objects.values_list("refcount", flat=True)), [1, 3])
+
+
+class DocumentBatchUploadTests(MediaTestCase):
+    def post_batch(self, party, files, **data):
+        return self.client.post("/api/emp/documentapi/batch/", {
+            "party": party.pk,
+            "documents": [SimpleUploadedFile(name, content) for name, content in files],
+            **data,
+        }, format="multipart")
+
+    def test_all_stored(self):
+        employee = self.create_employee(1)
+        response = self.post_batch(employee, [("w2.pdf", b"a"), ("i9.pdf", b"b"), ("copy.pdf", b"a")],
+                                   document_type="tax")
+        self.assertEqual(response.status_code, 201, response.content)
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["created"] * 3)
+        self.assertEqual([r["document_name"] for r in results], ["w2", "i9", "copy"])
+        self.assertEqual(Document.objects.filter(party=employee, document_type="tax").count(), 3)
+        # identical contents share one blob
+        self.assertEqual(len(self.stored_files()), 2)
+
+    def test_partly_rejected(self):
+        employee = self.create_employee(1)
+        response = self.post_batch(employee, [("w2.pdf", b"a"), ("notes.exe", b"b")])
+        self.assertEqual(response.status_code, 207, response.content)
+        ok, rejected = response.json()["results"]
+        self.assertEqual(ok["status"], "created")
+        self.assertEqual((rejected["status"], list(rejected["errors"])), ("error", ["document"]))
+        self.assertEqual(Document.objects.count(), 1)
+
+    def test_all_rejected(self):
+        employee = self.create_employee(1)
+        response = self.post_batch(employee, [("a.exe", b"a"), ("b.exe", b"b")])
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual([r["status"] for r in response.json()["results"]], ["error", "error"])
+        self.assertFalse(Document.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_rolled_back_batch_deletes_its_new_files(self):
+        employee = self.create_employee(1)
+        items = [({"party": employee, "document_name": name}, SimpleUploadedFile(f"{name}.pdf", name.encode()))
+                 for name in ("w2", "i9", "ssa")]
+        with mock.patch("employee.serializers.invalidate_for_parties", side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            create_versioned_documents(items, self.user)
+        self.assertFalse(DocumentBlob.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+
+class RosterImportTests(APITestCase):
+    def import_rows(self, rows, kind="employee"):
+        return self.client.post(f"/api/emp/{kind}api/import/", rows, format="json")
+
+    def test_import_creates_profiles(self):
+        response = self.import_rows([employee_payload(1), employee_payload(2, first_name="Zed")])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["created"], 2)
+        employee = EmployeeProfile.objects.get(pk=response.json()["ids"][1])
+        self.assertEqual((employee.employer, employee.ssn, employee.ssn_masked),
+                         (self.user, "100000002", "***-**-0002"))
+        self.assertEqual(employee.search_text, "e2@x.com 5550000002 austin zed l2")
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT ssn FROM employee_employeeprofile WHERE party_ptr_id = %s", [employee.pk])
+            self.assertNotIn("100000002", cursor.fetchone()[0])
+
+        response = self.import_rows([contractor_payload(1)], kind="contractor")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(ContractorProfile.objects.get(pk=response.json()["ids"][0]).tin, "200000001")
+
+    def test_duplicate_ssn_rejects_the_whole_file(self):
+        self.create_employee(1)
+        response = self.import_rows([
+            employee_payload(2),
+            employee_payload(3, ssn="100000001"),  # on record already
+            employee_payload(4, ssn="100000002"),  # repeats row 1
+        ])
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(response.json()["errors"], [
+            {"row": 2, "errors": {"ssn": ["SSN already exists."]}},
+            {"row": 3, "errors": {"ssn": ["Duplicate SSN in file (row 1)."]}},
+        ])
+        self.assertEqual(EmployeeProfile.objects.count(), 1)
+
+    def test_duplicate_party_fields_in_file(self):
+        response = self.import_rows([
+            employee_payload(1),
+            employee_payload(2, party={**employee_payload(2)["party"], "email": "e1@x.com"}),
+        ])
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(response.json()["errors"], [
+            {"row": 2, "errors": {"party": {"email": ["Duplicate email in file (row 1)."]}}},
+        ])
+        self.assertFalse(Party.objects.exists())
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for i, last_name in enumerate(["Diaz", "Abe", "Cho", "Abe", "Evans"]):
+            self.create_employee(i, last_name=last_name)
+
+    def walk(self, **params):
+        """(last names, pages) following `next` from the first page."""
+        names, pages = [], 0
+        response = self.client.get("/api/emp/employeeapi/", params)
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            names += [row["last_name"] for row in body["results"]]
+            pages += 1
+            if body["next"] is None:
+                return names, pages
+            response = self.client.get(body["next"])
+
+    def test_pages_cover_every_row_once(self):
+        self.assertEqual(self.walk(page_size=2, ordering="last_name"), (["Abe", "Abe", "Cho", "Diaz", "Evans"], 3))
+        self.assertEqual(self.walk(page_size=2, ordering="-last_name"), (["Evans", "Diaz", "Cho", "Abe", "Abe"], 3))
+        # unpaginated clients still get the plain list
+        self.assertEqual(len(self.client.get("/api/emp/employeeapi/").json()), 5)
+
+    def test_bad_cursor(self):
+        next_url = self.client.get("/api/emp/employeeapi/", {"page_size": 2}).json()["next"]
+        cursor = parse_qs(urlsplit(next_url).query)["cursor"][0]
+        for params in ({"cursor": "not-a-cursor"},
+                       # minted for another ordering
+                       {"cursor": cursor, "ordering": "date_hired"}):
+            response = self.client.get("/api/emp/employeeapi/", params)
+            self.assertEqual(response.status_code, 400, response.content)
+            self.assertEqual(response.json(), {"cursor": "Invalid cursor."})
+        response = self.client.get("/api/emp/employeeapi/", {"ordering": "ssn"})
+        self.assertEqual(response.status_code, 400)
+
+
+class RosterExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.create_employee(1)
+        self.second = self.create_employee(2, compensation_type="salaried")
+        self.create_employee(3, client=self.other_client)
+
+    def export(self, **params):
+        response = self.client.get("/api/emp/employeeapi/export/", params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_jsonl(self):
+        response, body = self.export(format="jsonl")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="employees.jsonl"')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.first.pk, self.second.pk])
+        self.assertEqual(rows[0]["ssn_masked"], "***-**-0001")
+        self.assertNotIn("ssn", rows[0])
+
+    def test_csv_with_filters(self):
+        response, body = self.export(format="csv", compensation_type="salaried")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([(row["id"], row["last_name"]) for row in rows], [(str(self.second.pk), "L2")])
+        self.assertNotIn("100000002", body)
+
+
+class BlindIndexTests(APITestCase):
+    def test_duplicate_identifiers_are_rejected(self):
+        employee = self.create_employee(1, ssn="123-45-6789")
+        # the same number, formatted differently, under another employer
+        response = self.other_client.post("/api/emp/employeeapi/", employee_payload(2, ssn="123456789"),
+                                          format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"ssn": ["SSN already exists."]})
+
+        other = self.create_employee(3)
+        response = self.client.put(f"/api/emp/employeeapi/{other.pk}/", {"ssn": "123 45 6789"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        # re-saving the employee's own SSN is not a duplicate
+        response = self.client.put(f"/api/emp/employeeapi/{employee.pk}/", {"ssn": "123456789"}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.create_contractor(1, tin="12-3456789")
+        response = self.client.post("/api/emp/contractorapi/", contractor_payload(2, tin="123456789"), format="json")
+        self.assertEqual(response.json(), {"tin": ["TIN already exists."]})
+
+    def test_lookup_by_ssn(self):
+        employee = self.create_employee(1, ssn="123-45-6789")
+        self.create_employee(2)
+        rows = self.client.get("/api/emp/employeeapi/", {"ssn": "123456789"}).json()
+        self.assertEqual([row["id"] for row in rows], [employee.pk])
+
+
+class MaskedIdentifierTests(APITestCase):
+    def test_lists_serve_masked_values_without_reading_ciphertext(self):
+        employee = self.create_employee(1, ssn="123-45-6789")
+        self.create_contractor(1, tin="12-3456789")
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.client.get("/api/emp/employeeapi/").json()
+        self.assertEqual(rows[0]["ssn_masked"], "***-**-6789")
+        self.assertNotIn("ssn", rows[0])
+        self.assertFalse([q for q in queries if '"ssn"' in q["sql"]])
+
+        row = self.client.get("/api/emp/contractorapi/").json()[0]
+        self.assertEqual(row["tin_masked"], "*****6789")
+        self.assertNotIn("tin", row)
+
+        # the detail endpoint is the one read path that decrypts
+        detail = self.client.get(f"/api/emp/employeeapi/{employee.pk}/").json()
+        self.assertEqual((detail["ssn"], detail["ssn_masked"]), ("123-45-6789", "***-**-6789"))
+
+    def test_update_refreshes_the_masked_value(self):
+        employee = self.create_employee(1)
+        self.client.put(f"/api/emp/employeeapi/{employee.pk}/", {"ssn": "987654321"}, format="json")
+        employee.refresh_from_db()
+        self.assertEqual(employee.ssn_masked, "***-**-4321")
+
+
+class RotateFieldKeysTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.old_key = settings.FIELD_ENCRYPTION_KEY[0]
+        self.new_key = Fernet.generate_key().decode()
+        scratch = tempfile.mkdtemp(prefix="employee-tests-")
+        self.addCleanup(shutil.rmtree, scratch, ignore_errors=True)
+        self.checkpoint = os.path.join(scratch, "rotate.json")
+        self.employees = [self.create_employee(i) for i in range(3)]
+        self.create_contractor(1)
+
+    def raw_tokens(self, table, column):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {column} FROM {table} ORDER BY party_ptr_id")
+            return [row[0].encode() for row in cursor.fetchall()]
+
+    def rotate(self, *args):
+        call_command("rotate_field_keys", "--new-key", self.new_key, "--old-key", self.old_key,
+                     "--batch-size", "2", "--checkpoint", self.checkpoint, *args, stdout=StringIO())
+
+    def test_rotates_every_row(self):
+        self.rotate()
+        new = Fernet(self.new_key)
+        self.assertEqual([new.decrypt(t).decode() for t in self.raw_tokens("employee_employeeprofile", "ssn")],
+                         ["100000000", "100000001", "100000002"])
+        self.assertEqual([new.decrypt(t).decode() for t in self.raw_tokens("employee_contractorprofile", "tin")],
+                         ["200000001"])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_checkpoint(self):
+        key_id = hashlib.sha256(self.new_key.encode()).hexdigest()[:12]
+        with open(self.checkpoint, "w") as fh:
+            json.dump({"key_id": key_id, "positions": {"employee.EmployeeProfile.ssn": self.employees[0].pk}}, fh)
+        self.rotate()
+        first, *rest = self.raw_tokens("employee_employeeprofile", "ssn")
+        # the row before the checkpoint was left alone
+        self.assertEqual(Fernet(self.old_key).decrypt(first), b"100000000")
+        self.assertEqual([Fernet(self.new_key).decrypt(t) for t in rest], [b"100000001", b"100000002"])
+
+    def test_checkpoint_of_another_key(self):
+        with open(self.checkpoint, "w") as fh:
+            json.dump({"key_id": "0" * 12, "positions": {}}, fh)
+        with self.assertRaisesMessage(CommandError, "belongs to a different new key"):
+            self.rotate()
+
+
+class TenantIsolationTests(MediaTestCase):
+    def test_other_employer_sees_nothing(self):
+        employee = self.create_employee(1, first_name="Zed")
+        contractor = self.create_contractor(1)
+        doc_id = self.upload(employee).json()["id"]
+        self.create_employee(2, client=self.other_client)
+
+        client = self.other_client
+        self.assertEqual([row["last_name"] for row in client.get("/api/emp/employeeapi/").json()], ["L2"])
+        self.assertEqual(client.get("/api/emp/contractorapi/").json(), [])
+        self.assertEqual(client.get("/api/emp/searchapi/", {"q": "zed"}).json()["results"], [])
+        for url in (f"/api/emp/employeeapi/{employee.pk}/", f"/api/emp/contractorapi/{contractor.pk}/",
+                    f"/api/emp/documentapi/?party={employee.pk}", f"/api/emp/documentapi/{doc_id}/",
+                    f"/api/emp/documentapi/{doc_id}/download/"):
+            self.assertEqual(client.get(url).status_code, 404, url)
+        response = client.put(f"/api/emp/employeeapi/{employee.pk}/", {"first_name": "X"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+        # nor attach documents to the other employer's workers
+        response = client.post("/api/emp/documentapi/", {
+            "party": employee.pk, "document_name": "Contract",
+            "document": SimpleUploadedFile("contract.pdf", b"%PDF"),
+        }, format="multipart")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("party", response.json())
+        self.assertEqual(Document.objects.count(), 1)
+
+
+class ConditionalGetTests(APITestCase):
+    def test_list_and_detail_revalidate(self):
+        employee = self.create_employee(1)
+        for url in ("/api/emp/employeeapi/", f"/api/emp/employeeapi/{employee.pk}/"):
+            response = self.client.get(url)
+            etag = response["ETag"]
+            self.assertTrue(etag.startswith("W/"))
+            self.assertEqual(response["Cache-Control"], "private, no-cache")
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response.content, b"")
+            self.assertEqual(response["ETag"], etag)
+
+        list_etag = self.client.get("/api/emp/employeeapi/")["ETag"]
+        detail_url = f"/api/emp/employeeapi/{employee.pk}/"
+        detail_etag = self.client.get(detail_url)["ETag"]
+        self.client.put(detail_url, {"first_name": "Zed"}, format="json")
+        for url, etag in (("/api/emp/employeeapi/", list_etag), (detail_url, detail_etag)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_query_and_user(self):
+        self.create_employee(1)
+        etag = self.client.get("/api/emp/employeeapi/")["ETag"]
+        filtered = self.client.get("/api/emp/employeeapi/", {"compensation_type": "hourly"})
+        self.assertNotEqual(filtered["ETag"], etag)
+        response = self.other_client.get("/api/emp/employeeapi/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class RosterCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        self.addCleanup(get_cache().clear)
+
+    def test_hit_miss_and_invalidation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            employee = self.create_employee(1)
+            self.create_employee(2, client=self.other_client)
+        outcomes = [self.client.get("/api/emp/employeeapi/")["X-Cache"] for _ in range(2)]
+        self.assertEqual(outcomes, ["MISS", "HIT"])
+        self.assertEqual(get_stats(), {"hit": 1, "miss": 1})
+        # the browsable API is rendered fresh
+        response = self.client.get("/api/emp/employeeapi/", HTTP_ACCEPT="text/html")
+        self.assertEqual(response["X-Cache"], "BYPASS")
+
+        generations = get_generation(self.user.pk), get_generation(self.other.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f"/api/emp/employeeapi/{employee.pk}/", {"first_name": "Zed"}, format="json")
+        # only the writer's tenant moves to a new generation
+        self.assertEqual((get_generation(self.user.pk), get_generation(self.other.pk)),
+                         (generations[0] + 1, generations[1]))
+        response = self.client.get("/api/emp/employeeapi/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()[0]["first_name"], "Zed")
+
+    def test_import_invalidates(self):
+        generation = get_generation(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/emp/employeeapi/import/", [employee_payload(1)], format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(get_generation(self.user.pk), generation + 1)
+
+
+class ChunkedUploadTests(MediaTestCase):
+    def put_chunk(self, session_id, data, start, size=10):
+        return self.client.put(f"/api/emp/documentapi/uploads/{session_id}/", data,
+                               content_type="application/octet-stream",
+                               HTTP_CONTENT_RANGE=f"bytes {start}-{start + len(data) - 1}/{size}")
+
+    def test_resumable_upload(self):
+        employee = self.create_employee(1)
+        response = self.client.post("/api/emp/documentapi/uploads/", {
+            "party": employee.pk, "document_name": "Contract", "filename": "contract.pdf", "size": 10,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        session_id = response.json()["id"]
+        self.assertEqual(response.json()["offset"], 0)
+
+        self.assertEqual(self.put_chunk(session_id, b"%PDF", 0).json()["offset"], 4)
+        # a chunk that doesn't start where the last one ended is refused
+        response = self.put_chunk(session_id, b"9", 9)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 4)
+        response = self.client.post(f"/api/emp/documentapi/uploads/{session_id}/finalize/")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["offset"], 4)
+
+        self.assertEqual(self.put_chunk(session_id, b"-1.4 x", 4).json()["offset"], 10)
+        response = self.client.post(f"/api/emp/documentapi/uploads/{session_id}/finalize/")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((response.json()["document_name"], response.json()["version"]), ("Contract", 1))
+        download = self.client.get(response.json()["download_url"])
+        self.assertEqual(b"".join(download.streaming_content), b"%PDF-1.4 x")
+        self.assertEqual(self.client.get(f"/api/emp/documentapi/uploads/{session_id}/").status_code, 404)
+
+
+class DocumentDownloadTests(MediaTestCase):
+    content = b"%PDF-0123456789"
+
+    def downloader(self):
+        """Upload `content`; returns a function GETting its download URL."""
+        doc_id = self.upload(self.create_employee(1), content=self.content).json()["id"]
+        return lambda **headers: self.client.get(f"/api/emp/documentapi/{doc_id}/download/", **headers)
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def check_ranges(self, get):
+        response = get()
+        self.assertEqual((response.status_code, self.body(response)), (200, self.content))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["ETag"], f'"{hashlib.sha256(self.content).hexdigest()}"')
+        etag = response["ETag"]
+
+        response = get(HTTP_RANGE="bytes=5-8")
+        self.assertEqual((response.status_code, self.body(response)), (206, b"0123"))
+        self.assertEqual(response["Content-Range"], "bytes 5-8/15")
+        self.assertEqual(response["Content-Length"], "4")
+        response = get(HTTP_RANGE="bytes=-3")
+        self.assertEqual((response.status_code, self.body(response)), (206, b"789"))
+
+        response = get(HTTP_RANGE="bytes=15-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */15")
+
+        # If-Range with a stale tag: the whole (changed) file instead
+        response = get(HTTP_RANGE="bytes=5-8", HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, self.body(response)), (200, self.content))
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_ranges(self):
+        self.check_ranges(self.downloader())
+
+    def test_ranges_of_encrypted_file(self):
+        self.use_encrypted_storage()
+        self.check_ranges(self.downloader())
+
+
+class DocumentVersioningTests(MediaTestCase):
+    def documents(self, party, **params):
+        response = self.client.get("/api/emp/documentapi/", {"party": party.pk, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(d["document_name"], d["version"]) for d in response.json()]
+
+    def test_versions_and_latest_only(self):
+        employee = self.create_employee(1)
+        for content in (b"v1", b"v2"):
+            self.assertEqual(self.upload(employee, content=content).status_code, 201)
+        self.upload(employee, name="i9.pdf", content=b"i9", document_name="I9")
+        self.assertEqual(self.documents(employee), [("I9", 1), ("Contract", 2), ("Contract", 1)])
+        self.assertEqual(self.documents(employee, latest_only="true"), [("I9", 1), ("Contract", 2)])
+
+        # a new file through PUT is the series' next version
+        contract = Document.objects.get(document_name="Contract", version=2)
+        response = self.client.put(f"/api/emp/documentapi/{contract.pk}/", {
+            "document": SimpleUploadedFile("contract.pdf", b"v3"),
+        }, format="multipart")
+        self.assertEqual(response.json()["version"], 3)
+        # renaming moves a document into the series it now belongs to
+        first = Document.objects.get(document_name="Contract", version=1)
+        response = self.client.put(f"/api/emp/documentapi/{first.pk}/", {"document_name": "I9"}, format="json")
+        self.assertEqual(response.json()["version"], 2)
+        self.assertEqual(sorted(self.documents(employee, latest_only="true")), [("Contract", 3), ("I9", 2)])
+
+    def test_deleting_the_latest_version(self):
+        employee = self.create_employee(1)
+        for content in (b"v1", b"v2"):
+            self.upload(employee, content=content)
+        Document.objects.get(version=2).delete()
+        self.assertEqual(self.documents(employee, latest_only="true"), [("Contract", 1)])
+
+
+class ExpiringDocumentTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        employee = self.create_employee(1)
+        today = date.today()
+        for name, days in (("Later", 200), ("Licence", 80), ("Visa", -5), ("Permit", 10), ("Badge", 45)):
+            response = self.upload(employee, content=name.encode(), document_name=name,
+                                   expiry_date=(today + timedelta(days=days)).isoformat())
+            self.assertEqual(response.status_code, 201, response.content)
+        # superseded by a version that doesn't expire
+        self.upload(employee, content=b"old", document_name="Old", expiry_date=today.isoformat())
+        self.upload(employee, content=b"new", document_name="Old")
+
+    def get(self, **params):
+        response = self.client.get("/api/emp/documentapi/expiring/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_buckets(self):
+        body = self.get()
+        self.assertEqual(body["summary"], {"expired": 1, "within_30": 1, "within_60": 1, "within_90": 1,
+                                           "later": 0})
+        self.assertEqual([(r["document_name"], r["expiry_bucket"], r["days_to_expiry"]) for r in body["results"]],
+                         [("Visa", "expired", -5), ("Permit", "within_30", 10), ("Badge", "within_60", 45),
+                          ("Licence", "within_90", 80)])
+        self.assertTrue(body["results"][0]["is_expired"])
+
+        body = self.get(bucket="expired,within_30", within=60)
+        self.assertEqual(body["summary"]["within_90"], 0)
+        self.assertEqual([r["document_name"] for r in body["results"]], ["Visa", "Permit"])
+        self.assertEqual(self.get(all_versions="true")["summary"]["within_30"], 2)
+
+    def test_bad_params(self):
+        response = self.client.get("/api/emp/documentapi/expiring/", {"bucket": "soon", "within": "-1"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {"bucket", "within"})
+
+
+class PurgeDocumentsTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        RetentionPolicy.objects.create(document_type="I9", deleted_retention_days=30)
+        RetentionPolicy.objects.create(document_type="", expired_retention_days=7)
+        employee = self.create_employee(1)
+        now, today = timezone.now(), date.today()
+        self.docs = {}
+        for key, content, data, deleted_days in (
+                ("old_i9", b"a", {"document_type": "I9", "document_name": "Old"}, 40),
+                ("recent_i9", b"b", {"document_type": "I9", "document_name": "Recent"}, 10),
+                ("expired", b"c", {"document_name": "Expired",
+                                   "expiry_date": (today - timedelta(days=10)).isoformat()}, None),
+                ("same_file", b"c", {"document_name": "Copy"}, None),
+                ("no_policy", b"d", {"document_type": "W2", "document_name": "W2"}, 400)):
+            doc_id = self.upload(employee, content=content, **data).json()["id"]
+            if deleted_days is not None:
+                Document.objects.filter(pk=doc_id).update(deleted_at=now - timedelta(days=deleted_days))
+            self.docs[key] = doc_id
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command("purge_documents", "--batch-size", "1", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_purges_documents_past_their_policy(self):
+        files = len(self.stored_files())
+        output = self.purge()
+        self.assertIn("Purged 2 document(s) and 1 file(s)", output)
+        self.assertEqual(set(Document.objects.values_list("pk", flat=True)),
+                         {self.docs["recent_i9"], self.docs["same_file"], self.docs["no_policy"]})
+        # the expired document's file is still used by its copy
+        self.assertEqual(len(self.stored_files()), files - 1)
+
+    def test_dry_run(self):
+        output = self.purge("--dry-run")
+        self.assertIn("Dry run: 2 document(s) due for purging", output)
+        self.assertIn("Would free 1 file(s), 1 bytes.", output)
+        self.assertEqual(Document.objects.count(), 5)
+
+
+class DocumentBundleTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = self.create_employee(1, first_name="Ann", last_name="Lee")
+        self.contractor = self.create_contractor(2, contractor_name="Acme")
+        self.upload(self.employee, content=b"v1")
+        self.upload(self.employee, content=b"v2")
+        self.upload(self.employee, name="notes.doc", content=b"notes " * 100, document_name="Notes")
+        self.upload(self.contractor, content=b"w9", document_name="W9")
+        deleted = self.upload(self.contractor, content=b"gone", document_name="Gone").json()["id"]
+        Document.objects.filter(pk=deleted).update(deleted_at=timezone.now())
+
+    def bundle(self, **params):
+        response = self.client.get("/api/emp/documentapi/bundle/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        archive = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+        manifest = json.loads(archive.read("manifest.json"))
+        return archive, manifest
+
+    def test_bundle_contents(self):
+        archive, manifest = self.bundle()
+        employee_dir, contractor_dir = f"{self.employee.pk}_Lee_Ann", f"{self.contractor.pk}_Acme"
+        self.assertEqual(archive.namelist(), [
+            f"{employee_dir}/Contract_v0001.pdf", f"{employee_dir}/Contract_v0002.pdf",
+            f"{employee_dir}/Notes_v0001.doc", f"{contractor_dir}/W9_v0001.pdf", "manifest.json",
+        ])
+        self.assertEqual(archive.read(f"{employee_dir}/Contract_v0002.pdf"), b"v2")
+        self.assertEqual(archive.getinfo(f"{employee_dir}/Notes_v0001.doc").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.getinfo(f"{employee_dir}/Contract_v0001.pdf").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual([entry["path"] for entry in manifest], archive.namelist()[:-1])
+        self.assertEqual(manifest[1]["sha256"], hashlib.sha256(b"v2").hexdigest())
+
+    def test_one_party_latest_only(self):
+        archive, _ = self.bundle(party=self.employee.pk, latest_only="true")
+        self.assertEqual([name.split("/")[-1] for name in archive.namelist()],
+                         ["Contract_v0002.pdf", "Notes_v0001.doc", "manifest.json"])
+        self.assertEqual(self.other_client.get("/api/emp/documentapi/bundle/",
+                                               {"party": self.employee.pk}).status_code, 404)
+
+    def test_missing_file_is_listed(self):
+        doc = Document.objects.get(document_name="W9")
+        doc.document.storage.delete(doc.document.name)
+        archive, manifest = self.bundle(party=self.contractor.pk)
+        self.assertEqual(archive.namelist(), ["manifest.json"])
+        self.assertEqual((manifest[0]["path"], manifest[0]["error"]), (None, "file missing from storage"))
+
+
+class ApiTokenTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+
+    def get_roster(self, token):
+        return APIClient().get("/api/emp/employeeapi/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_issue_and_revoke(self):
+        out = StringIO()
+        call_command("api_token", "create", "boss", "--name", "payroll sync", stdout=out)
+        token = out.getvalue().splitlines()[1]
+        api_token = ApiToken.objects.get()
+        self.assertEqual(api_token.token_hash, ApiToken.hash_token(token))
+        self.assertNotIn(token, str(vars(api_token)))
+
+        for _ in range(2):  # the second request is served by the token cache
+            self.assertEqual(self.get_roster(token).status_code, 200)
+        api_token.refresh_from_db()
+        self.assertIsNotNone(api_token.last_used_at)
+
+        call_command("api_token", "revoke", api_token.prefix, stdout=StringIO())
+        response = self.get_roster(token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+    def test_cached_user_is_not_shared(self):
+        _, token = ApiToken.issue(self.user, "sync")
+        auth = ApiTokenAuthentication()
+        first, first_token = auth.authenticate_token(token)
+        first.set_by_middleware = True
+        second, second_token = auth.authenticate_token(token)  # from the cache
+        self.assertEqual(second.pk, self.user.pk)
+        self.assertIsNot(second, first)
+        self.assertFalse(hasattr(second, "set_by_middleware"))
+        self.assertIs(second_token.user, second)
+
+    def test_rejected_tokens(self):
+        expired, expired_token = ApiToken.issue(self.user, "old", days=1)
+        ApiToken.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        _, inactive_token = ApiToken.issue(self.other, "left")
+        self.other.is_active = False
+        self.other.save()
+        for token in (expired_token, inactive_token, "abc.not-a-token"):
+            self.assertEqual(self.get_roster(token).status_code, 401, token)
+
+
+class RequestProfilingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        settings_override = override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_DIR=self.directory,
+                                              REQUEST_PROFILING_SAMPLE_RATE=0, REQUEST_PROFILING_KEEP=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_staff_request_is_profiled(self):
+        self.create_employee(1)
+        response = self.client.get("/api/emp/employeeapi/", HTTP_X_PROFILE="1")
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-Id"]
+        self.assertIn("EmployeeProfileListCreateView", profile_id)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         [profile_id + suffix for suffix in (".collapsed", ".json", ".pstats")])
+        with open(os.path.join(self.directory, profile_id + ".json")) as fh:
+            meta = json.load(fh)
+        self.assertEqual((meta["method"], meta["path"], meta["user"], meta["status"]),
+                         ("GET", "/api/emp/employeeapi/", "boss", 200))
+
+        out = StringIO()
+        call_command("request_profiles", "--dir", self.directory, "list", stdout=out)
+        self.assertIn(profile_id, out.getvalue())
+        out = StringIO()
+        call_command("request_profiles", "--dir", self.directory, "show", profile_id[:20], stdout=out)
+        self.assertIn("GET /api/emp/employeeapi/ -> 200", out.getvalue())
+
+    def test_only_newest_profiles_are_kept(self):
+        ids = [self.client.get("/api/emp/employeeapi/?_profile=1")["X-Profile-Id"] for _ in range(3)]
+        self.assertEqual(sorted(name.rsplit(".", 1)[0] for name in os.listdir(self.directory)),
+                         sorted(ids[1:] * 3))
+
+    def test_not_profiled(self):
+        response = self.other_client.get("/api/emp/employeeapi/", HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Id", response)
+        with override_settings(REQUEST_PROFILING=False):
+            response = self.client.get("/api/emp/employeeapi/", HTTP_X_PROFILE="1")
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class LogRedactionTests(SimpleTestCase):
+    def record(self, msg, *args, level=logging.INFO, **extra):
+        record = logging.LogRecord("employee.views", level, __file__, 1, msg, args, None)
+        record.__dict__.update(extra)
+        return record
+
+    def test_sensitive_values_are_redacted(self):
+        record = self.record("created %s with %s", "123-45-6789", "tin 12-3456789",
+                             ssn="123456789", payload={"party": {"email": "a@example.com"}, "TIN": "x"},
+                             rows=[{"ssn": "1"}, "ssn 987-65-4321"], party_id=12)
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry["message"], f"created {REDACTED} with tin {REDACTED}")
+        self.assertEqual(entry["ssn"], REDACTED)
+        self.assertEqual(entry["payload"], {"party": {"email": "a@example.com"}, "TIN": REDACTED})
+        self.assertEqual(entry["rows"], [{"ssn": REDACTED}, f"ssn {REDACTED}"])
+        self.assertEqual(entry["party_id"], 12)
+
+    def test_other_numbers_are_kept(self):
+        message = "phone +1-555-0100-1234, order 123456789, amount 987654321, id 1234567890"
+        entry = json.loads(JsonFormatter().format(self.record(message)))
+        self.assertEqual(entry["message"], message)
+
+    def test_traceback_is_redacted(self):
+        try:
+            raise ValueError("bad ssn 123-45-6789")
+        except ValueError:
+            record = logging.LogRecord("employee", logging.ERROR, __file__, 1, "failed", None, sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertIn(f"ValueError: bad ssn {REDACTED}", entry["exc_info"])
+        self.assertNotIn("123-45-6789", entry["exc_info"])
+
+    def test_debug_sampling(self):
+        sampler = SamplingFilter(rate=0.25)
+        self.assertTrue(sampler.filter(self.record("info")))
+        with mock.patch("employee.log.random.random", return_value=0.3):
+            self.assertFalse(sampler.filter(self.record("debug", level=logging.DEBUG)))
+        with mock.patch("employee.log.random.random", return_value=0.2):
+            record = self.record("debug", level=logging.DEBUG)
+            self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.sample_rate, 0.25)
+
+    def test_full_queue_drops_and_reports(self):
+        handler = NonBlockingQueueHandler(queue_size=1)
+        for i in range(3):
+            handler.handle(self.record("event %s", i))
+        self.assertEqual(handler.dropped, 2)
+        handler.queue.get_nowait()
+        handler.handle(self.record("after"))
+        record = handler.queue.get_nowait()
+        self.assertEqual((record.msg, record.dropped_before, handler.dropped), ("after", 2, 0))
+
+
+class CreateLogTests(APITestCase):
+    def test_create_logs_carry_no_ssn(self):
+        formatter = JsonFormatter()
+        with self.assertLogs("employee", level="DEBUG") as logs:
+            self.create_employee(1, ssn="123-45-6789")
+            self.client.post("/api/emp/employeeapi/", employee_payload(2, ssn="123-45-6789"), format="json")
+        messages = [record.getMessage() for record in logs.records]
+        self.assertIn("employee created", messages)
+        self.assertIn("employee create rejected", messages)
+        for record in logs.records:
+            self.assertNotIn("123-45-6789", formatter.format(record))
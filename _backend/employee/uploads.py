@@ -0,0 +1,113 @@
+"""
+Resumable, chunked document uploads.
+
+    POST   documentapi/uploads/                {party, document_name, filename, size, ...}
+           -> 201 session {id, offset: 0, ...}
+    GET    documentapi/uploads/<id>/           -> session; `offset` is where to resume
+    PUT    documentapi/uploads/<id>/           raw bytes, with
+           Content-Range: bytes <start>-<end>/<size> (or ?offset=<start>)
+           -> session; 409 carrying the expected offset if <start> is wrong
+    POST   documentapi/uploads/<id>/finalize/  -> 201 document
+    DELETE documentapi/uploads/<id>/           -> abort
+
+Chunk bodies are copied from the request stream onto a staging file in
+fixed-size reads, so memory stays flat and Django's in-memory upload limits
+never apply. Finalize runs the usual validation and versioning and hands
+the staging file to storage as a temporary file, which FileSystemStorage
+moves into place instead of copying.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+
+READ_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+
+class ChunkError(Exception):
+    """A chunk that can't be applied; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class StagedFile(File):
+    """An assembled staging file that storage can move rather than copy."""
+
+    def __init__(self, path, name):
+        super().__init__(open(path, "rb"), name=name)
+        self._path = path
+
+    def temporary_file_path(self):
+        return self._path
+
+
+def staging_path(session):
+    return os.path.join(settings.DOCUMENT_UPLOAD_STAGING_DIR, f"{session.pk}.part")
+
+
+def parse_chunk_range(request, size):
+    """
+    Return (start, length) of the chunk in `request`; length is None when only
+    ?offset= was given.
+    """
+    header = request.headers.get("Content-Range")
+    if header:
+        match = CONTENT_RANGE_RE.match(header.strip())
+        if not match:
+            raise ChunkError("Malformed Content-Range; expected 'bytes <start>-<end>/<size>'.")
+        start, end, total = int(match[1]), int(match[2]), match[3]
+        if end < start:
+            raise ChunkError("Content-Range end is before its start.")
+        if total != "*" and int(total) != size:
+            raise ChunkError(f"Content-Range size {total} does not match the session size {size}.")
+        return start, end - start + 1
+
+    raw = request.query_params.get("offset")
+    if raw is None:
+        raise ChunkError("Send a Content-Range header or an ?offset= query param.")
+    try:
+        return int(raw), None
+    except ValueError:
+        raise ChunkError("'offset' must be an integer.")
+
+
+def append_chunk(session, stream, start, length=None):
+    """
+    Append `stream` to the session's staging file and return the number of
+    bytes written. The caller must hold a row lock on `session` and record
+    the new `received` in the same transaction.
+    """
+    if start != session.received:
+        raise ChunkError(f"Expected offset {session.received}.", status=409)
+    remaining = session.size - session.received
+    if length is not None and length > remaining:
+        raise ChunkError("Chunk runs past the declared size.")
+
+    path = staging_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    written = 0
+    with open(path, "ab") as fh:
+        # drop bytes an interrupted request wrote but never recorded
+        fh.truncate(session.received)
+        while stream is not None:
+            data = stream.read(READ_SIZE)
+            if not data:
+                break
+            written += len(data)
+            if written > remaining:
+                fh.truncate(session.received)
+                raise ChunkError("Chunk runs past the declared size.")
+            fh.write(data)
+    # a short body (dropped connection) is kept; the client resumes from the new offset
+    return written
+
+
+def discard_staging(session):
+    try:
+        os.remove(staging_path(session))
+    except FileNotFoundError:
+        pass
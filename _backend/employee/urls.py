@@ -2,17 +2,41 @@ from django.urls import path
 from .views import (
                 EmployeeProfileListCreateView, 
                 EmployeeProfileDetailView, 
+                EmployeeProfileExportView,
+                EmployeeProfileImportView,
                 ContractorProfileListCreateView, 
                 ContractorProfileDetailView,
+                ContractorProfileExportView,
+                ContractorProfileImportView,
                 DocumentListCreateView,
-                DocumentDetailView)
+                DocumentBatchUploadView,
+                ExpiringDocumentListView,
+                DocumentDetailView,
+                DocumentDownloadView,
+                DocumentBundleView,
+                UploadSessionCreateView,
+                UploadSessionDetailView,
+                UploadSessionFinalizeView,
+                PartySearchView)
 
 urlpatterns = [
     path('employeeapi/', EmployeeProfileListCreateView.as_view(), name='employee-list-create'),
+    path('employeeapi/export/', EmployeeProfileExportView.as_view(), name='employee-export'),
+    path('employeeapi/import/', EmployeeProfileImportView.as_view(), name='employee-import'),
     path('employeeapi/<int:id>/', EmployeeProfileDetailView.as_view(), name='employee-detail'),
     path('contractorapi/', ContractorProfileListCreateView.as_view(), name='Contractor-list-create'),
+    path('contractorapi/export/', ContractorProfileExportView.as_view(), name='contractor-export'),
+    path('contractorapi/import/', ContractorProfileImportView.as_view(), name='contractor-import'),
     path('contractorapi/<int:id>/', ContractorProfileDetailView.as_view(), name='contractor-detail'),
+    path('searchapi/', PartySearchView.as_view(), name='party-search'),
     path('documentapi/', DocumentListCreateView.as_view(), name='document-list-create'),
-    path('documentapi/<int:id>/',DocumentDetailView.as_view(), name='document-detail')
+    path('documentapi/batch/', DocumentBatchUploadView.as_view(), name='document-batch-upload'),
+    path('documentapi/expiring/', ExpiringDocumentListView.as_view(), name='document-expiring'),
+    path('documentapi/bundle/', DocumentBundleView.as_view(), name='document-bundle'),
+    path('documentapi/<int:id>/',DocumentDetailView.as_view(), name='document-detail'),
+    path('documentapi/<int:id>/download/', DocumentDownloadView.as_view(), name='document-download'),
+    path('documentapi/uploads/', UploadSessionCreateView.as_view(), name='document-upload-create'),
+    path('documentapi/uploads/<uuid:id>/', UploadSessionDetailView.as_view(), name='document-upload-detail'),
+    path('documentapi/uploads/<uuid:id>/finalize/', UploadSessionFinalizeView.as_view(), name='document-upload-finalize'),
 
 ]
@@ -1,50 +1,188 @@
-from rest_framework.views import APIView
-from rest_framework import status, permissions
+from rest_framework import status, permissions, serializers
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
+from rest_framework.utils.urls import replace_query_param
+from datetime import date
+import logging
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404, render
 from django.views.generic import TemplateView
-from .models import Party, EmployeeProfile, ContractorProfile, Document
+from .models import Party, EmployeeProfile, ContractorProfile, Document, UploadSession
+from .pagination import KeysetPaginator
+from .profiling import ProfiledAPIView
+from .conditional import Validators
+from .roster_cache import cached_list_response
+from .crypto import blind_index
+from .search import search_parties
+from .filters import EMPLOYEE_FILTERS, CONTRACTOR_FILTERS, EXPIRING_DOCUMENT_FILTERS, parse_bool
+from .exports import (
+                CSVRenderer,
+                JSONLinesRenderer,
+                EMPLOYEE_EXPORT_FIELDS,
+                CONTRACTOR_EXPORT_FIELDS,
+                export_response)
+from .imports import ImportFormatError, import_rows, parse_rows
+from .blobs import delete_files_on_rollback
+from .downloads import document_response
+from .bundles import bundle_response, party_folders
+from .uploads import (
+                ChunkError,
+                StagedFile,
+                append_chunk,
+                discard_staging,
+                parse_chunk_range,
+                staging_path)
 from .serializers import (
                 EmployeeProfileCreateSerializer,
                 EmployeeProfileListSerializer,
+                EmployeeProfileDetailSerializer,
                 EmployeeProfileUpdateSerializer,
                 ContractorProfileCreateSerializer,
                 ContractorProfileListSerializer,
+                ContractorProfileDetailSerializer,
                 ContractorProfileUpdateSerializer,
                 DocumentCreateSerializer,
+                DocumentBatchUploadSerializer,
                 DocumentListSerializer,
-                DocumentUpdateSerializer)
+                ExpiringDocumentSerializer,
+                DocumentUpdateSerializer,
+                PartySearchResultSerializer,
+                UploadSessionCreateSerializer,
+                UploadSessionSerializer,
+                create_versioned_document,
+                validate_upload)
+
+logger = logging.getLogger(__name__)
+
+class EmployeeProfileListCreateView(ProfiledAPIView):
+    # ?ordering= name -> keyset used for sorting and cursor pagination
+    # (non-null columns only, ending in a unique key)
+    orderings = {
+        "last_name": ("last_name", "pk"),
+        "first_name": ("first_name", "pk"),
+        "date_hired": ("date_hired", "pk"),
+        "created_at": ("created_at", "id"),
+        "updated_at": ("updated_at", "id"),
+    }
 
-class EmployeeProfileListCreateView(APIView):
     def get(self, request):
-        employee_profiles = EmployeeProfile.objects.all()
+        # the list shows ssn_masked, so the ciphertext is never fetched
+        employee_profiles = EmployeeProfile.objects.for_employer(request.user).defer("ssn")
+        ssn = request.query_params.get("ssn")
+        if ssn:
+            # exact match through the blind index; the ciphertext can't be searched
+            employee_profiles = employee_profiles.filter(ssn_index=blind_index(ssn))
+        employee_profiles = EMPLOYEE_FILTERS.filter_queryset(employee_profiles, request)
+        validators = Validators.for_list(employee_profiles, request)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return cached_list_response(request, "employees", validators,
+                                    lambda: self.build_response(employee_profiles, request))
+
+    def build_response(self, employee_profiles, request):
+        paginator = KeysetPaginator(self.orderings)
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(employee_profiles, request)
+            serializer = EmployeeProfileListSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        employee_profiles = paginator.order_queryset(employee_profiles, request)
         serializer = EmployeeProfileListSerializer(employee_profiles, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
     def post(self, request):
 
-        print(f"request.data ------- {request.user}")
         serializer = EmployeeProfileCreateSerializer(data=request.data, context={'request': request})
         # print(f"found user - {request.user}")
 
         if serializer.is_valid():
-            serializer.save()
-            print(f"created employee : {serializer.data}")
+            employee = serializer.save()
+            logger.info("employee created", extra={"party_id": employee.pk, "user_id": request.user.pk})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        print(f"serializer erors - {serializer.errors}")
+        # field names only; the rejected values are the worker's personal data
+        logger.info("employee create rejected", extra={"fields": sorted(serializer.errors), "user_id": request.user.pk})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
 
+
+
+class RosterImportView(ProfiledAPIView):
+    """
+    POST <roster>/import/   -> bulk create from a JSON list body or a
+                               multipart `file` (.csv or .json)
+    ?dry_run=true validates without writing.
+    """
+    kind = None
+    parser_classes = (JSONParser, MultiPartParser, FormParser)
+
+    def get_rows(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            if isinstance(request.data, list):
+                return request.data
+            if isinstance(request.data, dict) and isinstance(request.data.get("rows"), list):
+                return request.data["rows"]
+            raise ImportFormatError("Send a JSON list of rows, {\"rows\": [...]}, or a multipart 'file'.")
+        fmt = upload.name.rsplit(".", 1)[-1].lower()
+        try:
+            content = upload.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ImportFormatError("File must be UTF-8 encoded.")
+        return parse_rows(content, fmt)
+
+    def post(self, request):
+        try:
+            rows = self.get_rows(request)
+        except ImportFormatError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true", "yes")
+        result = import_rows(self.kind, rows, employer=request.user, dry_run=dry_run)
+        if result["errors"]:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        if dry_run:
+            return Response(result, status=status.HTTP_200_OK)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class EmployeeProfileImportView(RosterImportView):
+    kind = "employee"
+
+
+class ContractorProfileImportView(RosterImportView):
+    kind = "contractor"
+
+
+class EmployeeProfileExportView(ProfiledAPIView):
+    """
+    GET /api/emp/employeeapi/export/?format=jsonl|csv -> stream the roster
+        (accepts the same filters as the list endpoint)
+    """
+    renderer_classes = (JSONLinesRenderer, CSVRenderer)
+
+    def get(self, request):
+        employee_profiles = EMPLOYEE_FILTERS.filter_queryset(
+            EmployeeProfile.objects.for_employer(request.user), request)
+        return export_response(employee_profiles,
+                               EMPLOYEE_EXPORT_FIELDS,
+                               request.accepted_renderer.format,
+                               filename="employees")
+
     
-class EmployeeProfileDetailView(APIView):
+class EmployeeProfileDetailView(ProfiledAPIView):
     def get(self, request, id):
-        employee_profile = get_object_or_404(EmployeeProfile, id=id)
-        serializer = EmployeeProfileListSerializer(employee_profile)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        employee_profiles = EmployeeProfile.objects.for_employer(request.user)
+        validators = Validators.for_row(employee_profiles, id=id)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        employee_profile = get_object_or_404(employee_profiles, id=id)
+        serializer = EmployeeProfileDetailSerializer(employee_profile)
+        return validators.apply(Response(serializer.data, status=status.HTTP_200_OK))
     
     def put(self, request, id):
-        employee_profile = get_object_or_404(EmployeeProfile, id=id)
+        employee_profile = get_object_or_404(EmployeeProfile.objects.for_employer(request.user), id=id)
         serializer = EmployeeProfileUpdateSerializer(employee_profile, 
                                                      data=request.data,
                                                      partial=True)
@@ -53,9 +191,37 @@ class EmployeeProfileDetailView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-class ContractorProfileListCreateView(APIView):
+class ContractorProfileListCreateView(ProfiledAPIView):
+    # ?ordering= name -> keyset used for sorting and cursor pagination
+    # (non-null columns only, ending in a unique key)
+    orderings = {
+        "contractor_name": ("contractor_name", "pk"),
+        "created_at": ("created_at", "id"),
+        "updated_at": ("updated_at", "id"),
+    }
+
     def get(self, request):
-        contractor_profiles = ContractorProfile.objects.all()
+        # the list shows tin_masked, so the ciphertext is never fetched
+        contractor_profiles = ContractorProfile.objects.for_employer(request.user).defer("tin")
+        tin = request.query_params.get("tin")
+        if tin:
+            # exact match through the blind index; the ciphertext can't be searched
+            contractor_profiles = contractor_profiles.filter(tin_index=blind_index(tin))
+        contractor_profiles = CONTRACTOR_FILTERS.filter_queryset(contractor_profiles, request)
+        validators = Validators.for_list(contractor_profiles, request)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return cached_list_response(request, "contractors", validators,
+                                    lambda: self.build_response(contractor_profiles, request))
+
+    def build_response(self, contractor_profiles, request):
+        paginator = KeysetPaginator(self.orderings)
+        if paginator.is_requested(request):
+            page = paginator.paginate_queryset(contractor_profiles, request)
+            serializer = ContractorProfileListSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        contractor_profiles = paginator.order_queryset(contractor_profiles, request)
         serializer = ContractorProfileListSerializer(contractor_profiles, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -66,20 +232,42 @@ class ContractorProfileListCreateView(APIView):
         # print(f"found user - {request.user}")
 
         if serializer.is_valid():
-            serializer.save()
+            contractor = serializer.save()
+            logger.info("contractor created", extra={"party_id": contractor.pk, "user_id": request.user.pk})
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        print(f"serializer errors - {serializer.errors}")
+        logger.info("contractor create rejected", extra={"fields": sorted(serializer.errors), "user_id": request.user.pk})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ContractorProfileDetailView(APIView):
+class ContractorProfileExportView(ProfiledAPIView):
+    """
+    GET /api/emp/contractorapi/export/?format=jsonl|csv -> stream the roster
+        (accepts the same filters as the list endpoint)
+    """
+    renderer_classes = (JSONLinesRenderer, CSVRenderer)
+
+    def get(self, request):
+        contractor_profiles = CONTRACTOR_FILTERS.filter_queryset(
+            ContractorProfile.objects.for_employer(request.user), request)
+        return export_response(contractor_profiles,
+                               CONTRACTOR_EXPORT_FIELDS,
+                               request.accepted_renderer.format,
+                               filename="contractors")
+
+
+class ContractorProfileDetailView(ProfiledAPIView):
     def get(self, request, id):
-        contractor_profile = get_object_or_404(ContractorProfile, id=id)
-        serializer = ContractorProfileListSerializer(contractor_profile)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        contractor_profiles = ContractorProfile.objects.for_employer(request.user)
+        validators = Validators.for_row(contractor_profiles, id=id)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        contractor_profile = get_object_or_404(contractor_profiles, id=id)
+        serializer = ContractorProfileDetailSerializer(contractor_profile)
+        return validators.apply(Response(serializer.data, status=status.HTTP_200_OK))
     
     def put(self, request, id):
-        contractor_profile = get_object_or_404(ContractorProfile, id=id)
+        contractor_profile = get_object_or_404(ContractorProfile.objects.for_employer(request.user), id=id)
         # print(f"found the following contractor - {contractor_profile}")
         # print(contractor_profile)  # which model is it?
         # print(type(contractor_profile))
@@ -94,9 +282,49 @@ class ContractorProfileDetailView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-class DocumentListCreateView(APIView):
+class PartySearchView(ProfiledAPIView):
+    """
+    GET /api/emp/searchapi/?q=<text>[&kind=employee|contractor][&limit=&offset=]
+        -> ranked matches on name, email, phone and city
     """
-    GET  /api/docs/   -> list ALL documents 
+    def get(self, request):
+        term = request.query_params.get("q", "").strip()
+        try:
+            limit = min(int(request.query_params.get("limit", settings.SEARCH_PAGE_SIZE)),
+                        settings.SEARCH_MAX_PAGE_SIZE)
+            offset = int(request.query_params.get("offset", 0))
+        except (TypeError, ValueError):
+            return Response({"detail": "'limit' and 'offset' must be integers."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1 or offset < 0:
+            return Response({"detail": "'limit' must be positive and 'offset' non-negative."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(term) < settings.SEARCH_MIN_QUERY_LENGTH:
+            return Response({"next": None, "results": []})
+
+        parties = (Party.objects.for_employer(request.user)
+                   .select_related("employeeprofile", "contractorprofile"))
+        kind = request.query_params.get("kind")
+        if kind == "employee":
+            parties = parties.filter(employeeprofile__isnull=False)
+        elif kind == "contractor":
+            parties = parties.filter(contractorprofile__isnull=False)
+        elif kind:
+            return Response({"detail": "'kind' must be 'employee' or 'contractor'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # one extra row tells us whether there is a next page, without a COUNT
+        rows = list(search_parties(parties, term)[offset:offset + limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            next_url = replace_query_param(request.build_absolute_uri(), "offset", offset + limit)
+        serializer = PartySearchResultSerializer(rows[:limit], many=True)
+        return Response({"next": next_url, "results": serializer.data})
+
+
+class DocumentListCreateView(ProfiledAPIView):
+    """
+    GET  /api/docs/?party=<id>[&latest_only=true] -> list documents (every version, or the newest of each)
     POST /api/docs/   -> create (multipart supported)
     """
     permission_classes = [permissions.IsAuthenticated]
@@ -112,10 +340,24 @@ class DocumentListCreateView(APIView):
         except (TypeError, ValueError):
             return Response({"detail": "Query param 'party' must be an integer."},
                             status=status.HTTP_400_BAD_REQUEST)
-        # Ensure the party exists (gives a clean 404 if not)
-        get_object_or_404(Party, pk=party_id)
+        # Ensure the party exists and is one of ours (clean 404 otherwise)
+        get_object_or_404(Party.objects.for_employer(request.user), pk=party_id)
+
+        if request.query_params.get("latest_only", "").lower() in ("1", "true", "yes"):
+            # one row per series, straight through DocumentSeries.latest
+            docs = Document.objects.filter(latest_of__party_id=party_id)
+        else:
+            docs = Document.objects.filter(party_id=party_id)
+        # is_expired / days_to_expiry change with the date, not just the rows
+        validators = Validators.for_list(docs, request, extra=(date.today(),))
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return cached_list_response(request, "documents", validators,
+                                    lambda: self.build_response(docs, request))
 
-        docs = Document.objects.filter(party_id=party_id).order_by("-uploaded_at", "-id")
+    def build_response(self, docs, request):
+        docs = docs.order_by("-uploaded_at", "-id")
         serializer = DocumentListSerializer(docs, many=True, context={"request": request})
         return Response(serializer.data)
 
@@ -127,7 +369,131 @@ class DocumentListCreateView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class DocumentDetailView(APIView):
+class DocumentBatchUploadView(ProfiledAPIView):
+    """
+    POST /api/emp/documentapi/batch/  (multipart)
+        party, documents (repeated), [document_type, expiry_date, metadata]
+    -> {"results": [{index, filename, status: created|error, ...}]} with
+       201 when every file was stored, 207 when some were rejected and 400
+       when none were
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+
+    def post(self, request):
+        serializer = DocumentBatchUploadSerializer(data=request.data, context={"request": request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        results = serializer.save()
+        created = sum(1 for result in results if result["status"] == "created")
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"results": results}, status=code)
+
+
+class ExpiringDocumentListView(ProfiledAPIView):
+    """
+    GET /api/emp/documentapi/expiring/[?within=<days>&bucket=expired,within_30
+        &document_type=I9,licence&party=<id>&all_versions=true]
+    -> {"summary": {bucket: count}, "next": <url>, "results": [...]}
+
+    Expired and soon-to-expire live documents across every party of the
+    employer, soonest first, keyset-paginated. Buckets and days_to_expiry
+    are computed by the database; `summary` counts every bucket (before
+    ?bucket= narrows the page). Only the newest version of each document
+    counts unless all_versions=true.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    orderings = {"expiry_date": ("expiry_date", "pk")}
+
+    def get(self, request):
+        today = date.today()
+        windows = settings.DOCUMENT_EXPIRY_WINDOWS
+        params = request.query_params
+        errors = {}
+        within = max(windows)
+        if params.get("within"):
+            try:
+                within = int(params["within"])
+                if within < 0:
+                    raise ValueError
+            except ValueError:
+                errors["within"] = "Must be a non-negative integer."
+        allowed = ["expired", *(f"within_{n}" for n in sorted(windows)), "later"]
+        buckets = None
+        if params.get("bucket"):
+            buckets = [b.strip() for b in params["bucket"].split(",") if b.strip()]
+            if not buckets or set(buckets) - set(allowed):
+                errors["bucket"] = f"Unsupported bucket. Allowed: {', '.join(allowed)}"
+        all_versions = False
+        if params.get("all_versions"):
+            try:
+                all_versions = parse_bool(params["all_versions"])
+            except ValueError as exc:
+                errors["all_versions"] = str(exc)
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        docs = Document.objects.for_employer(request.user).expiring(today, within, windows)
+        if not all_versions:
+            docs = docs.filter(latest_of__isnull=False)
+        docs = EXPIRING_DOCUMENT_FILTERS.filter_queryset(docs, request)
+        # buckets shift with the date even when no row changes
+        validators = Validators.for_list(docs, request, extra=(today,))
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        return cached_list_response(request, "expiring-documents", validators,
+                                    lambda: self.build_response(docs, allowed, buckets, request))
+
+    def build_response(self, docs, allowed, buckets, request):
+        counts = docs.expiry_summary()
+        summary = {bucket: counts.get(bucket, 0) for bucket in allowed}
+        if buckets:
+            docs = docs.filter(expiry_bucket__in=buckets)
+        paginator = KeysetPaginator(self.orderings)
+        page = paginator.paginate_queryset(docs, request)
+        serializer = ExpiringDocumentSerializer(page, many=True, context={"request": request})
+        return Response({
+            "summary": summary,
+            "next": paginator.get_next_link(),
+            "results": serializer.data,
+        })
+
+
+class DocumentBundleView(ProfiledAPIView):
+    """
+    GET /api/emp/documentapi/bundle/[?party=<id>][&latest_only=true]
+    -> ZIP of the live documents of one party, or of every worker of the
+       employer, with a manifest.json; streamed while it is built
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        docs = Document.objects.for_employer(request.user).filter(deleted_at__isnull=True)
+        party_id = request.query_params.get("party")
+        filename = "documents"
+        if party_id:
+            try:
+                party_id = int(party_id)
+            except (TypeError, ValueError):
+                return Response({"detail": "Query param 'party' must be an integer."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            get_object_or_404(Party.objects.for_employer(request.user), pk=party_id)
+            docs = docs.filter(party_id=party_id)
+            filename = f"documents_party_{party_id}"
+        else:
+            party_id = None
+        if request.query_params.get("latest_only", "").lower() in ("1", "true", "yes"):
+            docs = docs.filter(latest_of__isnull=False)
+        return bundle_response(docs, party_folders(request.user, party_id), filename)
+
+
+class DocumentDetailView(ProfiledAPIView):
     """
     GET   /api/docs/<id>/   -> retrieve
     PUT   /api/docs/<id>/   -> full update
@@ -137,12 +503,17 @@ class DocumentDetailView(APIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
 
     def get(self, request, id):
-        doc = get_object_or_404(Document, pk=id)
+        docs = Document.objects.for_employer(request.user)
+        validators = Validators.for_row(docs, "version", extra=(date.today(),), pk=id)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+        doc = get_object_or_404(docs, pk=id)
         serializer = DocumentListSerializer(doc, context={"request": request})
-        return Response(serializer.data)
+        return validators.apply(Response(serializer.data))
 
     def put(self, request, id):
-        doc = get_object_or_404(Document, pk=id)
+        doc = get_object_or_404(Document.objects.for_employer(request.user), pk=id)
         serializer = DocumentUpdateSerializer(
                                                 doc, 
                                                 data=request.data, 
@@ -161,6 +532,106 @@ class DocumentDetailView(APIView):
     #         return Response(DocumentListSerializer(instance, context={"request": request}).data)
     #     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class DocumentDownloadView(ProfiledAPIView):
+    """
+    GET /api/emp/documentapi/<id>/download/[?inline=true] -> the file (Range / 206 supported)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, id):
+        docs = Document.objects.for_employer(request.user).select_related("blob")
+        doc = get_object_or_404(docs.exclude(document=""), pk=id)
+        inline = request.query_params.get("inline", "").lower() in ("1", "true", "yes")
+        return document_response(request, doc, inline=inline)
+
+
+class UploadSessionCreateView(ProfiledAPIView):
+    """
+    POST /api/emp/documentapi/uploads/ -> start a resumable upload (protocol in uploads.py)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data, context={"request": request})
+        if serializer.is_valid():
+            session = serializer.save(created_by=request.user)
+            return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def get_upload_session(request, id, lock=False):
+    sessions = UploadSession.objects.filter(created_by=request.user)
+    if lock:
+        sessions = sessions.select_for_update()
+    return get_object_or_404(sessions, pk=id)
+
+
+class UploadSessionDetailView(ProfiledAPIView):
+    """
+    GET    /api/emp/documentapi/uploads/<id>/ -> progress (offset to resume from)
+    PUT    /api/emp/documentapi/uploads/<id>/ -> append one chunk (raw body)
+    DELETE /api/emp/documentapi/uploads/<id>/ -> abort
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, id):
+        session = get_upload_session(request, id)
+        return Response(UploadSessionSerializer(session).data)
+
+    def put(self, request, id):
+        with transaction.atomic():
+            # the lock serialises concurrent PUTs for the same session
+            session = get_upload_session(request, id, lock=True)
+            try:
+                start, length = parse_chunk_range(request, session.size)
+                written = append_chunk(session, request.stream, start, length)
+            except ChunkError as exc:
+                return Response({"detail": str(exc), "offset": session.received}, status=exc.status)
+            session.received += written
+            session.save(update_fields=["received", "updated_at"])
+        return Response(UploadSessionSerializer(session).data)
+
+    def delete(self, request, id):
+        session = get_upload_session(request, id)
+        discard_staging(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionFinalizeView(ProfiledAPIView):
+    """
+    POST /api/emp/documentapi/uploads/<id>/finalize/ -> create the versioned Document
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, id):
+        with delete_files_on_rollback(), transaction.atomic():
+            session = get_upload_session(request, id, lock=True)
+            if not session.is_complete:
+                return Response({"detail": f"Upload incomplete: {session.received} of {session.size} bytes received.",
+                                 "offset": session.received},
+                                status=status.HTTP_409_CONFLICT)
+            upload = StagedFile(staging_path(session), session.filename)
+            try:
+                try:
+                    validate_upload(upload, max_bytes=settings.DOCUMENT_UPLOAD_MAX_BYTES)
+                except serializers.ValidationError as exc:
+                    return Response({"document": exc.detail}, status=status.HTTP_400_BAD_REQUEST)
+                doc = create_versioned_document({
+                    "party": session.party,
+                    "document_type": session.document_type,
+                    "document_name": session.document_name,
+                    "expiry_date": session.expiry_date,
+                }, upload, request.user)
+            finally:
+                upload.close()
+            # gone if storage moved it into place; otherwise (copied or deduplicated) drop it
+            discard_staging(session)
+            session.delete()
+        serializer = DocumentListSerializer(doc, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
 class FrontendAppView(TemplateView):
     template_name = "index.html"
    
\ No newline at end of file